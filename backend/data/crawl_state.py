@@ -0,0 +1,139 @@
+"""
+State crawl katalog (SQLite) supaya harvest bisa di-resume:
+- records : detail per id buku (html_part + xml_part), 1 buku cukup di-fetch sekali
+            walau cocok dengan banyak keyword
+- pages   : item per halaman list (cursor halaman per keyword)
+- keywords: keyword yang sudah selesai
+- emitted : baris (keyword, id) yang sudah ditulis ke JSONL, jadi resume nggak dobel
+Baris hasil ditulis append-only ke JSONL (RowSink), xlsx dibuat dari JSONL di akhir.
+Dipakai scraping.py dan harvest.py.
+"""
+import json
+import sqlite3
+import time
+from pathlib import Path
+
+import pandas as pd
+
+schema = """
+CREATE TABLE IF NOT EXISTS records (id TEXT PRIMARY KEY, html_part TEXT, xml_part TEXT, fetched_at REAL);
+CREATE TABLE IF NOT EXISTS pages (keyword TEXT, page INTEGER, items TEXT, total_pages INTEGER, PRIMARY KEY (keyword, page));
+CREATE TABLE IF NOT EXISTS keywords (keyword TEXT PRIMARY KEY, rows INTEGER, finished_at REAL);
+CREATE TABLE IF NOT EXISTS emitted (keyword TEXT, id TEXT, PRIMARY KEY (keyword, id));
+"""
+
+class RowSink:
+    """
+    Append-only JSONL, 1 baris per (keyword, buku), di-flush tiap baris.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.f = open(self.path, "a", encoding="utf-8")
+
+    def write(self, row: dict):
+        self.f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+class CrawlState:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.path))
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(schema)
+        self.stats = {"detail_hits": 0, "page_hits": 0, "skipped_keywords": 0, "emitted": 0}
+
+    def close(self):
+        self.db.close()
+
+    # detail per buku
+    def get_record(self, rid: str):
+        r = self.db.execute("SELECT html_part, xml_part FROM records WHERE id = ?", (rid,)).fetchone()
+        if r is None:
+            return None
+        self.stats["detail_hits"] += 1
+        return json.loads(r[0]), json.loads(r[1])
+
+    def save_record(self, rid: str, html_part: dict, xml_part: dict):
+        # detail gagal (kosong) nggak disimpan, biar diulang waktu resume
+        if not xml_part:
+            return
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?)",
+                (rid, json.dumps(html_part, ensure_ascii=False), json.dumps(xml_part, ensure_ascii=False), time.time()),
+            )
+
+    # cursor halaman list
+    def get_page(self, keyword: str, page: int):
+        r = self.db.execute("SELECT items, total_pages FROM pages WHERE keyword = ? AND page = ?", (keyword, page)).fetchone()
+        if r is None:
+            return None
+        self.stats["page_hits"] += 1
+        return json.loads(r[0]), r[1]
+
+    def save_page(self, keyword: str, page: int, items: list, total_pages: int = None):
+        if not items:
+            return
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?)",
+                (keyword, page, json.dumps(items, ensure_ascii=False), total_pages),
+            )
+
+    # keyword
+    def keyword_done(self, keyword: str) -> bool:
+        done = self.db.execute("SELECT 1 FROM keywords WHERE keyword = ?", (keyword,)).fetchone() is not None
+        if done:
+            self.stats["skipped_keywords"] += 1
+        return done
+
+    def mark_done(self, keyword: str, rows: int):
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO keywords VALUES (?, ?, ?)", (keyword, rows, time.time()))
+
+    # output
+    def emit(self, sink: RowSink, row: dict):
+        key = (row.get("keyword", ""), row["id"])
+        if self.db.execute("SELECT 1 FROM emitted WHERE keyword = ? AND id = ?", key).fetchone():
+            return
+        sink.write(row)
+        with self.db:
+            self.db.execute("INSERT INTO emitted VALUES (?, ?)", key)
+        self.stats["emitted"] += 1
+
+def read_rows(path) -> pd.DataFrame:
+    """
+    JSONL hasil crawl -> DataFrame (kolom sama dengan xlsx lama).
+    Crash di antara tulis baris & catat emitted bisa bikin dobel, jadi dedupe (keyword, id).
+    """
+    path = Path(path)
+    if not path.exists() or path.stat().st_size == 0:
+        return pd.DataFrame()
+    rows = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rows.append(json.loads(line))
+            except json.JSONDecodeError:
+                # baris terakhir terpotong karena crash
+                continue
+    df = pd.DataFrame(rows)
+    if len(df):
+        df = df.drop_duplicates(["keyword", "id"], keep="last").reset_index(drop=True)
+    return df
+
+def write_xlsx(df: pd.DataFrame, out):
+    with pd.ExcelWriter(out) as writer:
+        if "isbn" in df.columns:
+            df["isbn"] = df["isbn"].astype(str)
+        df.to_excel(writer, index=False, sheet_name="data")
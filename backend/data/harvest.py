@@ -0,0 +1,327 @@
+"""
+Harvester katalog SLiMS async (pengganti scraping.py untuk harvest besar):
+- list + detail diambil langsung dari endpoint ?inXML=true (MODS) dan halaman detail
+  HTML (availability, penerbit) lewat 1 httpx.AsyncClient (connection pool)
+- concurrency dibatasi semaphore, rate limit per host, retry + exponential backoff
+- detail 1 buku cuma diambil sekali walau muncul di banyak keyword (juga antar run,
+  lewat state SQLite di crawl_state.py); baris hasil di-stream ke JSONL
+- run yang terputus tinggal dijalankan ulang: keyword / halaman / detail yang sudah
+  ada di state di-skip
+- kalau HTTP tetap gagal / diblok (bukan MODS), fallback ke Selenium (scraping.py)
+
+contoh:
+    python data/harvest.py --keywords "machine learning,data science" --out data/hasil_catalog.xlsx
+    python data/harvest.py --keywords sql --record /tmp/slims_fixtures
+    python data/harvest.py --state data/crawl_state.sqlite --jsonl data/hasil_catalog.jsonl   # resume
+    python data/harvest.py --base-url http://127.0.0.1:8200/ --no-selenium
+"""
+import argparse
+import asyncio
+import random
+import threading
+import time
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+
+import slims
+from crawl_state import CrawlState, RowSink, read_rows, write_xlsx
+
+retry_status = {429, 500, 502, 503, 504}
+user_agent = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/141.0.0.0 Safari/537.36"
+)
+
+class HostRateLimiter:
+    """
+    Maksimal `rate` request per detik per host (jarak minimal antar request,
+    slot dibagi rata ke semua coroutine yang antre).
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.next_slot = {}
+        self.lock = asyncio.Lock()
+
+    async def wait(self, host: str):
+        if not self.interval:
+            return
+        async with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(host, 0.0))
+            self.next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+class Harvester:
+    def __init__(self, base_url: str = slims.BASE, concurrency: int = 8, rate: float = 4.0, retries: int = 4,
+                 backoff: float = 0.5, timeout: float = 30.0, selenium: bool = True, record_dir: str = None,
+                 state: CrawlState = None, sink: RowSink = None):
+        self.base = base_url if base_url.endswith("/") else base_url + "/"
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.selenium = selenium
+        self.record_dir = Path(record_dir) if record_dir else None
+        self.state = state
+        self.sink = sink
+
+        self.sem = asyncio.Semaphore(concurrency)
+        self.limiter = HostRateLimiter(rate)
+        self.details = {}  # id -> task (html_part, xml_part), 1 buku 1x fetch
+        self.stats = {"requests": 0, "retries": 0, "failed": 0, "fallback": 0, "details": 0}
+
+        self._driver = None
+        self._driver_lock = threading.Lock()
+        self.client = None
+
+    async def __aenter__(self):
+        self.client = httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+            headers={"User-Agent": user_agent, "Accept-Language": "id-ID,id"},
+            follow_redirects=True,
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.client.aclose()
+        if self._driver is not None:
+            try:
+                self._driver.quit()
+            except Exception:
+                pass
+
+    # HTTP
+    async def get(self, url: str):
+        """
+        GET dengan retry (429 / 5xx / error koneksi). None kalau tetap gagal.
+        Tunggu backoff di luar semaphore supaya slot bisa dipakai request lain.
+        """
+        host = urlparse(url).netloc
+        err = None
+        for attempt in range(self.retries + 1):
+            delay = None
+            async with self.sem:
+                await self.limiter.wait(host)
+                self.stats["requests"] += 1
+                try:
+                    r = await self.client.get(url)
+                except httpx.TransportError as e:
+                    r = None
+                    err = repr(e)
+
+            if r is not None:
+                if r.status_code == 200:
+                    self._record(url, r.text)
+                    return r.text
+                err = f"HTTP {r.status_code}"
+                if r.status_code not in retry_status:
+                    break
+                retry_after = r.headers.get("Retry-After", "")
+                if retry_after.isdigit():
+                    delay = float(retry_after)
+
+            if attempt < self.retries:
+                self.stats["retries"] += 1
+                await asyncio.sleep(delay if delay is not None else self.backoff * (2 ** attempt) * (0.5 + random.random()))
+
+        self.stats["failed"] += 1
+        print(f"[WARN] gagal ambil {url}: {err}")
+        return None
+
+    def _record(self, url: str, text: str):
+        if self.record_dir is None:
+            return
+        params = {k: v[0] for k, v in parse_qs(urlparse(url).query).items()}
+        path = slims.fixture_path(self.record_dir, params)
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(text, encoding="utf-8")
+
+    # Selenium fallback
+    def _driver_get(self, url: str) -> str:
+        # sync (jalan di thread), 1 browser dipakai bergantian
+        with self._driver_lock:
+            if self._driver is None:
+                import scraping
+                self._driver = scraping.make_driver()
+            self._driver.get(url)
+            time.sleep(0.3)
+            return self._driver.page_source
+
+    async def fetch(self, url: str, xml: bool = False):
+        text = await self.get(url)
+        if text is not None and (not xml or slims.extract_mods_collection(text)):
+            return text
+        if not self.selenium:
+            return text
+
+        self.stats["fallback"] += 1
+        try:
+            return await asyncio.to_thread(self._driver_get, url)
+        except Exception as e:
+            # tanpa Chrome / undetected_chromedriver: matikan fallback, lanjut HTTP saja
+            print(f"[WARN] fallback Selenium gagal ({e}), fallback dimatikan")
+            self.selenium = False
+            return text
+
+    # SLiMS
+    async def fetch_list(self, query: str, page: int):
+        """
+        (items, total_pages) 1 halaman list. total_pages None kalau tidak diketahui.
+        """
+        cached = self.state.get_page(query, page) if self.state else None
+        if cached is not None:
+            return cached
+
+        items, total_pages = await self._fetch_list(query, page)
+        if self.state:
+            self.state.save_page(query, page, items, total_pages)
+        return items, total_pages
+
+    async def _fetch_list(self, query: str, page: int):
+        url = slims.build_list_url(query, page, self.base)
+        xml = slims.extract_mods_collection(await self.fetch(slims.xml_url(url), xml=True) or "")
+        if xml:
+            items, total_rows, per_page = slims.parse_list_xml(xml, query, self.base)
+            total_pages = max(1, (total_rows + per_page - 1) // per_page) if total_rows else None
+            return items, total_pages
+
+        # fallback list HTML (sama seperti scraping.py)
+        html = await self.fetch(url)
+        if not html:
+            return [], None
+        items, soup = slims.parse_list_html(html, self.base)
+        return items, slims.get_total_pages_from_html(soup, self.base)
+
+    async def _fetch_detail_parts(self, detail_url: str):
+        html, xml_text = await asyncio.gather(self.fetch(detail_url), self.fetch(slims.xml_url(detail_url), xml=True))
+        xml = slims.extract_mods_collection(xml_text or "")
+        self.stats["details"] += 1
+        # None = gagal diambil (beda dengan halaman yang memang kosong)
+        return (
+            slims.parse_detail_html(html) if html is not None else None,
+            slims.parse_detail_xml(xml) if xml else None,
+        )
+
+    async def _detail_parts(self, item: dict):
+        cached = self.state.get_record(item["id"]) if self.state else None
+        if cached is not None:
+            return cached
+        html_part, xml_part = await self._fetch_detail_parts(item["detail_url"])
+        if self.state and html_part is not None and xml_part is not None:
+            self.state.save_record(item["id"], html_part, xml_part)
+        return html_part, xml_part
+
+    async def fetch_detail(self, item: dict):
+        """
+        (row, complete). complete False kalau HTML / MODS detail gagal diambil.
+        """
+        task = self.details.get(item["id"])
+        if task is None:
+            task = asyncio.ensure_future(self._detail_parts(item))
+            self.details[item["id"]] = task
+        html_part, xml_part = await task
+        complete = html_part is not None and xml_part is not None
+        return slims.build_row(item, html_part or {}, xml_part or {}), complete
+
+    async def fetch_row(self, item: dict, query: str):
+        row, complete = await self.fetch_detail(item)
+        row["keyword"] = query
+        # baris yang detailnya gagal nggak ditulis, diulang waktu resume
+        if complete and self.sink is not None:
+            self.state.emit(self.sink, row)
+        return row, complete
+
+    async def crawl(self, query: str) -> list:
+        if self.state and self.state.keyword_done(query):
+            return []
+        items, total_pages = await self.fetch_list(query, 1)
+        pages = [items]
+        if total_pages and total_pages > 1:
+            rest = await asyncio.gather(*[self.fetch_list(query, p) for p in range(2, total_pages + 1)])
+            pages.extend(r[0] for r in rest)
+
+        unique = {}
+        for page_items in pages:
+            for it in page_items:
+                if it.get("id"):
+                    unique[it["id"]] = it
+        results = await asyncio.gather(*[self.fetch_row(it, query) for it in unique.values()])
+        rows = [r for r, _ in results]
+        # keyword ditandai selesai hanya kalau semua halaman + detail berhasil diambil
+        if self.state and all(pages) and all(ok for _, ok in results):
+            self.state.mark_done(query, len(rows))
+        print(f"[INFO] {query}: {len(rows)} buku dari {len(pages)} halaman")
+        return rows
+
+    async def harvest(self, keywords: list) -> list:
+        per_keyword = await asyncio.gather(*[self.crawl(k) for k in keywords])
+        return [r for rows in per_keyword for r in rows]
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--keywords", default=None, help="dipisah koma (default: semua keyword di slims.py)")
+    ap.add_argument("--base-url", default=slims.BASE)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--rate", type=float, default=4.0, help="maks request/detik per host (0 = tanpa batas)")
+    ap.add_argument("--retries", type=int, default=4)
+    ap.add_argument("--backoff", type=float, default=0.5, help="detik, dikali 2^percobaan")
+    ap.add_argument("--timeout", type=float, default=30.0)
+    ap.add_argument("--no-selenium", action="store_true", help="matikan fallback browser")
+    ap.add_argument("--record", default=None, help="simpan response ke folder (buat slims_standin.py)")
+    ap.add_argument("--state", default="crawl_state.sqlite", help="state SQLite untuk resume")
+    ap.add_argument("--jsonl", default="hasil_catalog.jsonl", help="baris hasil (append-only)")
+    ap.add_argument("--fresh", action="store_true", help="hapus state + JSONL lama dulu")
+    ap.add_argument("--out", default="hasil_catalog.xlsx", help="xlsx dari seluruh JSONL ('' = tidak usah)")
+    args = ap.parse_args()
+
+    if args.fresh:
+        for p in (args.state, args.state + "-wal", args.state + "-shm", args.jsonl):
+            Path(p).unlink(missing_ok=True)
+
+    keywords = [k.strip() for k in args.keywords.split(",")] if args.keywords else slims.keywords
+
+    state = CrawlState(args.state)
+    sink = RowSink(args.jsonl)
+
+    async def run():
+        async with Harvester(
+            base_url=args.base_url,
+            concurrency=args.concurrency,
+            rate=args.rate,
+            retries=args.retries,
+            backoff=args.backoff,
+            timeout=args.timeout,
+            selenium=not args.no_selenium,
+            record_dir=args.record,
+            state=state,
+            sink=sink,
+        ) as h:
+            rows = await h.harvest(keywords)
+            return rows, h.stats
+
+    t0 = time.perf_counter()
+    try:
+        new_rows, stats = asyncio.run(run())
+    finally:
+        sink.close()
+        print(f"[INFO] state: {state.stats}")
+        state.close()
+    elapsed = time.perf_counter() - t0
+
+    print(f"[INFO] {stats}")
+    print(f"items this run: {len(new_rows)} ({len(new_rows) / elapsed:.1f}/s, {elapsed:.1f}s)")
+
+    if args.out:
+        df = read_rows(args.jsonl)
+        write_xlsx(df, args.out)
+        print(f"total items: {len(df)}")
+        print(f"saved file: {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Refresh status ketersediaan buku tanpa scraping ulang + re-ingest:
+- ambil daftar buku (parent_id + record_ids) dari docs.json snapshot aktif
+- per record id cuma buka halaman detail HTML (tabel eksemplar, parse_detail_html);
+  MODS XML nggak memuat status sirkulasi
+- hasil ditulis ke vectorstore/availability.json (utils/availability.py),
+  API yang sedang jalan ikut memakainya tanpa restart
+Record yang gagal diambil tetap pakai status lama (di store / di docs.json).
+
+contoh:
+    python data/refresh_availability.py
+    python data/refresh_availability.py --base-url http://127.0.0.1:8200/ --no-selenium --limit 50
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+data_dir = Path(__file__).resolve().parent
+sys.path.insert(0, str(data_dir.parent))
+
+import slims  # noqa: E402
+from harvest import Harvester  # noqa: E402
+from utils import snapshot  # noqa: E402
+from utils.availability import now_iso, read_records, store_file, write_store  # noqa: E402
+
+def load_books(vector_dir: Path):
+    """
+    (versi snapshot, [(parent_id, [record id SLiMS], status di docs.json)])
+    """
+    if (vector_dir / snapshot.pointer_file).exists():
+        path, version = snapshot.resolve(vector_dir)
+    else:
+        path, version = vector_dir, None
+    with open(path / "docs.json", encoding="utf-8") as f:
+        docs = json.load(f)
+
+    books = []
+    for d in docs:
+        if d.get("doc_kind") != "catalog_meta":
+            continue
+        pid = str(d.get("parent_id"))
+        # vectorstore lama belum punya record_ids: parent_id = cat_<id>
+        rids = d.get("record_ids") or ([pid] if pid.startswith("cat_") else [])
+        rids = [r[len("cat_"):] if r.startswith("cat_") else r for r in rids]
+        if rids:
+            books.append((pid, rids, d.get("availability", "")))
+    return version, books
+
+async def refresh(h: Harvester, books: list) -> dict:
+    async def status(rid):
+        html = await h.fetch(slims.build_detail_url(rid, "", h.base))
+        if html is None:
+            return None
+        return slims.parse_detail_html(html)["availability_html"]
+
+    async def book(pid, rids):
+        parts = await asyncio.gather(*[status(r) for r in rids])
+        # 1 buku hasil merge bisa punya beberapa record: status semua eksemplar digabung
+        if any(p is None for p in parts) or not any(parts):
+            return pid, None
+        return pid, "; ".join(p for p in parts if p)
+
+    results = await asyncio.gather(*[book(pid, rids) for pid, rids, _ in books])
+    return dict(results)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--vectorstore", default=str(data_dir.parent / "vectorstore"))
+    ap.add_argument("--base-url", default=slims.BASE)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--rate", type=float, default=4.0, help="maks request/detik per host (0 = tanpa batas)")
+    ap.add_argument("--retries", type=int, default=4)
+    ap.add_argument("--no-selenium", action="store_true", help="matikan fallback browser")
+    ap.add_argument("--limit", type=int, default=0, help="cuma N buku pertama (tes)")
+    args = ap.parse_args()
+
+    vector_dir = Path(args.vectorstore)
+    version, books = load_books(vector_dir)
+    if args.limit:
+        books = books[:args.limit]
+    print(f"[INFO] snapshot {version}: {len(books)} buku")
+
+    async def run():
+        async with Harvester(
+            base_url=args.base_url,
+            concurrency=args.concurrency,
+            rate=args.rate,
+            retries=args.retries,
+            selenium=not args.no_selenium,
+        ) as h:
+            return await refresh(h, books), h.stats
+
+    t0 = time.perf_counter()
+    fresh, stats = asyncio.run(run())
+    elapsed = time.perf_counter() - t0
+
+    path = vector_dir / store_file
+    records = read_records(path)
+    checked_at = now_iso()
+    changed = failed = 0
+    for pid, _, baked in books:
+        status = fresh.get(pid)
+        if status is None:
+            failed += 1
+            continue
+        if status != records.get(pid, {}).get("availability", baked):
+            changed += 1
+        records[pid] = {"availability": status, "checked_at": checked_at}
+    write_store(path, records, version)
+
+    print(f"[INFO] {stats}")
+    print(f"[INFO] refreshed={len(books) - failed} changed={changed} failed={failed} ({elapsed:.1f}s)")
+    print(f"[INFO] disimpan: {path}")
+
+if __name__ == "__main__":
+    main()
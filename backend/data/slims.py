@@ -0,0 +1,290 @@
+"""
+Helper SLiMS (OPAC catalog.maranatha.edu) tanpa browser: URL, parser HTML / MODS XML,
+dan layout file rekaman response. Dipakai scraping.py (Selenium), harvest.py (httpx)
+dan slims_standin.py (server lokal untuk tes).
+"""
+import re
+from pathlib import Path
+from urllib.parse import urlencode, urljoin, urlparse, parse_qs
+
+from bs4 import BeautifulSoup
+from lxml import etree
+
+BASE = "https://catalog.maranatha.edu/"
+
+ns = {"m": "http://www.loc.gov/mods/v3", "s": "http://slims.web.id"}
+
+keywords = [
+    "informatika",
+    "ilmu komputer",
+    "pemrograman",
+    "algoritma",
+    "struktur data",
+    "basis data",
+    "database",
+    "sistem operasi",
+    "jaringan komputer",
+    "keamanan informasi",
+    "cyber security",
+    "kecerdasan buatan",
+    "artificial intelligence",
+    "machine learning",
+    "deep learning",
+    "data mining",
+    "big data",
+    "data science",
+    "pengolahan citra",
+    "computer vision",
+    "pemrosesan bahasa alami",
+    "natural language processing",
+    "rekayasa perangkat lunak",
+    "software engineering",
+    "sistem informasi",
+    "analisis sistem",
+    "desain sistem",
+    "web programming",
+    "pemrograman web",
+    "mobile programming",
+    "internet of things",
+    "iot",
+    "cloud computing",
+    "arsitektur komputer",
+    "robotika",
+    "data warehouse",
+    "business intelligence",
+    "keamanan jaringan",
+    "kriptografi",
+    "devops",
+    "testing perangkat lunak",
+    "user experience",
+    "human computer interaction",
+    "komputasi terdistribusi",
+    "komputasi paralel",
+    "data analytics",
+    "information retrieval",
+    "data visualization",
+    "ui design",
+    "ux design",
+    "sql",
+    "nosql",
+    "network security",
+    "blockchain",
+    "virtual reality",
+    "augmented reality",
+]
+
+# Utils
+def clean(s: str) -> str:
+    return re.sub(r"\s+", " ", (s or "").strip())
+
+def norm_isbn(x: str) -> str:
+    if not x: return ""
+    return re.sub(r"[^0-9Xx]", "", x).upper()
+
+def list_url(base: str = BASE) -> str:
+    return urljoin(base, "index.php")
+
+def build_list_url(query: str, page: int, base: str = BASE) -> str:
+    return list_url(base) + "?" + urlencode({"search": "search", "keywords": query, "page": page})
+
+def build_detail_url(rid: str, query: str, base: str = BASE) -> str:
+    return f"{list_url(base)}?p=show_detail&id={rid}&keywords={query}"
+
+def xml_url(url: str) -> str:
+    return url + ("&" if "?" in url else "?") + "inXML=true"
+
+# HTML
+def parse_list_html(html: str, base: str = BASE):
+    soup = BeautifulSoup(html, "lxml")
+    items = []
+    for card in soup.select("div.item, div.col-xs-12, div[class*='collections']"):
+        a = card.select_one("a[href*='p=show_detail'][href*='id=']")
+        if not a:
+            continue
+        href = urljoin(base, a.get("href") or "")
+        title = clean(a.get_text())
+        q = parse_qs(urlparse(href).query)
+        rid = (q.get("id") or [""])[0]
+        img = card.find("img")
+        thumb = urljoin(base, img["src"]) if img and img.get("src") else ""
+        if rid:
+            items.append({
+                "id": rid,
+                "title": title,
+                "detail_url": href,
+                "thumbnail_url": thumb
+            })
+    return items, soup
+
+def get_total_pages_from_html(soup: BeautifulSoup, base: str = BASE) -> int:
+    pages = []
+    for a in soup.select("a[href*='?'][href*='page=']"):
+        try:
+            q = parse_qs(urlparse(urljoin(base, a.get("href") or "")).query)
+            p = int((q.get("page") or ["1"])[0])
+            pages.append(p)
+        except:
+            pass
+    return max(pages) if pages else 1
+
+def parse_detail_html(html: str) -> dict:
+    soup = BeautifulSoup(html, "lxml")
+    availability_list = []
+    availability_html = ""
+    tbl = soup.select_one("table.itemList, table[class*='itemList']")
+    if tbl:
+        for tr in tbl.select("tbody tr"):
+            tds = tr.find_all("td")
+            if not tds:
+                continue
+            status = tds[-1].get_text(strip=True)
+            if status:
+                availability_list.append(clean(status))
+                availability_html = "; ".join(availability_list)
+
+    publisher = ""
+    for tr in soup.select("table tr"):
+        th = tr.find("th")
+        td = tr.find("td")
+        if not th or not td:
+            continue
+        key = clean(th.get_text()).lower()
+        if key in ("publisher", "penerbit"):
+            publisher = clean(td.get_text())
+            break
+    return {
+        "availability_html": availability_html,
+        "publisher_html": publisher
+    }
+
+# XML
+def extract_mods_collection(html_or_xml: str) -> bytes:
+    # browser membungkus XML dengan HTML viewer, jadi ambil blok modsCollection-nya saja
+    m = re.search(r"(<modsCollection[\s\S]+?</modsCollection>)", html_or_xml, re.I)
+    if not m:
+        return b""
+    return m.group(1).encode("utf-8")
+
+def parse_list_xml(xml_bytes: bytes, query: str, base: str = BASE):
+    """
+    (items, total_rows, per_page) dari response list ?inXML=true
+    """
+    root = etree.fromstring(xml_bytes)
+
+    total_rows = per_page = 0
+    n_rows = root.find(".//s:modsResultNum", ns)
+    n_show = root.find(".//s:modsResultShowed", ns)
+    if n_rows is not None and n_rows.text:
+        try: total_rows = int(n_rows.text.strip())
+        except: pass
+    if n_show is not None and n_show.text:
+        try: per_page = int(n_show.text.strip())
+        except: pass
+
+    items = []
+    for mods in root.findall(".//m:mods", ns):
+        rid = mods.get("ID") or mods.get("id") or ""
+
+        title = ""
+        t = mods.find(".//m:titleInfo/m:title", ns)
+        if t is not None and t.text: title = t.text.strip()
+
+        thumb = ""
+        img = mods.find(".//{http://slims.web.id}image")
+        if img is not None and img.text:
+            thumb = urljoin(base, f"images/docs/{img.text.strip()}")
+        if rid:
+            items.append({
+                "id": rid,
+                "title": clean(title),
+                "detail_url": build_detail_url(rid, query, base),
+                "thumbnail_url": thumb
+            })
+    return items, total_rows, per_page or 10
+
+def parse_detail_xml(xml_bytes: bytes) -> dict:
+    root = etree.fromstring(xml_bytes)
+
+    mods = root.find(".//m:mods", ns)
+    if mods is None:
+        return {}
+
+    def txt(path):
+        node = mods.find(path, ns)
+        return node.text.strip() if node is not None and node.text else ""
+
+    title = txt(".//m:titleInfo/m:title")
+    # Authors
+    authors = "; ".join([
+        n.text.strip() for n in mods.findall(".//m:name/m:namePart", ns)
+        if n is not None and n.text
+    ])
+    # Year bisa
+    year = txt(".//m:originInfo/m:dateIssued")
+    if not year:
+        year = txt(".//m:originInfo/m:place/m:dateIssued")
+
+    # isbn
+    isbn = ""
+    node_isbn = mods.find(".//m:identifier[@type='isbn']", ns)
+    if node_isbn is not None and node_isbn.text:
+        isbn = node_isbn.text.strip()
+
+    # location
+    loc_parts = []
+    for ci in mods.findall(".//m:location//m:holdingSimple//m:copyInformation", ns):
+        sub   = (ci.findtext("./m:sublocation", default="", namespaces=ns) or "").strip()
+        shelf = (ci.findtext("./m:shelfLocator", default="", namespaces=ns) or "").strip()
+
+        if sub and shelf:
+            loc_parts.append(f"{sub}; {shelf}")
+        elif sub or shelf:
+            loc_parts.append(sub or shelf)
+    location = "; ".join(loc_parts)
+
+    # language
+    lang = mods.find(".//m:language/m:languageTerm[@type='text']", ns)
+    if lang is not None and lang.text:
+        language = lang.text.strip()
+    else:
+        language = ""
+    return {
+        "title_xml": clean(title),
+        "authors_xml": clean(authors),
+        "year_xml": clean(year),
+        "isbn_xml": norm_isbn(isbn),
+        "location_xml": clean(location),
+        "language_xml": clean(language)
+    }
+
+def build_row(item: dict, html_part: dict, xml_part: dict) -> dict:
+    # 1 baris output (kolom sama dengan hasil scraping.py)
+    return {
+        "id": item["id"],
+        "title": clean(xml_part.get("title_xml") or item.get("title", "")),
+        "authors": clean(xml_part.get("authors_xml", "")),
+        "year": clean(xml_part.get("year_xml", "")),
+        "isbn": norm_isbn(xml_part.get("isbn_xml", "")),
+        "publisher": clean(html_part.get("publisher_html", "")),
+        "language": clean(xml_part.get("language_xml", "")),
+        "location": clean(xml_part.get("location_xml", "")),
+        "availability": clean(html_part.get("availability_html", "")),
+        "detail_url": item["detail_url"],
+        "thumbnail_url": item.get("thumbnail_url", ""),
+    }
+
+# Rekaman response (dipakai harvest.py --record dan slims_standin.py)
+def _slug(s: str) -> str:
+    return re.sub(r"[^0-9a-z]+", "_", s.lower()).strip("_") or "_"
+
+def fixture_path(root: Path, params: dict):
+    """
+    Lokasi file rekaman untuk 1 request index.php (None kalau bukan list / detail):
+        list/<keyword>/<page>.xml|html   detail/<id>.xml|html
+    """
+    ext = "xml" if str(params.get("inXML", "")).lower() == "true" else "html"
+    if params.get("p") == "show_detail" and params.get("id"):
+        return Path(root) / "detail" / f"{_slug(str(params['id']))}.{ext}"
+    if params.get("search") and "keywords" in params:
+        return Path(root) / "list" / _slug(str(params["keywords"])) / f"{int(params.get('page') or 1)}.{ext}"
+    return None
@@ -0,0 +1,197 @@
+"""
+Stand-in lokal untuk OPAC SLiMS (index.php): melayani response rekaman dari folder
+--fixtures (layout slims.fixture_path, hasil `harvest.py --record`), plus latency,
+error 503 acak dan rate limit 429 buat ngetes retry / backoff harvester.
+
+Kalau belum punya rekaman, --from-xlsx membuat fixture MODS XML + HTML detail
+sintetis dari hasil scraping sebelumnya (kolomnya sama dengan output harvester).
+
+contoh:
+    python data/slims_standin.py --fixtures /tmp/slims --from-xlsx data/hasil_catalog_v5_indonesia.xlsx --keywords "sql,iot"
+    python data/slims_standin.py --fixtures /tmp/slims --port 8200 --latency-ms 80 --fail-rate 0.1
+    python data/harvest.py --base-url http://127.0.0.1:8200/ --keywords "sql,iot" --no-selenium
+"""
+import argparse
+import asyncio
+import html
+import os
+import random
+import time
+from collections import Counter, deque
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+from lxml import etree
+
+import slims
+
+app = FastAPI()
+
+# bisa di-set lewat CLI atau env (kalau dijalankan pakai uvicorn langsung)
+config = {
+    "fixtures": os.getenv("SLIMS_FIXTURES", "slims_fixtures"),
+    "latency_ms": float(os.getenv("SLIMS_LATENCY_MS", "0")),
+    "fail_rate": float(os.getenv("SLIMS_FAIL_RATE", "0")),
+    "rate_limit": float(os.getenv("SLIMS_RATE_LIMIT", "0")),  # request/detik, 0 = tanpa batas
+}
+
+stats = Counter()
+recent = deque()
+
+@app.get("/index.php")
+async def index(request: Request):
+    stats["requests"] += 1
+    if config["latency_ms"] > 0:
+        await asyncio.sleep(config["latency_ms"] / 1000 * random.uniform(0.5, 1.5))
+
+    if config["rate_limit"] > 0:
+        now = time.monotonic()
+        while recent and now - recent[0] > 1.0:
+            recent.popleft()
+        if len(recent) >= config["rate_limit"]:
+            stats["429"] += 1
+            return Response(status_code=429, headers={"Retry-After": "1"})
+        recent.append(now)
+
+    if random.random() < config["fail_rate"]:
+        stats["503"] += 1
+        return Response(status_code=503)
+
+    path = slims.fixture_path(Path(config["fixtures"]), dict(request.query_params))
+    if path is None or not path.exists():
+        stats["404"] += 1
+        return Response(status_code=404)
+    stats["200"] += 1
+    media = "text/xml" if path.suffix == ".xml" else "text/html"
+    return Response(content=path.read_bytes(), media_type=media)
+
+@app.get("/_stats")
+async def get_stats():
+    return JSONResponse(dict(stats))
+
+# Fixture sintetis dari xlsx
+M = "{%s}" % slims.ns["m"]
+S = "{%s}" % slims.ns["s"]
+
+def _sub(parent, tag, text=None, **attrib):
+    el = etree.SubElement(parent, tag, attrib)
+    if text:
+        el.text = text
+    return el
+
+def _collection(total: int = None, shown: int = None):
+    root = etree.Element(M + "modsCollection", nsmap={None: slims.ns["m"], "slims": slims.ns["s"]})
+    if total is not None:
+        info = _sub(root, S + "resultInfo")
+        _sub(info, S + "modsResultNum", str(total))
+        _sub(info, S + "modsResultPage", "1")
+        _sub(info, S + "modsResultShowed", str(shown))
+    return root
+
+def _image_name(thumbnail_url: str) -> str:
+    # thumbnail hasil scraping: createthumb.php?filename=../../images/docs/<file>
+    q = parse_qs(urlparse(thumbnail_url or "").query)
+    name = (q.get("filename") or [thumbnail_url or ""])[0]
+    return name.rsplit("/", 1)[-1]
+
+def _mods(root, row: dict, full: bool):
+    mods = _sub(root, M + "mods", ID=row["id"], version="3.3")
+    title = _sub(mods, M + "titleInfo")
+    _sub(title, M + "title", row["title"])
+    if full:
+        for name in filter(None, row["authors"].split("; ")):
+            n = _sub(mods, M + "name", type="personal")
+            _sub(n, M + "namePart", name)
+        origin = _sub(mods, M + "originInfo")
+        _sub(origin, M + "dateIssued", row["year"])
+        lang = _sub(mods, M + "language")
+        _sub(lang, M + "languageTerm", row["language"], type="text")
+        _sub(mods, M + "identifier", row["isbn"], type="isbn")
+        # location "sublokasi; rak; sublokasi; rak" -> 1 copyInformation per pasang
+        parts = [p for p in row["location"].split("; ") if p]
+        holding = _sub(_sub(mods, M + "location"), M + "holdingSimple")
+        for i in range(0, len(parts), 2):
+            ci = _sub(holding, M + "copyInformation")
+            _sub(ci, M + "sublocation", parts[i])
+            if i + 1 < len(parts):
+                _sub(ci, M + "shelfLocator", parts[i + 1])
+    image = _image_name(row["thumbnail_url"])
+    if image:
+        _sub(mods, S + "image", image)
+
+def _detail_html(row: dict) -> str:
+    items = "".join(
+        f"<tr><td>B{i:05d}</td><td>{html.escape(row['location'])}</td><td>{html.escape(s)}</td></tr>"
+        for i, s in enumerate(filter(None, row["availability"].split("; ")), 1)
+    )
+    return (
+        f"<html><body><h4>{html.escape(row['title'])}</h4>"
+        f"<table class='table'><tr><th>Publisher</th><td>{html.escape(row['publisher'])}</td></tr></table>"
+        f"<table class='table itemList'><tbody>{items}</tbody></table></body></html>"
+    )
+
+def _write(path: Path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if isinstance(data, str):
+        path.write_text(data, encoding="utf-8")
+    else:
+        path.write_bytes(etree.tostring(data, xml_declaration=True, encoding="UTF-8"))
+
+def write_fixtures(xlsx: str, root: str, keywords: list = None, per_page: int = 10) -> int:
+    df = pd.read_excel(xlsx, dtype=str).fillna("")
+    if keywords:
+        df = df[df["keyword"].isin(keywords)]
+    root = Path(root)
+
+    n = 0
+    for query, group in df.groupby("keyword", sort=False):
+        rows = group.drop_duplicates("id").to_dict("records")
+        for page in range(0, max(1, (len(rows) + per_page - 1) // per_page)):
+            chunk = rows[page * per_page:(page + 1) * per_page]
+            params = {"search": "search", "keywords": query, "page": page + 1}
+            col = _collection(len(rows), per_page)
+            for row in chunk:
+                _mods(col, row, full=False)
+            _write(slims.fixture_path(root, {**params, "inXML": "true"}), col)
+
+        for row in rows:
+            params = {"p": "show_detail", "id": row["id"]}
+            col = _collection()
+            _mods(col, row, full=True)
+            _write(slims.fixture_path(root, {**params, "inXML": "true"}), col)
+            _write(slims.fixture_path(root, params), _detail_html(row))
+            n += 1
+    return n
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8200)
+    ap.add_argument("--fixtures", default=config["fixtures"])
+    ap.add_argument("--latency-ms", type=float, default=config["latency_ms"])
+    ap.add_argument("--fail-rate", type=float, default=config["fail_rate"], help="peluang 503 per request")
+    ap.add_argument("--rate-limit", type=float, default=config["rate_limit"], help="request/detik sebelum 429")
+    ap.add_argument("--from-xlsx", default=None, help="buat fixture sintetis dari hasil scraping lalu keluar")
+    ap.add_argument("--keywords", default=None, help="dipakai dengan --from-xlsx, dipisah koma")
+    args = ap.parse_args()
+
+    if args.from_xlsx:
+        keywords = [k.strip() for k in args.keywords.split(",")] if args.keywords else None
+        n = write_fixtures(args.from_xlsx, args.fixtures, keywords)
+        print(f"[INFO] {n} detail ditulis ke {args.fixtures}")
+        return
+
+    config.update(
+        fixtures=args.fixtures,
+        latency_ms=args.latency_ms,
+        fail_rate=args.fail_rate,
+        rate_limit=args.rate_limit,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Cek kesetaraan + benchmark intent (utils/intent.py) terhadap versi lama
+(clean_text + 3 regex per pesan, predict_proba 1 pesan per call):
+- label + proba harus sama untuk teks intent.xlsx, query eval, dan variasi noise
+  (huruf besar, tanda baca, url, unicode, \\r\\n)
+- latency per pesan: lama vs baru (cache kosong) vs batch vs cache penuh
+Exit code 1 kalau ada hasil yang beda.
+
+contoh:
+    python eval/bench_intent.py
+    python eval/bench_intent.py --repeat 5 --out eval/bench/intent.json
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+eval_dir = Path(__file__).resolve().parent
+sys.path.insert(0, str(eval_dir.parent))
+
+from utils import intent  # noqa: E402
+from utils.preprocess import clean_text  # noqa: E402
+
+# versi lama, disalin apa adanya
+def legacy_preprocess(text: str) -> str:
+    text = clean_text(text)
+    if not isinstance(text, str):
+        text = str(text)
+
+    text = text.lower()
+    text = re.sub(r"http\S+|www\.\S+", " ", text)
+    text = re.sub(r"[^0-9a-zA-ZÀ-ÿ\s]", " ", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    return text
+
+def legacy_predict(text: str):
+    s = legacy_preprocess(text)
+    proba = intent.intent_pipeline.predict_proba([s])[0]
+    labels = intent.intent_pipeline.classes_
+    proba_dict = {lbl: float(p) for lbl, p in zip(labels, proba)}
+    best_label = max(proba_dict, key=proba_dict.get)
+    best_score = float(proba_dict[best_label])
+    return best_label, best_score, round(best_score * 100, 1), proba_dict
+
+def load_texts() -> list:
+    texts = pd.read_excel(eval_dir.parent / "data" / "intent.xlsx")["text"].astype(str).tolist()
+    texts += pd.read_excel(eval_dir / "eval.xlsx")["query"].astype(str).tolist()
+    return texts
+
+def noisy(texts: list, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    noise = ["?", "!!", " “ok”", " https://lib.maranatha.edu/x?a=1", "\r\n", " ", "-\nnya",
+             " www.google.com", "\x01", "ｂｕｋｕ", " :)", "\t"]
+    out = []
+    for t in texts:
+        t = t.upper() if rng.random() < 0.3 else t
+        out.append(t + rng.choice(noise) + rng.choice(noise))
+    return out + ["", " ", "???"]
+
+def bench(fn, texts, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(texts)
+        best = min(best, time.perf_counter() - t0)
+    # mikrodetik per pesan
+    return best / max(len(texts), 1) * 1e6
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--out", default=None)
+    args = ap.parse_args()
+    if intent.classifier.uses_embedding:
+        sys.exit("[WARN] versi lama cuma TF-IDF, jalankan dengan INTENT_MODEL=logreg_tfidf")
+
+    texts = load_texts()
+    corpus = texts + noisy(texts)
+
+    mismatches = []
+    for t, new in zip(corpus, intent.IntentClassifier(intent.intent_pipeline).predict_batch(corpus)):
+        old = legacy_predict(t)
+        if new[:3] != old[:3] or new[3] != old[3]:
+            mismatches.append({"input": t, "new": new[:3], "legacy": old[:3]})
+    print(f"[INFO] {len(corpus)} teks, beda: {len(mismatches)}")
+    for m in mismatches[:10]:
+        print(f"  {m['input']!r}\n    new   : {m['new']}\n    legacy: {m['legacy']}")
+
+    def new_single(ts):
+        clf = intent.IntentClassifier(intent.intent_pipeline)
+        for t in ts:
+            clf.predict(t)
+
+    def new_batch(ts):
+        intent.IntentClassifier(intent.intent_pipeline).predict_batch(ts)
+
+    warm = intent.IntentClassifier(intent.intent_pipeline)
+    warm.predict_batch(texts)
+    results = {
+        "legacy": bench(lambda ts: [legacy_predict(t) for t in ts], texts, args.repeat),
+        "single": bench(new_single, texts, args.repeat),
+        "batch": bench(new_batch, texts, args.repeat),
+        "cached": bench(lambda ts: [warm.predict(t) for t in ts], texts, args.repeat),
+    }
+    for name, us in results.items():
+        print(f"{name:8s} {us:9.2f}us/pesan  x{results['legacy'] / us:.1f}")
+
+    if args.out:
+        out = Path(args.out)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        report = {
+            "n": len(texts),
+            "mismatches": len(mismatches),
+            "examples": mismatches[:20],
+            "us_per_message": {k: round(v, 2) for k, v in results.items()},
+        }
+        out.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"[INFO] hasil disimpan: {out}")
+    sys.exit(1 if mismatches else 0)
+
+if __name__ == "__main__":
+    main()
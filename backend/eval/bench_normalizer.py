@@ -0,0 +1,145 @@
+"""
+Cek kesetaraan + micro-benchmark normalizer baru (utils/preprocess.py) terhadap
+versi lama (loop re.sub per aturan + 6 pass regex), kamus sama (data/query_replacements.json).
+Korpus: query eval, teks intent.xlsx, judul + sinopsis katalog, teks PDF mentah,
+plus kalimat acak dari kunci kamus dengan noise (huruf besar, unicode, \\r\\n, kontrol).
+Exit code 1 kalau ada hasil yang beda.
+
+contoh:
+    python eval/bench_normalizer.py
+    python eval/bench_normalizer.py --random 50000 --repeat 5 --out eval/bench/normalizer.json
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import time
+import unicodedata
+from pathlib import Path
+
+import pandas as pd
+
+eval_dir = Path(__file__).resolve().parent
+sys.path.insert(0, str(eval_dir.parent))
+
+from utils import preprocess  # noqa: E402
+
+# versi lama (sebelum kamus dikompilasi), disalin apa adanya
+legacy_ctrl = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+def legacy_cleanup_base(text: str) -> str:
+    if not text:
+        return ""
+    text = str(text)
+    text = unicodedata.normalize("NFKC", text)
+    for k, v in preprocess.map_punct.items():
+        text = text.replace(k, v)
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    text = re.sub(r"(\w)-\s*\n\s*(\w)", r"\1\2", text)
+    text = legacy_ctrl.sub(" ", text)
+    text = re.sub(r"[ \t]+", " ", text)
+    text = re.sub(r"\n{2,}", "\n", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    return text
+
+def make_legacy_clean_query(replacements: dict):
+    def clean_query(text: str) -> str:
+        t = legacy_cleanup_base(text).lower()
+        t = re.sub(r"([a-zA-Z])\1{2,}", r"\1\1", t)
+        for k, v in replacements.items():
+            t = re.sub(rf"\b{re.escape(k)}\b", v, t)
+        return t
+    return clean_query
+
+def real_corpus(pdf_pages: int) -> list:
+    texts = []
+    texts += pd.read_excel(eval_dir / "eval.xlsx")["query"].astype(str).tolist()
+    texts += pd.read_excel(eval_dir.parent / "data" / "intent.xlsx")["text"].astype(str).tolist()
+    catalog = pd.read_excel(eval_dir.parent / "data" / "hasil_catalog_v5_indonesia.xlsx")
+    texts += catalog["title"].astype(str).tolist() + catalog["synopsis"].astype(str).tolist()
+    if pdf_pages:
+        import pdfplumber
+        pdf = eval_dir.parent / "data" / "data_operasional_mlibbot_perpustakaan_maranatha_v1.pdf"
+        with pdfplumber.open(pdf) as doc:
+            texts += [p.extract_text() or "" for p in doc.pages[:pdf_pages]]
+    return texts
+
+def random_corpus(replacements: dict, n: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    words = list(replacements) + list(replacements.values()) + [
+        "buku", "jam", "buka", "berapa", "maranatha", "no", "e", "app", "t", "a", "lamaaa", "apa",
+    ]
+    seps = [" ", "  ", "-", ".", "/", ", ", "? ", "\n", "\r\n", "-\n", "\t", " ", "–", "\x01", ""]
+    out = []
+    for _ in range(n):
+        parts = []
+        for _ in range(rng.randint(1, 8)):
+            w = rng.choice(words)
+            if rng.random() < 0.2:
+                w = w.upper()
+            parts += [w, rng.choice(seps)]
+        out.append("".join(parts))
+    return out
+
+def bench(fn, texts, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for t in texts:
+            fn(t)
+        best = min(best, time.perf_counter() - t0)
+    # mikrodetik per call
+    return best / max(len(texts), 1) * 1e6
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--random", type=int, default=20000, help="jumlah kalimat acak")
+    ap.add_argument("--pdf-pages", type=int, default=20, help="halaman PDF mentah (0 = skip)")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--out", default=None)
+    args = ap.parse_args()
+
+    replacements = json.loads(preprocess.replacements_file.read_text(encoding="utf-8"))["replacements"]
+    legacy_clean_query = make_legacy_clean_query(replacements)
+
+    real = real_corpus(args.pdf_pages)
+    synthetic = random_corpus(replacements, args.random)
+
+    mismatches = []
+    for name, new, old in [
+        ("clean_text", preprocess.clean_text, legacy_cleanup_base),
+        ("clean_query", preprocess.clean_query, legacy_clean_query),
+    ]:
+        for t in real + synthetic:
+            a, b = new(t), old(t)
+            if a != b:
+                mismatches.append({"fn": name, "input": t, "new": a, "legacy": b})
+    print(f"[INFO] korpus: {len(real)} teks asli + {len(synthetic)} acak, beda: {len(mismatches)}")
+    for m in mismatches[:10]:
+        print(f"  {m['fn']}: {m['input']!r}\n    new   : {m['new']!r}\n    legacy: {m['legacy']!r}")
+
+    queries = pd.read_excel(eval_dir / "eval.xlsx")["query"].astype(str).tolist()
+    queries += pd.read_excel(eval_dir.parent / "data" / "intent.xlsx")["text"].astype(str).tolist()
+    documents = [t for t in real if len(t) > 200]
+    results = {}
+    for name, texts, new, old in [
+        ("clean_query/query", queries, preprocess.clean_query, legacy_clean_query),
+        ("clean_query/document", documents, preprocess.clean_query, legacy_clean_query),
+        ("clean_text/document", documents, preprocess.clean_text, legacy_cleanup_base),
+    ]:
+        old_us, new_us = bench(old, texts, args.repeat), bench(new, texts, args.repeat)
+        results[name] = {"n": len(texts), "legacy_us": round(old_us, 2), "new_us": round(new_us, 2),
+                         "speedup": round(old_us / new_us, 2)}
+        print(f"{name:22s} n={len(texts):5d} legacy={old_us:8.2f}us new={new_us:8.2f}us x{old_us / new_us:.2f}")
+
+    if args.out:
+        out = Path(args.out)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        report = {"mismatches": len(mismatches), "examples": mismatches[:20], "results": results}
+        out.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"[INFO] hasil disimpan: {out}")
+    sys.exit(1 if mismatches else 0)
+
+if __name__ == "__main__":
+    main()
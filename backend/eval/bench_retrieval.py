@@ -0,0 +1,219 @@
+"""
+Benchmark retrieval offline (tanpa server): latency + kualitas per method/config.
+
+contoh:
+    python eval/bench_retrieval.py --out eval/bench/baseline.json
+    python eval/bench_retrieval.py --out eval/bench/baru.json --compare eval/bench/baseline.json
+"""
+import argparse
+import json
+import math
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+eval_dir = Path(__file__).resolve().parent
+sys.path.insert(0, str(eval_dir.parent))
+
+from utils import retriever, timing  # noqa: E402
+
+methods = ["bm25", "faiss", "hybrid"]
+
+# config tambahan (kwargs ke retrieve_hybrid); bm25/faiss cukup "default"
+hybrid_configs = {
+    "default": {},
+    "alpha_0.3": {"alpha": 0.3},
+    "alpha_0.7": {"alpha": 0.7},
+    "pool_min_80": {"pool_min": 80},
+    "rrf": {"fusion": "rrf"},
+}
+
+# query yang nggak cocok satu token pun di BM25: urutan hybrid harus murni ikut FAISS
+no_match_query = "qxv7zk9 wq8jrt5"
+
+def load_queries():
+    df = pd.read_excel(eval_dir / "eval.xlsx")
+    return [(str(r["qid"]), str(r["query"]), str(r["type"])) for _, r in df.iterrows()]
+
+def rel_key(hit: dict) -> str:
+    # katalog per buku (sama dengan dedupe); pdf per halaman supaya
+    # ground truth tetap valid walau chunking berubah (p3_c0 -> pdf::p3)
+    if hit.get("source") == "pdf":
+        return "pdf::" + str(hit.get("source_id", "")).split("_c")[0]
+    return retriever._dedupe_key(hit)
+
+def load_ground_truth():
+    # relevan = rel_key yang label-nya 1
+    df = pd.read_excel(eval_dir / "ground_truth.xlsx")
+    df = df[df["label"] == 1]
+    # record katalog yang digabung saat ingest -> parent_id hasil merge
+    merged = {
+        rid: d["parent_id"]
+        for d in retriever.active.docs
+        for rid in d.get("record_ids", [])
+    }
+    rel = {}
+    for _, r in df.iterrows():
+        key = rel_key({"source": r["type"], "source_id": r["source_id"]})
+        rel.setdefault(str(r["query"]), set()).add(merged.get(key, key))
+    return rel
+
+def quality(hits, relevant, k):
+    keys = [rel_key(h) for h in hits[:k]]
+    if not relevant:
+        return None
+    # 2 chunk dari halaman yang sama cuma dihitung sekali
+    found = [1 if key in relevant and key not in keys[:i] else 0 for i, key in enumerate(keys)]
+    recall = sum(found) / len(relevant)
+    rr = 0.0
+    for rank, f in enumerate(found, start=1):
+        if f:
+            rr = 1.0 / rank
+            break
+    dcg = sum(f / math.log2(rank + 1) for rank, f in enumerate(found, start=1))
+    idcg = sum(1.0 / math.log2(rank + 1) for rank in range(1, min(len(relevant), k) + 1))
+    return {"recall": recall, "mrr": rr, "ndcg": dcg / idcg if idcg else 0.0}
+
+def run_config(queries, relevant, method, kwargs, top_k, repeat):
+    latencies = []
+    stages = {}
+    per_query = []
+    for _, q, _ in queries:
+        for _ in range(repeat):
+            with timing.collector() as t:
+                t0 = time.perf_counter()
+                hits = retriever.retrieve(q, method, top_k, **kwargs)
+                latencies.append(time.perf_counter() - t0)
+            for name, sec in t["stages"].items():
+                stages.setdefault(name, []).append(sec)
+        per_query.append(quality(hits, relevant.get(q, set()), top_k))
+
+    judged = [m for m in per_query if m is not None]
+    lat = np.asarray(latencies) * 1000
+    return {
+        "method": method,
+        "kwargs": kwargs,
+        "queries": len(queries),
+        "judged": len(judged),
+        "latency_ms": {
+            "p50": round(float(np.percentile(lat, 50)), 3),
+            "p95": round(float(np.percentile(lat, 95)), 3),
+            "p99": round(float(np.percentile(lat, 99)), 3),
+            "mean": round(float(lat.mean()), 3),
+        },
+        "qps": round(len(latencies) / (lat.sum() / 1000), 2),
+        "stages_ms": {name: round(float(np.mean(v)) * 1000, 3) for name, v in stages.items()},
+        f"recall@{top_k}": round(float(np.mean([m["recall"] for m in judged])), 4),
+        "mrr": round(float(np.mean([m["mrr"] for m in judged])), 4),
+        f"ndcg@{top_k}": round(float(np.mean([m["ndcg"] for m in judged])), 4),
+    }
+
+def check_no_bm25_match(top_k: int) -> list:
+    ix = retriever.active
+    tokens = retriever.tokenize_bm25(no_match_query, ix.speller)
+    if np.asarray(ix.bm25.get_scores(tokens)).any():
+        print(f"[WARN] {no_match_query!r} masih cocok di BM25, cek dilewati")
+        return []
+    problems = []
+    for fusion in ("minmax", "rrf"):
+        hits = retriever.retrieve_hybrid(no_match_query, top_k, fusion=fusion)
+        faiss_scores = [h["score_faiss"] for h in hits]
+        ok = len(hits) == top_k and faiss_scores == sorted(faiss_scores, reverse=True)
+        print(f"  tanpa match BM25 hybrid/{fusion:6s} {'ok' if ok else 'TIDAK urut skor FAISS'} {faiss_scores}")
+        if not ok:
+            problems.append(f"hybrid/{fusion} tanpa match BM25 nggak urut skor FAISS")
+    return problems
+
+def compare(current: dict, baseline: dict, quality_tol: float, latency_tol: float) -> list:
+    """
+    Bandingkan dengan hasil run sebelumnya, return daftar regresi.
+    Kualitas turun > quality_tol (absolut) atau p95 naik > latency_tol (relatif).
+    """
+    regressions = []
+    for name, cur in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        for metric, val in cur.items():
+            if metric.startswith(("recall@", "ndcg@")) or metric == "mrr":
+                old = base.get(metric)
+                if old is not None:
+                    print(f"  {name:24s} {metric:10s} {old:.4f} -> {val:.4f} ({val - old:+.4f})")
+                    if old - val > quality_tol:
+                        regressions.append(f"{name} {metric} turun {old:.4f} -> {val:.4f}")
+        old_p95 = base["latency_ms"]["p95"]
+        new_p95 = cur["latency_ms"]["p95"]
+        print(f"  {name:24s} p95_ms     {old_p95:.2f} -> {new_p95:.2f}")
+        if old_p95 > 0 and (new_p95 - old_p95) / old_p95 > latency_tol:
+            regressions.append(f"{name} p95 naik {old_p95:.2f}ms -> {new_p95:.2f}ms")
+    return regressions
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--vectorstore", default=str(retriever.vector_dir))
+    ap.add_argument("--methods", default=",".join(methods))
+    ap.add_argument("--top-k", type=int, default=4)
+    ap.add_argument("--repeat", type=int, default=1, help="ulang tiap query (buat latency lebih stabil)")
+    ap.add_argument("--out", default=None)
+    ap.add_argument("--compare", default=None, help="file hasil run sebelumnya")
+    ap.add_argument("--quality-tol", type=float, default=0.01)
+    ap.add_argument("--latency-tol", type=float, default=0.25)
+    args = ap.parse_args()
+
+    n_docs = retriever.load_indexes(Path(args.vectorstore))
+    queries = load_queries()
+    relevant = load_ground_truth()
+    print(f"[INFO] docs={n_docs} queries={len(queries)} judged={len(relevant)}")
+
+    # warmup (load lazy / cache tokenizer)
+    retriever.retrieve(queries[0][1], "hybrid", args.top_k)
+
+    results = {}
+    for method in args.methods.split(","):
+        configs = hybrid_configs if method == "hybrid" else {"default": {}}
+        for cfg_name, kwargs in configs.items():
+            name = f"{method}/{cfg_name}"
+            res = run_config(queries, relevant, method, kwargs, args.top_k, args.repeat)
+            results[name] = res
+            lat = res["latency_ms"]
+            print(
+                f"{name:24s} p50={lat['p50']:.2f}ms p95={lat['p95']:.2f}ms p99={lat['p99']:.2f}ms "
+                f"qps={res['qps']:.1f} recall@{args.top_k}={res[f'recall@{args.top_k}']:.4f} "
+                f"mrr={res['mrr']:.4f} ndcg@{args.top_k}={res[f'ndcg@{args.top_k}']:.4f}"
+            )
+
+    problems = check_no_bm25_match(args.top_k)
+
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "vectorstore": args.vectorstore,
+        "docs": n_docs,
+        "top_k": args.top_k,
+        "results": results,
+        "problems": problems,
+    }
+
+    out = Path(args.out) if args.out else eval_dir / "bench" / f"retrieval_{datetime.now():%Y%m%d_%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"[INFO] hasil disimpan: {out}")
+
+    regressions = list(problems)
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        print(f"[INFO] dibandingkan dengan {args.compare}")
+        regressions += compare(report, baseline, args.quality_tol, args.latency_tol)
+    if regressions:
+        print("[WARN] regresi:")
+        for r in regressions:
+            print(f"  - {r}")
+        sys.exit(1)
+    if args.compare:
+        print("[INFO] tidak ada regresi")
+
+if __name__ == "__main__":
+    main()
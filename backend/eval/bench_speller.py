@@ -0,0 +1,149 @@
+"""
+Benchmark koreksi typo BM25 (utils/speller.py):
+- kualitas bm25 / hybrid di query eval asli dan versi typo (1 edit acak per kata
+  >= 5 huruf, peluang --typo-rate), dengan dan tanpa speller
+- latency koreksi per query (cache kosong) dibanding skor BM25 yang dihemat
+- berapa token typo yang kembali ke kata aslinya
+
+contoh:
+    python eval/bench_speller.py
+    python eval/bench_speller.py --typo-rate 0.3 --out eval/bench/speller.json
+"""
+import argparse
+import json
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+eval_dir = Path(__file__).resolve().parent
+sys.path.insert(0, str(eval_dir.parent))
+
+from utils import retriever  # noqa: E402
+from utils.preprocess import clean_query, re_token_bm25, tokenize_bm25  # noqa: E402
+from bench_retrieval import load_ground_truth, load_queries, quality  # noqa: E402
+
+def add_typo(word: str, rng: random.Random) -> str:
+    i = rng.randrange(len(word))
+    op = rng.choice(["delete", "insert", "substitute", "transpose"])
+    if op == "delete":
+        return word[:i] + word[i + 1:]
+    if op == "insert":
+        return word[:i] + rng.choice(string.ascii_lowercase) + word[i:]
+    if op == "substitute":
+        return word[:i] + rng.choice(string.ascii_lowercase.replace(word[i], "")) + word[i + 1:]
+    i = min(i, len(word) - 2)
+    return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+def typo_query(query: str, rate: float, rng: random.Random):
+    # (query typo, [(kata asli, kata typo)])
+    words = clean_query(query).split()
+    pairs = []
+    for n, w in enumerate(words):
+        if len(w) >= 5 and w.isalpha() and rng.random() < rate:
+            words[n] = add_typo(w, rng)
+            pairs.append((w, words[n]))
+    return " ".join(words), pairs
+
+def evaluate(queries, relevant, method, top_k):
+    scores = []
+    for q, orig in queries:
+        hits = retriever.retrieve(q, method, top_k)
+        m = quality(hits, relevant.get(orig, set()), top_k)
+        if m is not None:
+            scores.append(m)
+    return {
+        f"recall@{top_k}": round(float(np.mean([m["recall"] for m in scores])), 4),
+        "mrr": round(float(np.mean([m["mrr"] for m in scores])), 4),
+    }
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--vectorstore", default=str(retriever.vector_dir))
+    ap.add_argument("--typo-rate", type=float, default=0.5)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--top-k", type=int, default=4)
+    ap.add_argument("--methods", default="bm25,hybrid")
+    ap.add_argument("--out", default=None)
+    args = ap.parse_args()
+
+    retriever.load_indexes(Path(args.vectorstore))
+    ix = retriever.active
+    speller = ix.speller
+    if speller is None:
+        sys.exit("[WARN] snapshot belum punya speller.pkl, jalankan ingest.py dulu")
+
+    rng = random.Random(args.seed)
+    base = [q for _, q, _ in load_queries()]
+    relevant = load_ground_truth()
+    typo = [typo_query(q, args.typo_rate, rng) for q in base]
+    sets = {
+        "clean": [(q, q) for q in base],
+        "typo": [(t, q) for q, (t, _) in zip(base, typo)],
+    }
+    print(f"[INFO] queries={len(base)} kata typo={sum(len(p) for _, p in typo)} vocab={len(speller.vocab)}")
+
+    results = {}
+    for method in args.methods.split(","):
+        for set_name, queries in sets.items():
+            for on in (False, True):
+                ix.speller = speller if on else None
+                name = f"{method}/{set_name}/{'speller' if on else 'off'}"
+                results[name] = evaluate(queries, relevant, method, args.top_k)
+                r = results[name]
+                print(f"{name:26s} recall@{args.top_k}={r[f'recall@{args.top_k}']:.4f} mrr={r['mrr']:.4f}")
+    ix.speller = speller
+
+    # token typo yang kembali ke kata asli (kata asli harus ada di vocab)
+    fixable = [(w, t) for _, pairs in typo for w, t in pairs if w in speller.vocab and t not in speller.vocab]
+    fixed = sum(speller.lookup(t) == w for w, t in fixable)
+    print(f"[INFO] token typo diperbaiki: {fixed}/{len(fixable)}")
+
+    # latency: koreksi (cache kosong) vs skor BM25 untuk token yang sama
+    correct_ms, score_ms = [], []
+    for q, _ in sets["typo"] + sets["clean"]:
+        tokens = re_token_bm25.findall(clean_query(q))
+        speller._cache.clear()
+        t0 = time.perf_counter()
+        fixed_tokens = speller.correct(tokens)
+        correct_ms.append((time.perf_counter() - t0) * 1000)
+        t0 = time.perf_counter()
+        ix.bm25.get_scores(fixed_tokens)
+        score_ms.append((time.perf_counter() - t0) * 1000)
+    c, s = np.array(correct_ms), np.array(score_ms)
+    latency = {
+        "correct_ms": {"p50": round(float(np.percentile(c, 50)), 3), "p95": round(float(np.percentile(c, 95)), 3),
+                       "max": round(float(c.max()), 3)},
+        "bm25_ms": {"p50": round(float(np.percentile(s, 50)), 3), "p95": round(float(np.percentile(s, 95)), 3)},
+        "budget_ms": speller.budget_ms,
+    }
+    print(
+        f"[INFO] koreksi p50={latency['correct_ms']['p50']:.3f}ms p95={latency['correct_ms']['p95']:.3f}ms "
+        f"max={latency['correct_ms']['max']:.3f}ms | skor bm25 p50={latency['bm25_ms']['p50']:.3f}ms"
+    )
+    if latency["correct_ms"]["p95"] > latency["bm25_ms"]["p50"]:
+        print("[WARN] koreksi p95 lebih lama dari skor BM25 p50")
+
+    # contoh koreksi
+    for (t, _), (q, pairs) in list(zip(sets["typo"], typo))[:5]:
+        print(f"  {t!r} -> {' '.join(tokenize_bm25(t, speller))!r}")
+
+    if args.out:
+        out = Path(args.out)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        report = {
+            "vectorstore": args.vectorstore,
+            "typo_rate": args.typo_rate,
+            "top_k": args.top_k,
+            "results": results,
+            "fixed": [fixed, len(fixable)],
+            "latency": latency,
+        }
+        out.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"[INFO] hasil disimpan: {out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Profil cold start API + cek budget-nya:
+- import: `python -X importtime -c "import main"`, per modul yang di-import main.py
+  langsung dan total per package
+- worker: init 1 worker retrieval (import torch / faiss / retriever, load tiap
+  artifact snapshot, model embedding, pipeline intent), dari stage timing
+- total: import main + startup() (pre-fork worker pool sampai semua worker siap)
+Tiap pengukuran di proses baru, diulang --repeat kali, diambil yang tercepat.
+Exit code 1 kalau lewat --budget / --import-budget (detik), bisa dipasang di CI.
+
+contoh:
+    python eval/bench_startup.py
+    python eval/bench_startup.py --repeat 3 --budget 30 --import-budget 2 --out eval/bench/startup.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+eval_dir = Path(__file__).resolve().parent
+backend_dir = eval_dir.parent
+
+worker_code = """
+import json, time
+t0 = time.perf_counter()
+from utils import timing, worker_pool
+with timing.collector() as t:
+    worker_pool._init_worker(worker_pool.worker_threads)
+print(json.dumps({"seconds": time.perf_counter() - t0, "stages": t["stages"]}))
+"""
+
+total_code = """
+import asyncio, json, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+
+async def run():
+    await main.startup()
+    t2 = time.perf_counter()
+    main.shutdown()
+    return t2
+
+t2 = asyncio.run(run())
+print(json.dumps({"seconds": t2 - t0, "import": t1 - t0, "startup": t2 - t1}))
+"""
+
+def run_python(args: list, env: dict) -> tuple:
+    t0 = time.perf_counter()
+    p = subprocess.run([sys.executable, *args], cwd=backend_dir, env=env, capture_output=True, text=True)
+    wall = time.perf_counter() - t0
+    if p.returncode != 0:
+        sys.exit(f"[WARN] {' '.join(args[:2])} gagal:\n{p.stderr[-2000:]}")
+    return p, wall
+
+def parse_importtime(stderr: str) -> list:
+    # "import time:  self [us] | cumulative | imported package" (indent = kedalaman)
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((int(self_us), int(cum_us), depth, name.strip()))
+    return rows
+
+def import_profile(env: dict, top: int) -> dict:
+    p, wall = run_python(["-X", "importtime", "-c", "import main"], env)
+    rows = parse_importtime(p.stderr)
+    main_row = next(r for r in rows if r[3] == "main")
+    # import langsung dari main.py (modul yang ikut ke-import pertama kali dihitung di sini)
+    direct = sorted((r for r in rows if r[2] == main_row[2] + 1), key=lambda r: -r[1])
+    packages = {}
+    for self_us, _, _, name in rows:
+        root = name.split(".")[0]
+        packages[root] = packages.get(root, 0) + self_us
+    return {
+        "seconds": main_row[1] / 1e6,
+        "process_seconds": wall,
+        "direct": {r[3]: round(r[1] / 1e3, 1) for r in direct[:top]},
+        "packages": {k: round(v / 1e3, 1) for k, v in sorted(packages.items(), key=lambda kv: -kv[1])[:top]},
+    }
+
+def best(runs: list) -> dict:
+    return min(runs, key=lambda r: r["seconds"])
+
+def print_ms(title: str, items: dict):
+    print(title)
+    for name, ms in items.items():
+        print(f"  {name:32s} {ms:9.1f}ms")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=1)
+    ap.add_argument("--top", type=int, default=12, help="jumlah modul / package yang ditampilkan")
+    ap.add_argument("--workers", type=int, default=None, help="RETRIEVAL_WORKERS untuk pengukuran total")
+    ap.add_argument("--budget", type=float, default=None, help="maks detik import main + startup")
+    ap.add_argument("--import-budget", type=float, default=None, help="maks detik import main")
+    ap.add_argument("--out", default=None)
+    args = ap.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("SECRET_KEY", "bench-startup")
+    # watcher hot reload nggak perlu jalan selama pengukuran
+    env["INDEX_RELOAD_INTERVAL"] = "0"
+    if args.workers is not None:
+        env["RETRIEVAL_WORKERS"] = str(args.workers)
+
+    imports, workers, totals = [], [], []
+    for _ in range(args.repeat):
+        imports.append(import_profile(env, args.top))
+        p, wall = run_python(["-c", worker_code], env)
+        workers.append({**json.loads(p.stdout.strip().splitlines()[-1]), "process_seconds": wall})
+        p, wall = run_python(["-c", total_code], env)
+        totals.append({**json.loads(p.stdout.strip().splitlines()[-1]), "process_seconds": wall})
+    imp, worker, total = best(imports), best(workers), best(totals)
+
+    print(f"[INFO] import main: {imp['seconds'] * 1000:.0f}ms (proses {imp['process_seconds'] * 1000:.0f}ms)")
+    print_ms("import langsung dari main.py (kumulatif):", imp["direct"])
+    print_ms("total per package (self):", imp["packages"])
+    print(f"[INFO] init 1 worker: {worker['seconds'] * 1000:.0f}ms (proses {worker['process_seconds'] * 1000:.0f}ms)")
+    print_ms("stage init worker:", {k: v * 1000 for k, v in sorted(worker["stages"].items(), key=lambda kv: -kv[1])})
+    print(
+        f"[INFO] cold start (workers={env.get('RETRIEVAL_WORKERS', 'default')}): "
+        f"{total['seconds'] * 1000:.0f}ms = import {total['import'] * 1000:.0f}ms"
+        f" + startup {total['startup'] * 1000:.0f}ms"
+    )
+
+    failed = []
+    if args.import_budget is not None and imp["seconds"] > args.import_budget:
+        failed.append(f"import main {imp['seconds']:.2f}s > budget {args.import_budget}s")
+    if args.budget is not None and total["seconds"] > args.budget:
+        failed.append(f"cold start {total['seconds']:.2f}s > budget {args.budget}s")
+    for msg in failed:
+        print(f"[WARN] {msg}")
+    if not failed and (args.budget is not None or args.import_budget is not None):
+        print("[INFO] masih dalam budget")
+
+    if args.out:
+        out = Path(args.out)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        report = {"import": imp, "worker": worker, "total": total, "failed": failed}
+        out.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"[INFO] hasil disimpan: {out}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
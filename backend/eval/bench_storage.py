@@ -0,0 +1,109 @@
+"""
+Bandingkan storage FAISS (flat / fp16 / int8 / pca) terhadap flat float32 hari ini:
+recall@k tetangga (vs hasil flat), latency search (+ re-score) dan ukuran index.
+Index dibangun di memori dari embedding snapshot aktif, vectorstore tidak diubah.
+
+contoh:
+    python eval/bench_storage.py
+    python eval/bench_storage.py --pca-dim 128 --rescore 8 --out eval/bench/storage.json
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+eval_dir = Path(__file__).resolve().parent
+sys.path.insert(0, str(eval_dir.parent))
+
+from utils import retriever  # noqa: E402
+from utils.faiss_index import build_index, index_bytes, storage_options  # noqa: E402
+from bench_retrieval import load_queries  # noqa: E402
+
+class Variant:
+    # cukup atribut yang dipakai retriever.faiss_search
+    def __init__(self, base, index, rescore: bool):
+        self.faiss = index
+        self.embeddings = base.embeddings
+        self.id_to_pos = base.id_to_pos
+        self.rescore = rescore
+
+def run_variant(ix, q_embs, truth, k, repeat):
+    latencies = []
+    recalls = []
+    for q, exact in zip(q_embs, truth):
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            _, pos = retriever.faiss_search(ix, q, k)
+            latencies.append((time.perf_counter() - t0) * 1000)
+        recalls.append(len(set(pos.tolist()) & exact) / max(len(exact), 1))
+    lat = np.array(latencies)
+    return {
+        f"recall@{k}": round(float(np.mean(recalls)), 4),
+        "latency_ms": {
+            "p50": round(float(np.percentile(lat, 50)), 3),
+            "p95": round(float(np.percentile(lat, 95)), 3),
+        },
+        "index_mb": round(index_bytes(ix.faiss) / 1e6, 2),
+    }
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--vectorstore", default=str(retriever.vector_dir))
+    ap.add_argument("--storages", default=",".join(storage_options))
+    ap.add_argument("--pca-dim", type=int, default=256)
+    ap.add_argument("--rescore", type=int, default=retriever.rescore_factor, help="shortlist = k * rescore")
+    ap.add_argument("--top-k", type=int, default=10)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--out", default=None)
+    args = ap.parse_args()
+
+    retriever.load_indexes(Path(args.vectorstore))
+    base = retriever.active
+    emb = np.ascontiguousarray(base.embeddings, dtype=np.float32)
+    ids = np.array([d.get("doc_id", i) for i, d in enumerate(base.docs)], dtype=np.int64)
+    retriever.rescore_factor = args.rescore
+
+    q_embs = [retriever.encode_query(q) for _, q, _ in load_queries()]
+    # ground truth = top-k exact (flat float32)
+    flat = build_index(emb, ids, "flat")
+    truth = [set(retriever.faiss_search(Variant(base, flat, False), q, args.top_k)[1].tolist()) for q in q_embs]
+    print(f"[INFO] docs={len(base.docs)} dim={emb.shape[1]} queries={len(q_embs)} k={args.top_k} rescore={args.rescore}")
+
+    results = {}
+    for storage in args.storages.split(","):
+        t0 = time.perf_counter()
+        index = flat if storage == "flat" else build_index(emb, ids, storage, args.pca_dim)
+        build_s = time.perf_counter() - t0
+        modes = [False] if storage == "flat" else [False, True]
+        for rescore in modes:
+            name = f"{storage}+rescore" if rescore else storage
+            res = run_variant(Variant(base, index, rescore), q_embs, truth, args.top_k, args.repeat)
+            res["build_s"] = round(build_s, 3)
+            results[name] = res
+            lat = res["latency_ms"]
+            print(
+                f"{name:16s} recall@{args.top_k}={res[f'recall@{args.top_k}']:.4f} "
+                f"p50={lat['p50']:.3f}ms p95={lat['p95']:.3f}ms index={res['index_mb']:.2f}MB"
+            )
+
+    if args.out:
+        out = Path(args.out)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        report = {
+            "vectorstore": args.vectorstore,
+            "docs": len(base.docs),
+            "dim": int(emb.shape[1]),
+            "top_k": args.top_k,
+            "rescore": args.rescore,
+            "pca_dim": args.pca_dim,
+            "embeddings_mb": round(emb.nbytes / 1e6, 2),
+            "results": results,
+        }
+        out.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"[INFO] hasil disimpan: {out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Bandingkan chunking lama (200 kata, overlap 50) dengan chunker berbasis token:
+jumlah chunk, distribusi token, dan berapa chunk yang kepotong max_seq_length encoder.
+
+contoh:
+    python eval/chunk_report.py
+    python eval/chunk_report.py --chunk-tokens 192 --overlap-tokens 24 --out eval/bench/chunks.json
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+eval_dir = Path(__file__).resolve().parent
+sys.path.insert(0, str(eval_dir.parent))
+
+import ingest  # noqa: E402
+from utils.splitter import load_chunker  # noqa: E402
+
+def chunk_stats(docs: list, chunker) -> dict:
+    lens = np.array(chunker.count([d["text"] for d in docs])) + chunker.special
+    over = np.maximum(lens - chunker.max_seq_length, 0)
+    out = {
+        "chunks": len(docs),
+        "tokens_p50": float(np.percentile(lens, 50)),
+        "tokens_p95": float(np.percentile(lens, 95)),
+        "tokens_max": int(lens.max()),
+        "truncated": int((over > 0).sum()),
+        "truncation_rate": round(float((over > 0).mean()), 4),
+        # token yang nggak pernah ke-embed
+        "tokens_lost": int(over.sum()),
+        "tiny": int((lens < chunker.min_tokens).sum()),
+    }
+    for kind in ("catalog_meta", "catalog_synopsis", "pdf_chunk"):
+        sel = np.array([d["doc_kind"] == kind for d in docs])
+        out[kind] = {"chunks": int(sel.sum()), "truncated": int((over[sel] > 0).sum())}
+    return out
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--chunk-tokens", type=int, default=256)
+    ap.add_argument("--overlap-tokens", type=int, default=32)
+    ap.add_argument("--out", default=None)
+    args = ap.parse_args()
+
+    chunker = load_chunker(ingest.indobert_model, args.chunk_tokens, args.overlap_tokens)
+    print(f"[INFO] max_seq_length={chunker.max_seq_length} target={chunker.target} overlap={chunker.overlap}")
+
+    report = {
+        "max_seq_length": chunker.max_seq_length,
+        "target": chunker.target,
+        "overlap": chunker.overlap,
+        "before": chunk_stats(ingest.load_docs(), chunker),
+        "after": chunk_stats(ingest.load_docs(chunker), chunker),
+    }
+    for name in ("before", "after"):
+        st = report[name]
+        print(
+            f"{name:7s} chunks={st['chunks']:5d} p50={st['tokens_p50']:.0f} p95={st['tokens_p95']:.0f} "
+            f"max={st['tokens_max']} truncated={st['truncated']} ({st['truncation_rate']:.1%}) "
+            f"tokens_lost={st['tokens_lost']} tiny={st['tiny']}"
+        )
+
+    if args.out:
+        out = Path(args.out)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"[INFO] hasil disimpan: {out}")
+
+if __name__ == "__main__":
+    main()
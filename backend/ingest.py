@@ -1,14 +1,29 @@
+import argparse
+import copy
+import hashlib
 import json
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import numpy as np
 import pandas as pd
 import pdfplumber
 import faiss 
-from rank_bm25 import BM25Okapi 
-import joblib
-from sentence_transformers import SentenceTransformer
+from utils import snapshot
+from utils import spacy_ner
+from utils.bm25_index import IncrementalBM25
+from utils.catalog_index import CatalogIndex
+from utils.suggest_index import SuggestIndex, suggest_file
+from utils.entity_index import EntityIndex, entity_labels
+from utils.faiss_index import build_index, index_bytes, storage_options
+from utils.minhash import NearDupIndex
 from utils.preprocess import clean_text, tokenize_bm25
-from utils.splitter import chunk_text
+from utils.speller import SymSpell
+from utils.splitter import chunk_text, load_chunker
 
 base = Path(__file__).resolve().parent
 data = base / "data"
@@ -20,145 +35,741 @@ pdf_path = data / "data_operasional_mlibbot_perpustakaan_maranatha_v1.pdf"
 
 indobert_model = "LazarusNLP/all-indobert-base-v4"
 
-def load_docs():
-    docs = []
-    # 1) katalog Excel
-    df = pd.read_excel(catalog)
+catalog_cols = [
+    "id", "title", "authors", "year", "isbn", "publisher", "language", "location",
+    "availability", "detail_url", "thumbnail_url", "keyword", "synopsis",
+]
+
+def add_stage(report: dict, name: str, seconds: float, items: int):
+    st = report.setdefault(name, {"seconds": 0.0, "items": 0})
+    st["seconds"] += seconds
+    st["items"] += items
+
+empty_values = {"", "nan", "none"}
+
+def _norm_text(s: pd.Series) -> pd.Series:
+    return s.str.lower().str.replace(r"[^0-9a-z]+", " ", regex=True).str.strip()
+
+def merge_catalog(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Gabung baris katalog yang bukunya sama (scraping.py nyimpan 1 baris per keyword):
+    - kunci: id record, ISBN, dan judul+penulis+tahun yang dinormalisasi
+      (judul saja terlalu longgar, "Algoritma dan Pemrograman" ada banyak buku)
+    - keyword digabung sesuai urutan muncul, sinopsis ambil yang terpanjang
+    - kolom lain ikut baris pertama, id yang ikut digabung disimpan di record_ids
+    """
+    df = df.reset_index(drop=True)
+    title = _norm_text(df["title"])
+    keys = [
+        df["id"],
+        df["isbn"].str.upper().str.replace(r"[^0-9X]", "", regex=True),
+        (title + "|" + _norm_text(df["authors"]) + "|" + df["year"]).where(~title.isin(empty_values), ""),
+    ]
+
+    # union-find; root = baris paling awal di grup
+    root = list(range(len(df)))
+
+    def find(i):
+        while root[i] != i:
+            root[i] = root[root[i]]
+            i = root[i]
+        return i
+
+    for col in keys:
+        first = {}
+        for i, v in enumerate(col):
+            if v.lower() in empty_values:
+                continue
+            j = first.setdefault(v, i)
+            a, b = find(i), find(j)
+            if a != b:
+                root[max(a, b)] = min(a, b)
+
+    group = pd.Series([find(i) for i in range(len(df))], index=df.index)
+    g = df.groupby(group, sort=True)
+    out = g.first()
+    out["keyword"] = g["keyword"].agg(
+        lambda s: ", ".join(dict.fromkeys(k for k in s if k.lower() not in empty_values)) or s.iloc[0]
+    )
+    out["synopsis"] = g["synopsis"].agg(
+        lambda s: max(s, key=lambda x: 0 if x.lower() in empty_values else len(x))
+    )
+    out["record_ids"] = g["id"].agg(
+        lambda s: ["cat_" + i for i in dict.fromkeys(s) if i.lower() not in empty_values]
+    )
+    # index = posisi baris sumber paling awal (dipakai buat row_<n>)
+    return out
+
+def make_chunks(text: str, chunker=None, reserve: int = 0) -> list:
+    # chunker None = chunk lama per 200 kata (dipakai buat report perbandingan)
+    if chunker is None:
+        return chunk_text(text, chunk_size=200, overlap=50)
+    return chunker.chunk(text, reserve=reserve)
+
+def prepare_catalog(df: pd.DataFrame, chunker=None) -> pd.DataFrame:
+    """
+    Siapkan kolom katalog per kolom (bukan iterrows):
+    str() per sel sama seperti versi lama (NaN -> "nan"), lalu strip.
+    Baris duplikat (buku sama, keyword beda) digabung dulu lewat merge_catalog.
+    """
     df.columns = [c.lower().strip() for c in df.columns]
+    for c in catalog_cols:
+        df[c] = df[c].map(str).str.strip() if c in df.columns else ""
+    df = merge_catalog(df)
 
-    for i, row in df.iterrows():
-        # pake id asli
-        raw_id = str(row.get("id", "")).strip()
-        parent_id = f"cat_{raw_id}" if raw_id else f"row_{i+1}"
-
-        title = str(row.get("title", "")).strip()
-        authors = str(row.get("authors", "")).strip()
-        year = str(row.get("year", "")).strip()
-        isbn = str(row.get("isbn", "")).strip()
-        publisher = str(row.get("publisher", "")).strip()
-        language = str(row.get("language", "")).strip()
-        location = str(row.get("location", "")).strip()
-        availability = str(row.get("availability", "")).strip()
-        detail_url = str(row.get("detail_url", "")).strip()
-        thumbnail_url = str(row.get("thumbnail_url", "")).strip()
-        keyword = str(row.get("keyword", "")).strip()
-        synopsis = str(row.get("synopsis", "")).strip()
-
-        # doc meta (1 buku = 1 doc)
-        meta_text = clean_text(
-            f"Judul: {title}\n"
-            f"Penulis: {authors}\n"
-            f"Tahun: {year}\n"
-            f"ISBN: {isbn}\n"
-            f"Penerbit: {publisher}\n"
-            f"Bahasa: {language}\n"
-            f"Lokasi: {location}\n"
-            f"Status: {availability}\n"
-            f"Kata kunci: {keyword}\n"
-        )
-        docs.append({
-            "text": meta_text,
+    # pake id asli
+    row_ids = "row_" + pd.Series(df.index + 1, index=df.index).map(str)
+    df["parent_id"] = ("cat_" + df["id"]).where(df["id"] != "", row_ids)
+
+    # key stabil per buku (buat ingest incremental)
+    df["doc_key"] = "catalog::" + df["parent_id"]
+
+    # doc meta (1 buku = 1 doc)
+    df["meta_text"] = (
+        "Judul: " + df["title"] + "\n"
+        + "Penulis: " + df["authors"] + "\n"
+        + "Tahun: " + df["year"] + "\n"
+        + "ISBN: " + df["isbn"] + "\n"
+        + "Penerbit: " + df["publisher"] + "\n"
+        + "Bahasa: " + df["language"] + "\n"
+        + "Lokasi: " + df["location"] + "\n"
+        + "Status: " + df["availability"] + "\n"
+        + "Kata kunci: " + df["keyword"] + "\n"
+    ).map(clean_text)
+
+    # header sinopsis, teks chunk ditempel per chunk
+    df["syn_header"] = (
+        "Judul: " + df["title"] + "\n"
+        + "Penulis: " + df["authors"] + "\n"
+        + "Tahun: " + df["year"] + "\n"
+        + "ISBN: " + df["isbn"] + "\n"
+        + "Lokasi: " + df["location"] + "\n"
+        + "Status: " + df["availability"] + "\n"
+        + "Kata kunci: " + df["keyword"] + "\n"
+    )
+    synopsis = df["synopsis"].map(clean_text)
+    if chunker is None:
+        reserve = [0] * len(df)
+    else:
+        # token header dipesan dulu supaya header + chunk muat di encoder
+        reserve = chunker.count((df["syn_header"] + "Sinopsis: ").map(clean_text).tolist())
+    df["syn_chunks"] = [make_chunks(s, chunker, r) for s, r in zip(synopsis, reserve)]
+    return df
+
+def catalog_groups(df: pd.DataFrame):
+    # 1 baris katalog = 1 grup (doc meta + chunk sinopsis)
+    for r in df.to_dict("records"):
+        parent_id = r["parent_id"]
+        docs = [{
+            "text": r["meta_text"],
             "source": "catalog",
             "doc_kind": "catalog_meta",
+            "doc_key": r["doc_key"],
             "source_id": parent_id,
             "parent_id": parent_id,
-            "title": title,
-            "authors": authors,
-            "year": year,
-            "isbn": isbn,
-            "publisher": publisher,
-            "language": language,
-            "location": location,
-            "availability": availability,
-            "detail_url": detail_url,
-            "thumbnail_url": thumbnail_url,
-            "keyword": keyword,
-        })
+            "title": r["title"],
+            "authors": r["authors"],
+            "year": r["year"],
+            "isbn": r["isbn"],
+            "publisher": r["publisher"],
+            "language": r["language"],
+            "location": r["location"],
+            "availability": r["availability"],
+            "detail_url": r["detail_url"],
+            "thumbnail_url": r["thumbnail_url"],
+            "keyword": r["keyword"],
+            "record_ids": r["record_ids"],
+        }]
 
         # doc sinopsis di-chunk (1 buku bisa banyak doc)
-        syn_clean = clean_text(synopsis)
-        syn_chunks = chunk_text(syn_clean, chunk_size=200, overlap=50)
-
-        for si, ch in enumerate(syn_chunks):
-            syn_text = clean_text(
-                f"Judul: {title}\n"
-                f"Penulis: {authors}\n"
-                f"Tahun: {year}\n"
-                f"ISBN: {isbn}\n"
-                f"Lokasi: {location}\n"
-                f"Status: {availability}\n"
-                f"Kata kunci: {keyword}\n"
-                f"Sinopsis: {ch}\n"
-            )
+        for si, ch in enumerate(r["syn_chunks"]):
             docs.append({
-                "text": syn_text,
+                "text": clean_text(r["syn_header"] + f"Sinopsis: {ch}\n"),
                 "source": "catalog",
                 "doc_kind": "catalog_synopsis",
+                "doc_key": r["doc_key"],
                 "source_id": f"{parent_id}_s{si}",
 
                 # link ke parent
                 "parent_id": parent_id,
-                "title": title,
-                "authors": authors,
-                "year": year,
-                "isbn": isbn,
-                "location": location,
-                "availability": availability,
-                "detail_url": detail_url,
-                "thumbnail_url": thumbnail_url,
-                "keyword": keyword,
+                "title": r["title"],
+                "authors": r["authors"],
+                "year": r["year"],
+                "isbn": r["isbn"],
+                "location": r["location"],
+                "availability": r["availability"],
+                "detail_url": r["detail_url"],
+                "thumbnail_url": r["thumbnail_url"],
+                "keyword": r["keyword"],
             })
+        yield docs
 
-    # 2) PDF operasional
+def _extract_pdf_pages(pages: list):
+    # jalan di process pool: 1 task = beberapa halaman, PDF dibuka sekali per task
+    # (chunking di proses utama karena butuh tokenizer)
+    t0 = time.perf_counter()
+    out = []
     with pdfplumber.open(pdf_path) as pdf_obj:
-        for p, page in enumerate(pdf_obj.pages):
-            raw = clean_text(page.extract_text() or "")
-            chunks = chunk_text(raw, 200, 50)
-            for ci, ch in enumerate(chunks):
-                docs.append(
-                    {
-                        "text": ch,
-                        "source": "pdf",
-                        "doc_kind": "pdf_chunk",
-                        "source_id": f"p{p+1}_c{ci}",
-                    }
-                )
+        for p in pages:
+            out.append((p, clean_text(pdf_obj.pages[p].extract_text() or "")))
+    return out, time.perf_counter() - t0
+
+def pdf_group(p: int, chunks: list) -> list:
+    return [
+        {
+            "text": ch,
+            "source": "pdf",
+            "doc_kind": "pdf_chunk",
+            "doc_key": f"pdf::p{p+1}",
+            "source_id": f"p{p+1}_c{ci}",
+        }
+        for ci, ch in enumerate(chunks)
+    ]
+
+def stream_groups(report: dict, workers: int = None, chunker=None):
+    """
+    Generator grup dokumen (katalog per baris, PDF per halaman).
+    Ekstraksi PDF jalan paralel di process pool sementara katalog diproses.
+    """
+    workers = workers or os.cpu_count() or 1
+    with pdfplumber.open(pdf_path) as pdf_obj:
+        n_pages = len(pdf_obj.pages)
+    slices = [list(range(n_pages))[k::workers] for k in range(workers)]
+    slices = [sl for sl in slices if sl]
+
+    t_pdf = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=len(slices), mp_context=mp.get_context("spawn")) as pool:
+        pdf_futures = [pool.submit(_extract_pdf_pages, sl) for sl in slices]
+
+        # 1) katalog Excel
+        t0 = time.perf_counter()
+        df = pd.read_excel(catalog)
+        add_stage(report, "catalog_read", time.perf_counter() - t0, len(df))
+
+        t0 = time.perf_counter()
+        n_rows = len(df)
+        df = prepare_catalog(df, chunker)
+        add_stage(report, "catalog_prepare", time.perf_counter() - t0, n_rows)
+        report["catalog_prepare"]["merged"] = n_rows - len(df)
+        yield from catalog_groups(df)
+
+        # 2) PDF operasional (urut per halaman)
+        pages = {}
+        busy = 0.0
+        for fut in pdf_futures:
+            out, sec = fut.result()
+            busy += sec
+            pages.update(dict(out))
+        add_stage(report, "pdf_extract", time.perf_counter() - t_pdf, n_pages)
+        report["pdf_extract"]["worker_seconds"] = busy
+        for p in range(n_pages):
+            yield pdf_group(p, make_chunks(pages[p], chunker))
+
+def load_docs(chunker=None):
+    return [d for g in stream_groups({}, chunker=chunker) for d in g]
+
+def group_docs(docs: list) -> dict:
+    # doc_key -> list chunk (urutan sesuai load_docs)
+    groups = {}
+    for d in docs:
+        groups.setdefault(d["doc_key"], []).append(d)
+    return groups
+
+def group_hash(chunks: list) -> str:
+    payload = json.dumps(
+        [{k: v for k, v in d.items() if k != "doc_id"} for d in chunks],
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+class LazyEncoder:
+    """
+    Encoder IndoBERT dengan cache per teks:
+    - model baru di-load kalau memang ada teks baru yang perlu di-encode
+    - teks diurutkan per panjang sebelum di-batch supaya padding minim
+    - teks near-duplicate (MinHash/LSH) pakai vektor teks representatifnya,
+      jadi nggak di-encode lagi
+    """
+
+    def __init__(self, batch_size: int = 32, model=None, near_dup: float = 0.9):
+        self.batch_size = batch_size
+        self.model = model
+        self.cache = {}
+        self.encoded = 0
+        self.seconds = 0.0
+
+        self.near_dup = NearDupIndex(threshold=near_dup) if near_dup > 0 else None
+        self.alias = {}  # text_hash -> text_hash representatif
+        self.rep_text = {}
+        self.seen = set()
+        self.dedup_seconds = 0.0
+
+    def seed(self, docs: list, embeddings: np.ndarray, skip=()):
+        # pakai ulang embedding dari hasil ingest sebelumnya
+        # (teks yang dulu near-duplicate di-skip: vektornya punya teks lain)
+        for pos, d in enumerate(docs):
+            h = text_hash(d["text"])
+            if h not in skip:
+                self.cache.setdefault(h, embeddings[pos])
+
+    def observe(self, texts: list):
+        # dipanggil sesuai urutan dokumen, jadi alias full / incremental sama
+        if self.near_dup is None:
+            return
+        t0 = time.perf_counter()
+        for t in texts:
+            h = text_hash(t)
+            if h in self.seen:
+                continue
+            self.seen.add(h)
+            rep = self.near_dup.find_or_add(h, t)
+            if rep is None:
+                self.rep_text[h] = t
+            else:
+                self.alias[h] = rep
+        self.dedup_seconds += time.perf_counter() - t0
+
+    def key(self, text: str) -> str:
+        h = text_hash(text)
+        return self.alias.get(h, h)
+
+    def warm(self, texts: list):
+        self.observe(texts)
+        todo = {}
+        for t in texts:
+            k = self.key(t)
+            if k not in self.cache:
+                todo[k] = self.rep_text.get(k, t)
+        todo = list(todo.values())
+        if not todo:
+            return
+        if self.model is None:
+            # import di sini: torch cuma ke-load kalau memang ada yang di-encode
+            from sentence_transformers import SentenceTransformer
+            self.model = SentenceTransformer(indobert_model)
+        todo.sort(key=len)
+
+        t0 = time.perf_counter()
+        vecs = self.model.encode(
+            todo,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+            normalize_embeddings=True,
+        ).astype(np.float32)
+        self.seconds += time.perf_counter() - t0
+        self.encoded += len(todo)
+
+        for t, v in zip(todo, vecs):
+            self.cache[text_hash(t)] = v
+
+    def encode(self, texts: list) -> np.ndarray:
+        self.warm(texts)
+        return np.stack([self.cache[self.key(t)] for t in texts]).astype(np.float32)
+
+    def near_dups(self, docs: list) -> dict:
+        # alias yang kepakai di docs (disimpan di manifest)
+        hashes = {text_hash(d["text"]) for d in docs}
+        return {h: r for h, r in self.alias.items() if h in hashes}
+
+def stream_and_encode(encoder: LazyEncoder, old_groups: dict, report: dict, window: int = 256, workers: int = None, chunker=None) -> list:
+    """
+    Ekstraksi (thread producer + process pool PDF) jalan overlap dengan encode:
+    tiap grup yang berubah langsung masuk buffer encode, buffer di-encode
+    per window sementara ekstraksi berikutnya tetap jalan.
+    """
+    q = queue.Queue(maxsize=64)
+    errors = []
+
+    def produce():
+        try:
+            for g in stream_groups(report, workers, chunker):
+                q.put(g)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            q.put(None)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+
+    docs = []
+    buffer = []
+    while True:
+        g = q.get()
+        if g is None:
+            break
+        docs.extend(g)
+        encoder.observe([d["text"] for d in g])
+        # grup yang hash-nya sama dengan manifest lama nggak perlu di-encode
+        if old_groups.get(g[0]["doc_key"], {}).get("hash") != group_hash(g):
+            buffer.extend(d["text"] for d in g)
+        if len(buffer) >= window:
+            encoder.warm(buffer)
+            buffer = []
+    encoder.warm(buffer)
+    producer.join()
+    if errors:
+        raise errors[0]
+
+    add_stage(report, "encode", encoder.seconds, encoder.encoded)
     return docs
 
-def main():
-    docs = load_docs()
-    print(f"[INFO] Total dokumen: {len(docs)}")
+def print_report(report: dict, total: float):
+    print("[INFO] Throughput per stage:")
+    for name, st in report.items():
+        rate = st["items"] / st["seconds"] if st["seconds"] > 0 else float("inf")
+        extra = f" (worker {st['worker_seconds']:.2f}s)" if "worker_seconds" in st else ""
+        for k in ("merged", "encodes_skipped", "truncated", "deletes", "entities"):
+            if k in st:
+                extra += f" ({k.replace('_', ' ')} {st[k]})"
+        print(f"  {name:16s} {st['items']:7d} item  {st['seconds']:8.2f}s  {rate:10.1f}/s{extra}")
+    print(f"  {'total (wall)':16s} {total:24.2f}s")
+
+def load_store(path: Path):
+    """
+    Load hasil ingest sebelumnya. None kalau belum ada / format lama
+    (tanpa manifest), jadi harus full rebuild.
+    """
+    if not (path / "manifest.json").exists():
+        return None
+    with open(path / "docs.json", encoding="utf-8") as f:
+        docs = json.load(f)
+    with open(path / "manifest.json", encoding="utf-8") as f:
+        manifest = json.load(f)
+    return {
+        "docs": docs,
+        "embeddings": np.load(path / "indo_embeddings.npy"),
+        "bm25": snapshot.load_pickle(path / "bm25.pkl"),
+        "faiss": faiss.read_index(str(path / "faiss_indo.index")),
+        "manifest": manifest,
+        "entities": snapshot.load_pickle(path / "entities.pkl") if (path / "entities.pkl").exists() else None,
+    }
+
+def save_store(store: dict, path: Path):
+    path.mkdir(parents=True, exist_ok=True)
+    snapshot.dump_pickle(store["bm25"], path / "bm25.pkl")
+    if store.get("speller") is not None:
+        snapshot.dump_pickle(store["speller"], path / "speller.pkl")
+    if store.get("entities") is not None:
+        snapshot.dump_pickle(store["entities"], path / "entities.pkl")
+    if store.get("catalog") is not None:
+        snapshot.dump_pickle(store["catalog"], path / "catalog.pkl")
+    if store.get("suggest") is not None:
+        snapshot.dump_pickle(store["suggest"], path / suggest_file)
+    np.save(path / "indo_embeddings.npy", store["embeddings"])
+    faiss.write_index(store["faiss"], str(path / "faiss_indo.index"))
+    with open(path / "docs.json", "w", encoding="utf-8") as f:
+        json.dump(store["docs"], f, ensure_ascii=False, indent=2)
+    with open(path / "manifest.json", "w", encoding="utf-8") as f:
+        json.dump(store["manifest"], f, ensure_ascii=False, indent=2)
+
+def field_entities(doc: dict) -> list:
+    # penulis ("Kadir, Abdul; ...") + penerbit ("Andi : Yogyakarta., 2014") katalog
+    ents = []
+    for name in str(doc.get("authors", "")).split(";"):
+        name = name.strip()
+        if name.lower() in empty_values:
+            continue
+        ents.append((name, "PER"))
+        if "," in name:
+            last, first = [p.strip() for p in name.split(",", 1)]
+            ents += [(f"{first} {last}", "PER"), (last, "PER")]
+    publisher = str(doc.get("publisher", "")).split(":")[0].strip()
+    if publisher.lower() not in empty_values:
+        ents.append((publisher, "ORG"))
+    return ents
+
+def ner_cache(prev: dict) -> dict:
+    # hash teks chunk -> hasil NER snapshot sebelumnya (model yang sama)
+    ix = prev.get("entities") if prev else None
+    if ix is None or ix.ner_model != spacy_ner.ner_model or len(ix.ner) != len(prev["docs"]):
+        return {}
+    return {text_hash(d["text"]): ents for d, ents in zip(prev["docs"], ix.ner)}
+
+def build_entities(docs: list, bm25, cache: dict, report: dict, ner: bool = True, n_process: int = 1,
+                   batch_size: int = 64):
+    """
+    NER spaCy (PER/ORG) cuma untuk teks yang belum ada di cache, lewat nlp.pipe
+    per batch di n_process proses, lalu digabung dengan field katalog jadi postings.
+    """
+    ner = ner and spacy_ner.available()
+    hashes = [text_hash(d["text"]) for d in docs]
+    todo = {}
+    if ner:
+        for h, d in zip(hashes, docs):
+            if h not in cache:
+                todo.setdefault(h, d["text"])
+
+    t0 = time.perf_counter()
+    if todo:
+        print(f"[INFO] NER spaCy {len(todo)} chunk ({n_process} proses)...")
+        found = spacy_ner.extract_entities_batch(list(todo.values()), entity_labels, batch_size, n_process)
+        cache = {**cache, **dict(zip(todo, found))}
+    add_stage(report, "ner", time.perf_counter() - t0, len(todo))
+
+    t0 = time.perf_counter()
+    doc_ner = [cache.get(h, []) if ner else [] for h in hashes]
+    ix = EntityIndex.build(doc_ner, word_df=bm25.nd, doc_fields=[field_entities(d) for d in docs])
+    if ner:
+        ix.ner_model, ix.ner = spacy_ner.ner_model, doc_ner
+    add_stage(report, "entities", time.perf_counter() - t0, len(docs))
+    report["entities"]["entities"] = len(ix.postings)
+    return ix
+
+def storage_spec(storage: str, pca_dim: int) -> dict:
+    return {"kind": storage, "pca_dim": pca_dim} if storage == "pca" else {"kind": storage}
+
+def full_build(docs: list, encoder: LazyEncoder, report: dict = None, storage: str = "flat", pca_dim: int = 256) -> dict:
+    print("[INFO] Full rebuild...")
+    report = {} if report is None else report
+    manifest = {"next_id": 0, "groups": {}, "storage": storage_spec(storage, pca_dim)}
+    for key, chunks in group_docs(docs).items():
+        ids = []
+        for d in chunks:
+            d["doc_id"] = manifest["next_id"]
+            manifest["next_id"] += 1
+            ids.append(d["doc_id"])
+        manifest["groups"][key] = {"hash": group_hash(chunks), "ids": ids}
 
     texts = [d["text"] for d in docs]
 
     print("[INFO] Bangun index BM25...")
-    tokens = [tokenize_bm25(t) for t in texts]
-    bm25 = BM25Okapi(tokens)
-    joblib.dump(bm25, vector_dir / "bm25.pkl")
+    t0 = time.perf_counter()
+    bm25 = IncrementalBM25([tokenize_bm25(t) for t in texts])
+    add_stage(report, "bm25", time.perf_counter() - t0, len(texts))
 
     print("[INFO] Bangun embedding IndoBERT...")
-    model = SentenceTransformer(indobert_model)
+    embeddings = encoder.encode(texts)
+    manifest["near_dups"] = encoder.near_dups(docs)
+
+    print(f"[INFO] Bangun index FAISS IndoBERT ({storage})...")
+    t0 = time.perf_counter()
+    # IDMap: id stabil per chunk, jadi bisa add / remove tanpa rebuild
+    index = build_index(embeddings, np.array([d["doc_id"] for d in docs], dtype=np.int64), storage, pca_dim)
+    add_stage(report, "faiss", time.perf_counter() - t0, len(texts))
+
+    return {"docs": docs, "embeddings": embeddings, "bm25": bm25, "faiss": index, "manifest": manifest}
+
+def incremental_build(docs: list, prev: dict, encoder: LazyEncoder, storage: str = "flat", pca_dim: int = 256):
+    """
+    Bandingkan hash tiap dokumen sumber dengan manifest sebelumnya:
+    - hash sama: chunk lama dipakai apa adanya (id, embedding, stat BM25)
+    - berubah / baru: chunk lama dibuang, chunk baru ditambah
+    - embedding dipakai ulang kalau teks chunk-nya persis sama
+    - grup yang status near-duplicate chunk-nya berubah ikut dianggap berubah
+    - storage FAISS beda dari sebelumnya: index FAISS saja yang dibangun ulang
+    """
+    manifest = prev["manifest"]
+    old_groups = manifest["groups"]
+    old_alias = manifest.get("near_dups", {})
+    new_groups = group_docs(docs)
+    encoder.observe([d["text"] for d in docs])
+
+    def alias_changed(chunks):
+        return any(encoder.alias.get(h) != old_alias.get(h) for h in (text_hash(d["text"]) for d in chunks))
+
+    changed_keys = [
+        k for k, ch in new_groups.items()
+        if old_groups.get(k, {}).get("hash") != group_hash(ch) or alias_changed(ch)
+    ]
+    removed_keys = [k for k in old_groups if k not in new_groups or k in changed_keys]
+
+    removed_ids = {i for k in removed_keys for i in old_groups[k]["ids"]}
+    old_docs = prev["docs"]
+    removed_pos = [pos for pos, d in enumerate(old_docs) if d["doc_id"] in removed_ids]
+
+    # embedding lama per teks disimpan di cache encoder sebelum dibuang
+    encoder.seed(old_docs, prev["embeddings"], skip=old_alias)
+    encoded_before = encoder.encoded
+
+    # 1) buang chunk lama
+    keep = np.ones(len(old_docs), dtype=bool)
+    keep[removed_pos] = False
+    out_docs = [d for pos, d in enumerate(old_docs) if keep[pos]]
+    embeddings = prev["embeddings"][keep]
+    bm25 = prev["bm25"]
+    bm25.remove(removed_pos)
+    index = prev["faiss"]
+    index.remove_ids(np.array(sorted(removed_ids), dtype=np.int64))
+    for k in removed_keys:
+        del old_groups[k]
 
-    indo_embeddings = model.encode(
-        texts,
-        batch_size=16,
-        convert_to_numpy=True,
-        show_progress_bar=True,
-        normalize_embeddings=True,
-    ).astype(np.float32)
+    # 2) tambah chunk baru (append di belakang)
+    added = [d for k in changed_keys for d in new_groups[k]]
+    for k in changed_keys:
+        ids = []
+        for d in new_groups[k]:
+            d["doc_id"] = manifest["next_id"]
+            manifest["next_id"] += 1
+            ids.append(d["doc_id"])
+        old_groups[k] = {"hash": group_hash(new_groups[k]), "ids": ids}
 
-    np.save(vector_dir / "indo_embeddings.npy", indo_embeddings)
+    if added:
+        new_vecs = encoder.encode([d["text"] for d in added])
+        embeddings = np.concatenate([embeddings, new_vecs]) if len(embeddings) else new_vecs
+        bm25.add([tokenize_bm25(d["text"]) for d in added])
+        index.add_with_ids(new_vecs, np.array([d["doc_id"] for d in added], dtype=np.int64))
 
-    print("[INFO] Bangun index FAISS IndoBERT...")
-    dim_indo = indo_embeddings.shape[1]
-    faiss_indo_index = faiss.IndexFlatIP(dim_indo)
-    faiss_indo_index.add(indo_embeddings)
-    faiss.write_index(faiss_indo_index, str(vector_dir / "faiss_indo.index"))
+    out_docs.extend(added)
+    manifest["near_dups"] = encoder.near_dups(out_docs)
+
+    # quantizer / PCA tetap pakai hasil training build sebelumnya (re-score nutup selisihnya)
+    spec = storage_spec(storage, pca_dim)
+    if manifest.get("storage", {"kind": "flat"}) != spec:
+        print(f"[INFO] Storage FAISS berubah -> {storage}, index FAISS dibangun ulang")
+        index = build_index(embeddings, np.array([d["doc_id"] for d in out_docs], dtype=np.int64), storage, pca_dim)
+    manifest["storage"] = spec
+    stats = {
+        "groups_changed": len(changed_keys),
+        "groups_removed": len([k for k in removed_keys if k not in changed_keys]),
+        "chunks_removed": len(removed_pos),
+        "chunks_added": len(added),
+        "chunks_encoded": encoder.encoded - encoded_before,
+    }
+    store = {"docs": out_docs, "embeddings": embeddings, "bm25": bm25, "faiss": index, "manifest": manifest}
+    return store, stats
+
+def verify(incr: dict, full: dict, queries: list):
+    """
+    Cek hasil incremental == full rebuild (dibandingkan per doc_key + source_id,
+    karena doc_id / urutan bisa beda).
+    """
+    def keyed(store):
+        return {(d["doc_key"], d["source_id"]): pos for pos, d in enumerate(store["docs"])}
+
+    ki, kf = keyed(incr), keyed(full)
+    assert ki.keys() == kf.keys(), "set dokumen beda"
+    pos_i = np.array([ki[k] for k in kf])
+    pos_f = np.array([kf[k] for k in kf])
+
+    for k in kf:
+        assert incr["docs"][ki[k]]["text"] == full["docs"][kf[k]]["text"], f"teks beda: {k}"
+    assert np.allclose(incr["embeddings"][pos_i], full["embeddings"][pos_f], atol=1e-6), "embedding beda"
+
+    # vektor di FAISS harus sama dengan embedding per doc_id
+    # (storage terkompresi cuma dicek jumlahnya, quantizer-nya di-train dari data beda)
+    assert incr["faiss"].ntotal == full["faiss"].ntotal, "jumlah vektor FAISS beda"
+    if incr["manifest"]["storage"]["kind"] == "flat":
+        ids_i = np.array([incr["docs"][p]["doc_id"] for p in pos_i], dtype=np.int64)
+        vec_i = np.stack([incr["faiss"].reconstruct(int(i)) for i in ids_i])
+        assert np.allclose(vec_i, full["embeddings"][pos_f], atol=1e-6), "vektor FAISS beda"
+
+    for q in queries:
+        tokens = tokenize_bm25(q)
+        s_i = incr["bm25"].get_scores(tokens)[pos_i]
+        s_f = full["bm25"].get_scores(tokens)[pos_f]
+        assert np.allclose(s_i, s_f, rtol=1e-9, atol=1e-9), f"skor BM25 beda untuk query: {q}"
+    print(f"[INFO] Verifikasi OK: {len(kf)} chunk, {len(queries)} query BM25 identik dengan full rebuild")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--full", action="store_true", help="paksa rebuild dari nol")
+    ap.add_argument("--verify", action="store_true", help="bandingkan hasil incremental dengan full rebuild")
+    ap.add_argument("--workers", type=int, default=None, help="jumlah proses ekstraksi PDF")
+    ap.add_argument("--batch-size", type=int, default=32)
+    ap.add_argument("--keep", type=int, default=3, help="jumlah snapshot lama yang disimpan")
+    ap.add_argument("--chunk-tokens", type=int, default=256, help="target token per chunk (0 = max_seq_length model)")
+    ap.add_argument("--overlap-tokens", type=int, default=32)
+    ap.add_argument("--storage", choices=storage_options, default="flat", help="format vektor di index FAISS")
+    ap.add_argument("--pca-dim", type=int, default=256, help="dimensi hasil PCA (--storage pca)")
+    ap.add_argument("--near-dup", type=float, default=0.9, help="threshold Jaccard chunk near-duplicate (0 = mati)")
+    ap.add_argument("--no-ner", action="store_true", help="entitas cuma dari field katalog, tanpa spaCy")
+    ap.add_argument("--ner-workers", type=int, default=None, help="jumlah proses nlp.pipe spaCy")
+    ap.add_argument("--ner-batch-size", type=int, default=64)
+    args = ap.parse_args()
+
+    t_start = time.perf_counter()
+    report = {}
+    encoder = LazyEncoder(batch_size=args.batch_size, near_dup=args.near_dup)
+    prev_path, prev_version = snapshot.resolve(vector_dir)
+    prev = None if args.full else load_store(prev_path)
+    if prev is not None:
+        encoder.seed(prev["docs"], prev["embeddings"], skip=prev["manifest"].get("near_dups", {}))
+    old_groups = prev["manifest"]["groups"] if prev else {}
+    entity_cache = ner_cache(prev)
+
+    chunker = load_chunker(indobert_model, args.chunk_tokens, args.overlap_tokens)
+    docs = stream_and_encode(encoder, old_groups, report, workers=args.workers, chunker=chunker)
+    print(f"[INFO] Total dokumen: {len(docs)}")
+
+    t0 = time.perf_counter()
+    truncated = chunker.truncated([d["text"] for d in docs])
+    add_stage(report, "chunk_check", time.perf_counter() - t0, len(docs))
+    report["chunk_check"]["truncated"] = truncated
+
+    if prev is None:
+        store = full_build(docs, encoder, report, args.storage, args.pca_dim)
+    else:
+        t0 = time.perf_counter()
+        store, stats = incremental_build(copy.deepcopy(docs), prev, encoder, args.storage, args.pca_dim)
+        add_stage(report, "incremental", time.perf_counter() - t0, stats["chunks_added"])
+        print(f"[INFO] Incremental: {stats}")
+
+    # index koreksi typo dari vocabulary BM25 terbaru (murah, selalu dibangun ulang)
+    t0 = time.perf_counter()
+    store["speller"] = SymSpell.from_bm25(store["bm25"])
+    add_stage(report, "speller", time.perf_counter() - t0, len(store["speller"].words))
+    report["speller"]["deletes"] = len(store["speller"].deletes)
+
+    # postings entitas (penulis / penerbit / instansi), NER cuma untuk chunk baru
+    store["entities"] = build_entities(
+        store["docs"], store["bm25"], entity_cache, report,
+        ner=not args.no_ner,
+        n_process=args.ner_workers or min(4, os.cpu_count() or 1),
+        batch_size=args.ner_batch_size,
+    )
+
+    # index /catalog/search (1 entri per buku), murah jadi selalu dibangun ulang
+    t0 = time.perf_counter()
+    store["catalog"] = CatalogIndex.build(store["docs"])
+    add_stage(report, "catalog_index", time.perf_counter() - t0, len(store["catalog"].books))
+
+    # index typeahead /suggest (judul, penulis, kata kunci)
+    t0 = time.perf_counter()
+    store["suggest"] = SuggestIndex.build(store["docs"])
+    add_stage(report, "suggest_index", time.perf_counter() - t0, len(store["suggest"].entries))
+
+    # yang dihemat cuma encode: chunk near-duplicate tetap punya baris FAISS sendiri
+    skipped = len(store["manifest"]["near_dups"])
+    add_stage(report, "near_dup", encoder.dedup_seconds, len(encoder.seen))
+    report["near_dup"]["encodes_skipped"] = skipped
+    print(f"[INFO] Near-duplicate: {skipped} chunk pakai vektor chunk lain (encode di-skip, baris FAISS tetap ada)")
+
+    if args.verify:
+        full = full_build(
+            copy.deepcopy(docs),
+            LazyEncoder(args.batch_size, model=encoder.model, near_dup=args.near_dup),
+            storage=args.storage,
+            pca_dim=args.pca_dim,
+        )
+        queries = ["jam layanan perpustakaan", "buku machine learning", "denda keterlambatan", "isbn 9786230208195"]
+        verify(store, full, queries)
 
-    with open(vector_dir / "docs.json", "w", encoding="utf-8") as f:
-        json.dump(docs, f, ensure_ascii=False, indent=2)
+    # tulis ke snapshot baru, API yang jalan baru pindah setelah CURRENT diganti
+    t0 = time.perf_counter()
+    version = snapshot.new_version()
+    staging = snapshot.staging_path(vector_dir, version)
+    save_store(store, staging)
+    snapshot.write_meta(staging, version, {
+        "docs_count": len(store["docs"]),
+        "previous": prev_version,
+        "storage": store["manifest"]["storage"],
+    })
+    final = snapshot.publish(vector_dir, staging, version, keep=args.keep)
+    add_stage(report, "save", time.perf_counter() - t0, len(store["docs"]))
 
+    print_report(report, time.perf_counter() - t_start)
+    print(
+        f"[INFO] FAISS {store['manifest']['storage']}: {index_bytes(store['faiss']) / 1e6:.1f} MB "
+        f"(embedding float32 {store['embeddings'].nbytes / 1e6:.1f} MB, di-mmap saat query)"
+    )
+    print(f"[INFO] Snapshot {version} aktif: {final}")
     print("[INFO] Ingest selesai. BM25 dan IndoBERT+FAISS siap dipakai.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,204 @@
+"""
+Load test end-to-end: jalankan API + mock Groq + mongod lokal, lalu naikkan
+concurrency bertahap dan laporkan throughput, tail latency dan event-loop lag.
+
+contoh:
+    python loadtest/harness.py --steps 1,4,8,16,32 --step-duration 30
+    python loadtest/harness.py --mongo-url mongodb://localhost:27017 --groq-latency-ms 800
+"""
+import argparse
+import asyncio
+import json
+import os
+import secrets
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+from prometheus_client.parser import text_string_to_metric_families
+
+from run import default_mix, make_client, parse_mix, print_step, run_step, setup_user
+
+loadtest_dir = Path(__file__).resolve().parent
+backend_dir = loadtest_dir.parent
+
+def wait_port(port: int, timeout: float):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        with socket.socket() as s:
+            if s.connect_ex(("127.0.0.1", port)) == 0:
+                return
+        time.sleep(0.2)
+    raise RuntimeError(f"port {port} tidak kunjung siap")
+
+def wait_http(url: str, timeout: float):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(url, timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"{url} tidak kunjung siap")
+
+def start_mongod(binary: str, port: int, dbpath: str):
+    proc = subprocess.Popen(
+        [binary, "--dbpath", dbpath, "--port", str(port), "--bind_ip", "127.0.0.1", "--quiet"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    wait_port(port, 30)
+    return proc
+
+def start_mock_groq(args):
+    cmd = [
+        sys.executable, str(loadtest_dir / "mock_groq.py"),
+        "--port", str(args.groq_port),
+        "--latency-ms", str(args.groq_latency_ms),
+        "--tokens-per-sec", str(args.groq_tokens_per_sec),
+        "--completion-tokens", str(args.groq_completion_tokens),
+    ]
+    proc = subprocess.Popen(cmd)
+    wait_port(args.groq_port, 30)
+    return proc
+
+def start_api(args, mongo_url: str, db_name: str):
+    env = dict(os.environ)
+    env.update({
+        "MONGO_URL": mongo_url,
+        "DB_NAME": db_name,
+        "GROQ_BASE_URL": f"http://127.0.0.1:{args.groq_port}/openai/v1",
+        "groq_api": "mock",
+        "SECRET_KEY": env.get("SECRET_KEY") or secrets.token_hex(32),
+        "RETRIEVAL_WORKERS": str(args.workers),
+    })
+    cmd = [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.api_port), "--log-level", "warning"]
+    proc = subprocess.Popen(cmd, cwd=backend_dir, env=env)
+    # load model bisa lama
+    wait_http(f"http://127.0.0.1:{args.api_port}/health", args.startup_timeout)
+    return proc
+
+def read_loop_lag(url: str) -> dict:
+    text = httpx.get(f"{url}/metrics", timeout=10).text
+    snap = {"buckets": {}, "sum": 0.0, "count": 0.0}
+    for fam in text_string_to_metric_families(text):
+        if fam.name != "mlibbot_event_loop_lag_seconds":
+            continue
+        for sample in fam.samples:
+            if sample.name.endswith("_bucket"):
+                snap["buckets"][float(sample.labels["le"])] = sample.value
+            elif sample.name.endswith("_sum"):
+                snap["sum"] = sample.value
+            elif sample.name.endswith("_count"):
+                snap["count"] = sample.value
+    return snap
+
+def lag_between(before: dict, after: dict) -> dict:
+    count = after["count"] - before["count"]
+    if count <= 0:
+        return {"samples": 0}
+
+    def quantile(q):
+        # batas atas bucket pertama yang kumulatifnya >= q
+        for le in sorted(after["buckets"]):
+            if after["buckets"][le] - before["buckets"].get(le, 0.0) >= q * count:
+                return le
+        return float("inf")
+
+    return {
+        "samples": int(count),
+        "mean_ms": round((after["sum"] - before["sum"]) / count * 1000, 2),
+        "p99_ms_upper": quantile(0.99) * 1000,
+        "max_ms_upper": quantile(1.0) * 1000,
+    }
+
+async def run_steps(args) -> list:
+    url = f"http://127.0.0.1:{args.api_port}"
+    steps = [int(x) for x in args.steps.split(",")]
+    results = []
+    async with make_client(url, max(steps)) as client:
+        users = await asyncio.gather(*[setup_user(client) for _ in range(max(steps))])
+        for c in steps:
+            before = read_loop_lag(url)
+            res = await run_step(client, users[:c], args.step_duration, args.mix, args.method, args.top_k)
+            res["event_loop_lag"] = lag_between(before, read_loop_lag(url))
+            print_step(res)
+            print(f"  loop_lag {res['event_loop_lag']}")
+            results.append(res)
+    return results
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--steps", default="1,4,8,16,32")
+    ap.add_argument("--step-duration", type=float, default=30.0)
+    ap.add_argument("--mix", type=parse_mix, default=default_mix)
+    ap.add_argument("--method", default="hybrid")
+    ap.add_argument("--top-k", type=int, default=4)
+    ap.add_argument("--workers", type=int, default=int(os.getenv("RETRIEVAL_WORKERS", "2")))
+    ap.add_argument("--api-port", type=int, default=8010)
+    ap.add_argument("--startup-timeout", type=float, default=300)
+    ap.add_argument("--mongod", default=shutil.which("mongod"), help="binary mongod lokal")
+    ap.add_argument("--mongo-port", type=int, default=27117)
+    ap.add_argument("--mongo-url", default=None, help="pakai mongo yang sudah jalan (skip mongod lokal)")
+    ap.add_argument("--groq-port", type=int, default=8100)
+    ap.add_argument("--groq-latency-ms", type=float, default=300)
+    ap.add_argument("--groq-tokens-per-sec", type=float, default=400)
+    ap.add_argument("--groq-completion-tokens", type=int, default=80)
+    ap.add_argument("--out", default=None)
+    args = ap.parse_args()
+
+    procs = []
+    dbpath = None
+    db_name = f"mlibbot_loadtest_{secrets.token_hex(4)}"
+    try:
+        if args.mongo_url:
+            mongo_url = args.mongo_url
+        else:
+            if not args.mongod:
+                raise SystemExit("mongod tidak ditemukan; pakai --mongod atau --mongo-url")
+            dbpath = tempfile.mkdtemp(prefix="mlibbot_mongo_")
+            procs.append(start_mongod(args.mongod, args.mongo_port, dbpath))
+            mongo_url = f"mongodb://127.0.0.1:{args.mongo_port}"
+
+        procs.append(start_mock_groq(args))
+        procs.append(start_api(args, mongo_url, db_name))
+
+        results = asyncio.run(run_steps(args))
+
+        report = {
+            "mix": args.mix,
+            "method": args.method,
+            "workers": args.workers,
+            "groq": {
+                "latency_ms": args.groq_latency_ms,
+                "tokens_per_sec": args.groq_tokens_per_sec,
+                "completion_tokens": args.groq_completion_tokens,
+            },
+            "steps": results,
+        }
+        if args.out:
+            Path(args.out).write_text(json.dumps(report, indent=2), encoding="utf-8")
+            print(f"[INFO] hasil disimpan: {args.out}")
+
+        if args.mongo_url:
+            # bersihkan db sementara di mongo eksternal
+            from pymongo import MongoClient
+            MongoClient(mongo_url).drop_database(db_name)
+    finally:
+        for p in reversed(procs):
+            p.terminate()
+            try:
+                p.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                p.kill()
+        if dbpath:
+            shutil.rmtree(dbpath, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Stand-in lokal untuk Groq (OpenAI-compatible /chat/completions).
+Latency = time-to-first-token + completion_tokens / token_rate.
+
+contoh:
+    python loadtest/mock_groq.py --port 8100 --latency-ms 300 --tokens-per-sec 400
+    GROQ_BASE_URL=http://127.0.0.1:8100/openai/v1 uvicorn main:app
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+
+app = FastAPI()
+
+# bisa di-set lewat CLI atau env (kalau dijalankan pakai uvicorn langsung)
+config = {
+    "latency_ms": float(os.getenv("MOCK_GROQ_LATENCY_MS", "300")),
+    "jitter_ms": float(os.getenv("MOCK_GROQ_JITTER_MS", "50")),
+    "tokens_per_sec": float(os.getenv("MOCK_GROQ_TOKENS_PER_SEC", "400")),
+    "completion_tokens": int(os.getenv("MOCK_GROQ_COMPLETION_TOKENS", "80")),
+}
+
+answer = (
+    "Perpustakaan buka Senin sampai Jumat pukul 08.00-16.00. "
+    "Untuk informasi lebih lanjut silakan hubungi pustakawan."
+)
+
+@app.post("/openai/v1/chat/completions")
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    prompt_chars = sum(len(m.get("content", "")) for m in body.get("messages", []))
+    # kira-kira 4 karakter per token
+    prompt_tokens = max(1, prompt_chars // 4)
+    completion_tokens = config["completion_tokens"]
+
+    delay = config["latency_ms"] + random.uniform(-config["jitter_ms"], config["jitter_ms"])
+    delay = max(0.0, delay) / 1000
+    if config["tokens_per_sec"] > 0:
+        delay += completion_tokens / config["tokens_per_sec"]
+    await asyncio.sleep(delay)
+
+    return {
+        "id": f"mock-{time.time_ns()}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "mock"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": answer},
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8100)
+    ap.add_argument("--latency-ms", type=float, default=config["latency_ms"])
+    ap.add_argument("--jitter-ms", type=float, default=config["jitter_ms"])
+    ap.add_argument("--tokens-per-sec", type=float, default=config["tokens_per_sec"])
+    ap.add_argument("--completion-tokens", type=int, default=config["completion_tokens"])
+    args = ap.parse_args()
+
+    config.update(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        tokens_per_sec=args.tokens_per_sec,
+        completion_tokens=args.completion_tokens,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
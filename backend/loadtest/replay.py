@@ -0,0 +1,190 @@
+"""
+Replay log query /chat (utils/query_log.py, QUERY_LOG=1) ke konfigurasi retrieval
+mana pun, urutan sama dengan log:
+- default in-process, deterministik: intent + retrieval persis seperti worker
+  (worker_pool.task_chat), konfigurasi lewat env (HYBRID_FUSION, SPELL_CORRECTION,
+  ENTITY_WEIGHT, INTENT_MODEL, INTENT_CACHE_SIZE, ...) dan --vector-dir
+- --url: kirim ke API yang sudah jalan (POST /test/retrieve), open-loop sesuai jadwal
+- --speed 1 = jarak antar query sama dengan aslinya, 10 = 10x lebih cepat, 0 = secepatnya;
+  jeda idle yang panjang dipotong ke --max-gap detik
+Query di log sudah lewat clean_query + sensor, jadi hasil replay bisa sedikit beda
+dari yang tercatat walau konfigurasinya sama.
+Laporan: latency, telat dari jadwal, rata-rata stage, hit rate cache intent, query
+berulang (batas atas hit rate cache per query), dan kesamaan hasil dengan yang tercatat
+di log (overlap id top-k, top-1 sama, intent sama).
+
+contoh:
+    python loadtest/replay.py --speed 0
+    HYBRID_FUSION=rrf python loadtest/replay.py --speed 10 --out eval/bench/replay_rrf.json
+    python loadtest/replay.py --url http://127.0.0.1:8000 --speed 5 --method bm25
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+loadtest_dir = Path(__file__).resolve().parent
+sys.path.insert(0, str(loadtest_dir.parent))
+
+from run import make_client, percentiles  # noqa: E402
+from utils import query_log  # noqa: E402
+
+def schedule(entries: list, speed: float, max_gap: float) -> list:
+    # detik sejak mulai replay, per entri
+    at = [0.0]
+    for prev, cur in zip(entries, entries[1:]):
+        gap = max(0.0, cur["ts"] - prev["ts"]) / speed if speed > 0 else 0.0
+        at.append(at[-1] + min(gap, max_gap))
+    return at
+
+def replay_local(entries: list, at: list, method: str, top_k: int, vector_dir: str) -> tuple:
+    from utils import intent, retriever, timing, worker_pool
+
+    retriever.load_indexes(Path(vector_dir) if vector_dir else retriever.vector_dir)
+    clf = intent.get_classifier()
+    results = []
+    t0 = time.perf_counter()
+    for e, due in zip(entries, at):
+        wait = t0 + due - time.perf_counter()
+        if wait > 0:
+            time.sleep(wait)
+        start = time.perf_counter()
+        with timing.collector() as t:
+            (label, *_), hits = worker_pool.task_chat(e["query"], method or e["method"], top_k or e["top_k"])
+        results.append({
+            "latency": time.perf_counter() - start,
+            "late": start - (t0 + due),
+            "stages": t["stages"],
+            "ids": [h.get("source_id") for h in hits],
+            "intent": label,
+        })
+    return results, {"intent_cache": clf.info(), "index": retriever.index_info()}
+
+def parse_server_timing(header: str) -> dict:
+    # "bm25;dur=3.2, faiss;dur=1.1" -> {nama: detik}
+    stages = {}
+    for part in filter(None, (p.strip() for p in (header or "").split(","))):
+        name, _, dur = part.partition(";dur=")
+        if dur:
+            stages[name] = float(dur) / 1000
+    return stages
+
+async def replay_http(url: str, entries: list, at: list, method: str, top_k: int, concurrency: int) -> tuple:
+    results = [None] * len(entries)
+    errors = 0
+
+    async def one(i, e, due, client, t0):
+        nonlocal errors
+        await asyncio.sleep(max(0.0, t0 + due - time.perf_counter()))
+        start = time.perf_counter()
+        try:
+            resp = await client.post("/test/retrieve", json={
+                "message": e["query"], "method": method or e["method"], "top_k": top_k or e["top_k"],
+            })
+            resp.raise_for_status()
+        except Exception:
+            errors += 1
+            return
+        results[i] = {
+            "latency": time.perf_counter() - start,
+            "late": start - (t0 + due),
+            "stages": parse_server_timing(resp.headers.get("server-timing")),
+            "ids": [h.get("source_id") for h in resp.json()["results"]],
+            "intent": None,
+        }
+
+    async with make_client(url, concurrency) as client:
+        t0 = time.perf_counter()
+        await asyncio.gather(*[one(i, e, due, client, t0) for i, (e, due) in enumerate(zip(entries, at))])
+    return results, {"errors": errors}
+
+def summarize(entries: list, results: list, elapsed: float, speed: float) -> dict:
+    pairs = [(e, r) for e, r in zip(entries, results) if r is not None]
+    n = len(pairs)
+    stages = {}
+    for _, r in pairs:
+        for name, sec in r["stages"].items():
+            stages[name] = stages.get(name, 0.0) + sec
+    logged = {}
+    for e, _ in pairs:
+        for name, ms in e.get("stages_ms", {}).items():
+            logged[name] = logged.get(name, 0.0) + ms
+
+    seen, repeats = set(), 0
+    overlap, top1, same_intent, n_intent = 0.0, 0, 0, 0
+    for e, r in pairs:
+        key = (e["query"], e["method"], e["top_k"])
+        repeats += key in seen
+        seen.add(key)
+        old = e.get("ids") or []
+        new = r["ids"][:len(old)]
+        if old:
+            overlap += len(set(old) & set(new)) / len(old)
+            top1 += bool(new) and new[0] == old[0]
+        if r["intent"] is not None:
+            n_intent += 1
+            same_intent += r["intent"] == e.get("intent")
+
+    with_ids = sum(1 for e, _ in pairs if e.get("ids"))
+    return {
+        "n": n,
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(n / elapsed, 2) if elapsed else None,
+        "latency": percentiles([r["latency"] for _, r in pairs]),
+        # speed 0 = semua query dijadwalkan di detik 0, telat nggak bermakna
+        "late": percentiles([max(0.0, r["late"]) for _, r in pairs]) if speed > 0 else None,
+        "stages_avg_ms": {k: round(v / n * 1000, 3) for k, v in stages.items()} if n else {},
+        "logged_stages_avg_ms": {k: round(v / n, 3) for k, v in logged.items()} if n else {},
+        "repeat_rate": round(repeats / n, 4) if n else 0.0,
+        "overlap_at_k": round(overlap / with_ids, 4) if with_ids else None,
+        "top1_same": round(top1 / with_ids, 4) if with_ids else None,
+        "intent_same": round(same_intent / n_intent, 4) if n_intent else None,
+    }
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--log", default=None, help="file / folder log (default QUERY_LOG_DIR)")
+    ap.add_argument("--limit", type=int, default=None)
+    ap.add_argument("--speed", type=float, default=1.0, help="1 = laju asli, 0 = secepatnya")
+    ap.add_argument("--max-gap", type=float, default=5.0, help="maks jeda antar query (detik, setelah --speed)")
+    ap.add_argument("--method", default=None, help="ganti method semua query (default: sesuai log)")
+    ap.add_argument("--top-k", type=int, default=None)
+    ap.add_argument("--vector-dir", default=None, help="root vectorstore / folder snapshot (mode in-process)")
+    ap.add_argument("--url", default=None, help="replay lewat HTTP ke API yang sudah jalan")
+    ap.add_argument("--concurrency", type=int, default=64, help="maks koneksi mode --url")
+    ap.add_argument("--out", default=None)
+    args = ap.parse_args()
+
+    entries = list(query_log.read_entries(args.log))
+    entries.sort(key=lambda e: e["ts"])
+    if args.limit:
+        entries = entries[:args.limit]
+    if not entries:
+        sys.exit(f"[WARN] log kosong: {args.log or query_log.log_dir}")
+    at = schedule(entries, args.speed, args.max_gap)
+    print(f"[INFO] {len(entries)} query, jadwal {at[-1]:.1f}s (speed {args.speed})")
+
+    t0 = time.perf_counter()
+    if args.url:
+        results, extra = asyncio.run(replay_http(args.url, entries, at, args.method, args.top_k, args.concurrency))
+    else:
+        results, extra = replay_local(entries, at, args.method, args.top_k, args.vector_dir)
+    report = {**summarize(entries, results, time.perf_counter() - t0, args.speed), **extra}
+
+    for key in ("n", "throughput_rps", "latency", "late", "repeat_rate", "overlap_at_k", "top1_same", "intent_same"):
+        print(f"  {key:16s} {report[key]}")
+    print(f"  {'stages_avg_ms':16s} {report['stages_avg_ms']}")
+    print(f"  {'log_stages_ms':16s} {report['logged_stages_avg_ms']}")
+    for key, value in extra.items():
+        print(f"  {key:16s} {value}")
+
+    if args.out:
+        out = Path(args.out)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"[INFO] hasil disimpan: {out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Load generator campuran /chat, /chat/sessions dan /auth/login ke server yang sudah jalan.
+
+contoh:
+    python loadtest/run.py --url http://127.0.0.1:8000 --concurrency 16 --duration 60
+    python loadtest/run.py --mix chat=0.6,sessions=0.3,login=0.1
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+
+import httpx
+import numpy as np
+
+chat_queries = [
+    "Jam layanan perpustakaan",
+    "Carikan buku natural language processing",
+    "Berapa denda keterlambatan pengembalian buku?",
+    "Perpustakaan maranatha itu letaknya dimana?",
+    "Bisa carikan buku machine learning terbitan 2020?",
+    "Bagaimana cara perpanjang pinjaman buku?",
+    "Email perpustakaan maranatha apa ya?",
+    "Ada buku tentang basis data di lantai berapa?",
+]
+
+default_mix = {"chat": 0.5, "sessions": 0.3, "login": 0.2}
+password = "loadtest-password"
+
+def parse_mix(s: str) -> dict:
+    mix = {}
+    for part in s.split(","):
+        name, w = part.split("=")
+        mix[name.strip()] = float(w)
+    return mix
+
+def percentiles(values):
+    if not values:
+        return {"n": 0}
+    arr = np.asarray(values) * 1000
+    return {
+        "n": len(values),
+        "p50_ms": round(float(np.percentile(arr, 50)), 1),
+        "p95_ms": round(float(np.percentile(arr, 95)), 1),
+        "p99_ms": round(float(np.percentile(arr, 99)), 1),
+        "max_ms": round(float(arr.max()), 1),
+    }
+
+async def setup_user(client: httpx.AsyncClient) -> dict:
+    # 1 virtual user = 1 akun + 1 session chat
+    email = f"loadtest_{uuid.uuid4().hex[:10]}@example.com"
+    await client.post("/auth/register", json={"fullName": "Load Test", "email": email, "password": password})
+    resp = await client.post("/auth/login", json={"email": email, "password": password})
+    resp.raise_for_status()
+    headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+    resp = await client.post("/chat/sessions", json={"title": None}, headers=headers)
+    resp.raise_for_status()
+    return {"email": email, "headers": headers, "session_id": resp.json()["id"]}
+
+async def do_request(client: httpx.AsyncClient, route: str, user: dict, method: str, top_k: int):
+    if route == "chat":
+        return await client.post("/chat", json={
+            "message": random.choice(chat_queries),
+            "session_id": user["session_id"],
+            "method": method,
+            "top_k": top_k,
+        })
+    if route == "sessions":
+        return await client.get("/chat/sessions", headers=user["headers"])
+    return await client.post("/auth/login", json={"email": user["email"], "password": password})
+
+async def user_loop(client, user, deadline, mix, method, top_k, latencies, errors):
+    routes = list(mix)
+    weights = [mix[r] for r in routes]
+    while time.perf_counter() < deadline:
+        route = random.choices(routes, weights)[0]
+        t0 = time.perf_counter()
+        try:
+            resp = await do_request(client, route, user, method, top_k)
+            ok = resp.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        dt = time.perf_counter() - t0
+        if ok:
+            latencies[route].append(dt)
+        else:
+            errors[route] += 1
+
+async def run_step(client: httpx.AsyncClient, users: list, duration: float, mix: dict,
+                   method: str = "hybrid", top_k: int = 4) -> dict:
+    latencies = {r: [] for r in mix}
+    errors = {r: 0 for r in mix}
+    t0 = time.perf_counter()
+    deadline = t0 + duration
+    await asyncio.gather(*[
+        user_loop(client, u, deadline, mix, method, top_k, latencies, errors)
+        for u in users
+    ])
+    elapsed = time.perf_counter() - t0
+
+    routes = {}
+    for r in mix:
+        stats = percentiles(latencies[r])
+        stats["rps"] = round(stats["n"] / elapsed, 2)
+        stats["errors"] = errors[r]
+        routes[r] = stats
+    total = sum(len(v) for v in latencies.values())
+    return {
+        "concurrency": len(users),
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(total / elapsed, 2),
+        "routes": routes,
+    }
+
+def make_client(url: str, concurrency: int) -> httpx.AsyncClient:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    return httpx.AsyncClient(base_url=url, timeout=120, limits=limits)
+
+def print_step(res: dict):
+    print(f"[INFO] concurrency={res['concurrency']} durasi={res['elapsed_s']}s throughput={res['throughput_rps']} rps")
+    for route, stats in res["routes"].items():
+        print(f"  {route:8s} {stats}")
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--url", default="http://127.0.0.1:8000")
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--duration", type=float, default=30.0)
+    ap.add_argument("--mix", type=parse_mix, default=default_mix)
+    ap.add_argument("--method", default="hybrid")
+    ap.add_argument("--top-k", type=int, default=4)
+    args = ap.parse_args()
+
+    async with make_client(args.url, args.concurrency) as client:
+        users = await asyncio.gather(*[setup_user(client) for _ in range(args.concurrency)])
+        res = await run_step(client, users, args.duration, args.mix, args.method, args.top_k)
+    print_step(res)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,33 +1,48 @@
+import asyncio
 import os
 from dotenv import load_dotenv
-import json
-from pathlib import Path
+from contextlib import nullcontext
 from datetime import datetime, timedelta
+from pathlib import Path
 from typing import Optional, List
 from bson import ObjectId
 
-import faiss 
-import numpy as np
-import joblib
-from sentence_transformers import SentenceTransformer
-
-from fastapi import FastAPI, HTTPException, status, Depends
+from fastapi import FastAPI, HTTPException, status, Depends, Header, Query, Request, Response
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordBearer
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field, EmailStr
 from motor.motor_asyncio import AsyncIOMotorClient
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 
 from utils.rag_pipeline import build_prompt, call_groq
-from utils.intent import predict_intent_conf
-from utils.preprocess import clean_query, tokenize_bm25
+from utils.preprocess import clean_query
+from utils.singleflight import SingleFlight
+from utils.availability import AvailabilityStore, store_file
+from utils.suggest_index import SuggestStore
+from utils.profiler import Profiler
+from utils import metrics, query_log, snapshot, timing, worker_pool
 
 load_dotenv()
 
 MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017")
 DB_NAME = os.getenv("DB_NAME", "mlibbot_db")
 SECRET_KEY = os.getenv("SECRET_KEY")
+# endpoint /admin/* mati kalau ADMIN_TOKEN kosong
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+# sama dengan utils.retriever.vector_dir (retriever nggak di-import di proses API)
+VECTOR_DIR = Path(__file__).resolve().parent / "vectorstore"
+# /intent/batch: maks pesan per request, dipecah per chunk ke worker pool
+INTENT_BATCH_MAX = int(os.getenv("INTENT_BATCH_MAX", "5000"))
+INTENT_BATCH_CHUNK = int(os.getenv("INTENT_BATCH_CHUNK", "500"))
+# status buku terbaru (data/refresh_availability.py), ditimpa ke hit saat query
+availability = AvailabilityStore(VECTOR_DIR / store_file)
+# index typeahead ikut snapshot aktif, di-load langsung di proses API (tanpa worker pool)
+suggest_store = SuggestStore(VECTOR_DIR)
+# sampling profiler /chat + /test/* dan watchdog event loop, nyala lewat POST /admin/profiler
+profiler = Profiler()
 
 if not SECRET_KEY:
     raise ValueError("No SECRET_KEY set for application")
@@ -35,19 +50,34 @@ if not SECRET_KEY:
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24
 
-base = Path(__file__).resolve().parent
-vector_dir = base / "vectorstore"
-indobert_model = "LazarusNLP/all-indobert-base-v4"
-bm25 = joblib.load(vector_dir / "bm25.pkl")
-indo_embeddings = np.load(vector_dir / "indo_embeddings.npy")
-faiss_indo_index = faiss.read_index(str(vector_dir / "faiss_indo.index"))
-embed_model = SentenceTransformer(indobert_model)
-
-with open(vector_dir / "docs.json", encoding="utf-8") as f:
-    docs = json.load(f)
-
 app = FastAPI()
 
+background_tasks = set()
+
+@app.on_event("startup")
+async def startup():
+    # model + index di-load di worker pool, bukan di event loop
+    await worker_pool.start_pool()
+    background_tasks.add(asyncio.create_task(metrics.monitor_loop_lag()))
+    background_tasks.add(asyncio.create_task(profiler.heartbeat()))
+    background_tasks.add(asyncio.create_task(reload_store(suggest_store)))
+    background_tasks.add(asyncio.create_task(reload_store(availability)))
+    query_log.start()
+
+async def reload_store(store):
+    # cek + load file (suggest.pkl, availability.json) di threadpool, biar event loop
+    # nggak ke-block selama file di-parse; request cuma baca dict yang sudah jadi
+    while True:
+        await run_in_threadpool(store.maybe_reload)
+        await asyncio.sleep(store.interval)
+
+@app.on_event("shutdown")
+def shutdown():
+    for task in background_tasks:
+        task.cancel()
+    worker_pool.stop_pool()
+    query_log.stop()
+
 client = AsyncIOMotorClient(MONGO_URL)
 db = client[DB_NAME]
 users_collection = db["users"]
@@ -61,6 +91,28 @@ origins = [
     os.getenv("FRONTEND_URL", ""),
 ]
 
+@app.middleware("http")
+async def stage_timing(request: Request, call_next):
+    # tiap request punya collector sendiri; stage di worker di-merge lewat worker_pool.run
+    pid = profiler.begin(request.url.path)
+    status_code = 500
+    try:
+        with timing.collector() as t:
+            with timing.stage("total"):
+                response = await call_next(request)
+        status_code = response.status_code
+    finally:
+        if pid is not None:
+            profiler.end(pid, request.method, request.url.path, status_code, t)
+
+    route = request.scope.get("route")
+    metrics.request_seconds.labels(
+        request.method, route.path if route else "unmatched", response.status_code
+    ).observe(t["stages"]["total"])
+    metrics.observe(t)
+    response.headers["Server-Timing"] = metrics.server_timing(t)
+    return response
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -99,6 +151,19 @@ class PasswordUpdate(BaseModel):
 class IntentRequest(BaseModel):
     message: str
 
+class IntentBatchRequest(BaseModel):
+    messages: List[str]
+    # proba semua label per pesan (payload jauh lebih besar)
+    include_proba: bool = False
+
+class ProfilerConfig(BaseModel):
+    # field yang nggak dikirim tetap pakai nilai sekarang
+    enabled: Optional[bool] = None
+    sample_rate: Optional[float] = Field(None, ge=0, le=1)
+    interval_ms: Optional[float] = Field(None, ge=1, le=100)
+    keep: Optional[int] = Field(None, ge=1, le=200)
+    block_threshold_ms: Optional[float] = Field(None, ge=10)
+
 class ChatRequest(BaseModel):
     message: str
     session_id: Optional[str] = None
@@ -161,7 +226,7 @@ async def register(user: UserRegister):
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await run_in_threadpool(get_password_hash, user.password)
     
     new_user = {
         "fullName": user.fullName,
@@ -183,7 +248,7 @@ async def login(user: UserLogin):
     if not db_user:
         raise HTTPException(status_code=400, detail="Invalid email or password")
     
-    if not verify_password(user.password, db_user["password"]):
+    if not await run_in_threadpool(verify_password, user.password, db_user["password"]):
         raise HTTPException(status_code=400, detail="Invalid email or password")
     
     access_token = create_access_token(data={"sub": db_user["email"]})
@@ -237,10 +302,10 @@ async def update_password(
     if not user_db:
         raise HTTPException(status_code=404, detail="User not found")
 
-    if not verify_password(pwd_data.current_password, user_db["password"]):
+    if not await run_in_threadpool(verify_password, pwd_data.current_password, user_db["password"]):
         raise HTTPException(status_code=400, detail="Incorrect current password")
 
-    new_hashed_password = get_password_hash(pwd_data.new_password)
+    new_hashed_password = await run_in_threadpool(get_password_hash, pwd_data.new_password)
     
     await users_collection.update_one(
         {"_id": ObjectId(user_id)},
@@ -377,130 +442,15 @@ async def update_session_title(
     
     return {"message": "Title updated successfully"}
 
-def _dedupe_key(hit: dict) -> str:
-    if hit.get("source") == "catalog":
-        # satu buku = satu parent_id
-        if hit.get("parent_id"):
-            return str(hit["parent_id"])
-        # fallback kalau parent_id kosong: potong s0/s1
-        return str(hit.get("source_id", "")).split("_s")[0]
-
-    # pdf: per chunk unik
-    return f'{hit.get("source")}::{hit.get("source_id")}'
-
-def dedupe(hits: list, top_k: int) -> list:
-    seen = set()
-    out = []
-    for h in hits:
-        key = _dedupe_key(h)
-        if key in seen:
-            continue
-        seen.add(key)
-        out.append(h)
-        if len(out) >= top_k:
-            break
-    return out
-
-def retrieve_bm25(query: str, top_k: int):
-    pool = 16
-
-    tokens = tokenize_bm25(query)
-    scores = bm25.get_scores(tokens)
-    idxs = np.argsort(scores)[::-1][:pool]  
-
-    results = []
-    for i in idxs:
-        doc = docs[int(i)]
-        results.append({
-            "text": doc["text"],
-            "source": doc["source"],
-            "source_id": doc["source_id"],
-            "parent_id": doc.get("parent_id"), 
-            "score": float(scores[i]),
-        })
-
-    return dedupe(results, top_k)
-
-def retrieve_faiss(query: str, top_k: int):
-    pool = 16
-
-    q = clean_query(query)
-    q_emb = embed_model.encode([q], convert_to_numpy=True, normalize_embeddings=True).astype(np.float32)
-
-    scores, idxs = faiss_indo_index.search(q_emb, pool) 
-    scores = scores[0]
-    idxs = idxs[0]
-
-    results = []
-    for score, i in zip(scores, idxs):
-        if int(i) < 0:
-            continue
-        doc = docs[int(i)]
-        results.append({
-            "text": doc["text"],
-            "source": doc["source"],
-            "source_id": doc["source_id"],
-            "parent_id": doc.get("parent_id"), 
-            "score": float(score),
-        })
-
-    return dedupe(results, top_k)
-
-
-# # hybrid faiss search 
-def retrieve_hybrid(query: str, top_k: int, alpha: float = 0.5, pool_mul: int = 10, pool_min: int = 40):
-    pool = max(top_k * pool_mul, pool_min)
-
-    # BM25 scores untuk docs
-    tokens = tokenize_bm25(query)
-    bm25_scores_all = bm25.get_scores(tokens) 
-    bm25_top_idxs = np.argsort(bm25_scores_all)[::-1][:pool]
-
-    # FAISS search (semantic) untuk top pool
-    q = clean_query(query)
-    q_emb = embed_model.encode([q], convert_to_numpy=True, normalize_embeddings=True).astype(np.float32)
-
-    faiss_scores, faiss_idxs = faiss_indo_index.search(q_emb, pool)
-    faiss_scores = faiss_scores[0]
-    faiss_idxs = faiss_idxs[0]
-    default_faiss = float(faiss_scores.min()) if len(faiss_scores) else 0.0
-
-    # map: idx - score
-    faiss_score_map = {int(i): float(s) for i, s in zip(faiss_idxs, faiss_scores) if int(i) >= 0}
-    # union kandidat
-    candidate_idxs = list(set(map(int, bm25_top_idxs)) | set(faiss_score_map.keys()))
-    # ambil skor untuk kandidat aja
-    bm25_cand = np.array([float(bm25_scores_all[i]) for i in candidate_idxs], dtype=np.float32)
-    faiss_cand = np.array([float(faiss_score_map.get(i, default_faiss)) for i in candidate_idxs], dtype=np.float32)
-    # normalisasi
-    def norm(x: np.ndarray) -> np.ndarray:
-        x_min = float(x.min()) if len(x) else 0.0
-        x_max = float(x.max()) if len(x) else 0.0
-        if x_max - x_min < 1e-9:
-            return np.zeros_like(x)
-        return (x - x_min) / (x_max - x_min)
-
-    bm25_n = norm(bm25_cand)
-    faiss_n = norm(faiss_cand)
-
-    hybrid = alpha * bm25_n + (1.0 - alpha) * faiss_n
-
-    order = np.argsort(hybrid)[::-1]
-
-    results = []
-    for rank_pos in order:
-        i = candidate_idxs[int(rank_pos)]
-        doc = docs[i]
-        results.append({
-            "text": doc.get("text"),
-            "source": doc.get("source"),
-            "source_id": doc.get("source_id"),
-            "parent_id": doc.get("parent_id"),
-            "score_bm25": float(bm25_scores_all[i]),
-            "score_faiss": float(faiss_score_map.get(i, default_faiss)),
-            "score_hybrid": float(hybrid[int(rank_pos)]),
-        })
-    return dedupe(results, top_k)
+async def run_retrieval(fn, *args):
+    try:
+        return await worker_pool.run(fn, *args)
+    except worker_pool.RetrievalTimeout:
+        raise HTTPException(status_code=504, detail="Retrieval timeout")
+
+def fresh_hits(hits: list) -> list:
+    with timing.stage("availability"):
+        return availability.apply(hits)
 
 @app.get("/")
 def root():
@@ -515,12 +465,54 @@ def health():
     return {
         "status": "ok",
         "vector_db": "bm25 + indoBERT+faiss",
-        "docs_count": len(docs),
+        "docs_count": worker_pool.docs_count,
+        "chat_coalescing": chat_flight.stats(),
+    }
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not ADMIN_TOKEN or x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+@app.get("/admin/index", dependencies=[Depends(require_admin)])
+async def admin_index():
+    # 1 sampel worker; worker lain swap sendiri dalam INDEX_RELOAD_INTERVAL
+    served = await run_retrieval(worker_pool.task_index_info)
+    return {
+        "current": snapshot.current_version(VECTOR_DIR),
+        "served": served,
+        "availability": availability.info(),
     }
 
+@app.get("/admin/profiler", dependencies=[Depends(require_admin)])
+def admin_profiler():
+    return profiler.info()
+
+@app.post("/admin/profiler", dependencies=[Depends(require_admin)])
+def admin_profiler_config(req: ProfilerConfig):
+    profiler.configure(**req.model_dump())
+    return profiler.info()
+
+@app.delete("/admin/profiler", dependencies=[Depends(require_admin)])
+def admin_profiler_clear():
+    profiler.clear()
+    return profiler.info()
+
+@app.get("/admin/profiler/profiles/{profile_id}", dependencies=[Depends(require_admin)])
+def admin_profile(profile_id: int):
+    # collapsed stack, langsung: flamegraph.pl profile.txt > profile.svg (atau buka di speedscope)
+    record = profiler.profile(profile_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Profile tidak ada")
+    return PlainTextResponse(record["collapsed"])
+
+@app.get("/metrics")
+def prometheus_metrics():
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
 @app.post("/test/intent")
-def test_intent(req: IntentRequest):
-    label, score, percent, proba = predict_intent_conf(req.message)
+async def test_intent(req: IntentRequest):
+    label, score, percent, proba = await run_retrieval(worker_pool.task_intent, req.message)
     return {
         "message": req.message,
         "intent": label,
@@ -529,55 +521,127 @@ def test_intent(req: IntentRequest):
         "proba": proba
     }
 
+@app.post("/intent/batch", dependencies=[Depends(require_admin)])
+async def intent_batch(req: IntentBatchRequest):
+    # buat job analitik (klasifikasi log query), 1 predict per chunk
+    if len(req.messages) > INTENT_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"Maksimal {INTENT_BATCH_MAX} pesan per request")
+
+    chunks = [req.messages[i:i + INTENT_BATCH_CHUNK] for i in range(0, len(req.messages), INTENT_BATCH_CHUNK)]
+    parts = await asyncio.gather(*[run_retrieval(worker_pool.task_intent_batch, c) for c in chunks])
+
+    results, counts = [], {}
+    for message, (label, score, percent, proba) in zip(req.messages, (r for part in parts for r in part)):
+        item = {"message": message, "intent": label, "confidence": score, "confidence_percent": percent}
+        if req.include_proba:
+            item["proba"] = proba
+        results.append(item)
+        counts[label] = counts.get(label, 0) + 1
+    return {"count": len(results), "intents": counts, "results": results}
+
+@app.get("/catalog/search")
+async def catalog_search(
+    q: Optional[str] = None,
+    language: Optional[List[str]] = Query(None),
+    floor: Optional[List[str]] = Query(None),
+    status: Optional[List[str]] = Query(None),
+    keyword: Optional[List[str]] = Query(None),
+    publisher: Optional[List[str]] = Query(None),
+    author: Optional[List[str]] = Query(None),
+    year: Optional[List[str]] = Query(None),
+    year_min: Optional[int] = None,
+    year_max: Optional[int] = None,
+    sort: str = Query("relevance", pattern="^(relevance|year_desc|year_asc|title)$"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    facet_limit: int = Query(20, ge=0, le=200),
+):
+    # lookup katalog langsung dari index (tanpa retrieval hybrid / LLM), bisa dipanggil frontend
+    params = {
+        "q": q,
+        "filters": {
+            "language": language, "floor": floor, "status": status, "keyword": keyword,
+            "publisher": publisher, "author": author, "year": year,
+        },
+        "year_min": year_min,
+        "year_max": year_max,
+        "sort": sort,
+        "page": page,
+        "page_size": page_size,
+        "facet_limit": facet_limit,
+    }
+    result = await run_retrieval(worker_pool.task_catalog_search, params)
+    if result is None:
+        raise HTTPException(status_code=503, detail="Index katalog belum ada, jalankan ingest.py")
+    return {"query": q, **result}
+
+@app.get("/suggest")
+async def suggest(
+    q: str = Query(..., max_length=200),
+    limit: int = Query(8, ge=1, le=10),
+    kind: Optional[List[str]] = Query(None),
+):
+    # typeahead: cuma lookup dict / bisect (< 1ms), jadi langsung di event loop
+    with timing.stage("suggest"):
+        results = suggest_store.suggest(q, limit, set(kind) if kind else None)
+    if results is None:
+        raise HTTPException(status_code=503, detail="Index suggest belum ada, jalankan ingest.py")
+    return {"query": q, "results": results}
+
 @app.post("/test/retrieve")
-def test_retrieve(req: ChatRequest):
-    if req.method == "bm25":
-        hits = retrieve_bm25(req.message, req.top_k)
-    elif req.method == "faiss":
-        hits = retrieve_faiss(req.message, req.top_k)
-    else:  # "hybrid"
-        hits = retrieve_hybrid(req.message, req.top_k)
-    return {"query": req.message, "results": hits}
+async def test_retrieve(req: ChatRequest):
+    hits = await run_retrieval(worker_pool.task_retrieve, req.message, req.method, req.top_k)
+    return {"query": req.message, "results": fresh_hits(hits)}
 
 @app.post("/test/compare")
-def test_compare(req: ChatRequest):
-    bm25_hits = retrieve_bm25(req.message, req.top_k)
-    faiss_hits = retrieve_faiss(req.message, req.top_k)
-    hybrid_hits = retrieve_hybrid(req.message, req.top_k)
+async def test_compare(req: ChatRequest):
+    bm25_hits, faiss_hits, hybrid_hits = await run_retrieval(worker_pool.task_compare, req.message, req.top_k)
 
     return {
         "query": req.message,
-        "bm25": bm25_hits,
-        "faiss_indobert": faiss_hits,
-        "hybrid": hybrid_hits,
+        "bm25": fresh_hits(bm25_hits),
+        "faiss_indobert": fresh_hits(faiss_hits),
+        "hybrid": fresh_hits(hybrid_hits),
     }
 
 @app.post("/test/prompt")
-def test_prompt(req: ChatRequest):
+async def test_prompt(req: ChatRequest):
     # ambil contexts sesuai method
-    if req.method == "bm25":
-        contexts = retrieve_bm25(req.message, req.top_k)
-    elif req.method == "faiss":
-        contexts = retrieve_faiss(req.message, req.top_k)
-    else:
-        contexts = retrieve_hybrid(req.message, req.top_k)
+    contexts = fresh_hits(await run_retrieval(worker_pool.task_retrieve, req.message, req.method, req.top_k))
     prompt = build_prompt(req.message, contexts)
     return {"query": req.message, "method": req.method, "prompt": prompt, "contexts": contexts}
 
-@app.post("/chat")
-async def chat(req: ChatRequest):
-    label, score, percent, proba = predict_intent_conf(req.message)
+chat_flight = SingleFlight()
+metrics.track_singleflight(chat_flight, "chat")
 
-    if req.method == "bm25":
-        contexts = retrieve_bm25(req.message, req.top_k)
-    elif req.method == "faiss":
-        contexts = retrieve_faiss(req.message, req.top_k)
-    else:  # hybrid
-        contexts = retrieve_hybrid(req.message, req.top_k)
+async def answer_chat(message: str, method: str, top_k: int):
+    # intent + retrieval di worker pool, call groq (blocking I/O) di threadpool.
+    # stage dicatat di collector sendiri, lalu di-merge ke semua pemanggil (leader + follower)
+    with timing.collector() as t:
+        intent, contexts = await run_retrieval(worker_pool.task_chat, message, method, top_k)
+        contexts = fresh_hits(contexts)
 
-    prompt = build_prompt(req.message, contexts)
-    answer = call_groq(prompt)
+        prompt = build_prompt(message, contexts)
+        answer = await run_in_threadpool(call_groq, prompt)
+    return intent, contexts, answer, t
 
+@app.post("/chat")
+async def chat(req: ChatRequest):
+    # pertanyaan identik yang datang bersamaan cukup diproses sekali
+    key = (clean_query(req.message), req.method, req.top_k)
+    # follower: lama nunggu hasil leader dicatat sebagai stage "coalesced"
+    follower = chat_flight.inflight(key)
+    with timing.stage("coalesced") if follower else nullcontext():
+        (label, score, percent, proba), contexts, answer, shared = await chat_flight.do(
+            key, lambda: answer_chat(req.message, req.method, req.top_k)
+        )
+    # follower cuma pinjam stage leader: tetap tampil di Server-Timing / query log,
+    # tapi nggak masuk histogram Prometheus lagi
+    timing.merge(shared, borrowed=follower)
+    # opt-in (QUERY_LOG=1), cuma masuk queue; isi sudah disensor, tanpa session / user
+    query_log.log_chat(req.message, req.method, req.top_k, (label, score), contexts, timing.current())
+
+    # simpan ke session tetap per pemanggil
     if req.session_id:
         now = datetime.utcnow()
         user_msg = {
@@ -597,7 +661,8 @@ async def chat(req: ChatRequest):
             }
         }
         
-        session = await chat_sessions_collection.find_one({"_id": ObjectId(req.session_id)})
+        with timing.stage("mongo"):
+            session = await chat_sessions_collection.find_one({"_id": ObjectId(req.session_id)})
         update_data = {
             "$push": {"messages": {"$each": [user_msg, bot_msg]}},
             "$set": {"updated_at": now}
@@ -607,10 +672,11 @@ async def chat(req: ChatRequest):
             auto_title = req.message[:30] + ("..." if len(req.message) > 30 else "")
             update_data["$set"]["title"] = auto_title
         
-        await chat_sessions_collection.update_one(
-            {"_id": ObjectId(req.session_id)},
-            update_data
-        )
+        with timing.stage("mongo"):
+            await chat_sessions_collection.update_one(
+                {"_id": ObjectId(req.session_id)},
+                update_data
+            )
 
     return {
         "answer": answer,
@@ -0,0 +1,8 @@
+import os
+import sys
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+# main.py wajib punya SECRET_KEY waktu di-import
+os.environ.setdefault("SECRET_KEY", "test")
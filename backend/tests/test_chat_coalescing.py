@@ -0,0 +1,68 @@
+"""
+/chat single-flight: pertanyaan identik yang datang bersamaan cuma dieksekusi sekali,
+dan histogram Prometheus (stage groq, token LLM) cuma bertambah sebanyak eksekusi
+yang benar-benar jalan, bukan sebanyak request (follower nggak ikut observe).
+"""
+import asyncio
+import threading
+import time
+
+import httpx
+from prometheus_client import REGISTRY
+
+import main
+from utils import rag_pipeline
+
+n_requests = 8
+
+def histogram_count(name: str, labels: dict) -> float:
+    return REGISTRY.get_sample_value(f"{name}_count", labels) or 0.0
+
+def counts() -> tuple:
+    return (
+        histogram_count("mlibbot_stage_seconds", {"stage": "groq"}),
+        histogram_count("mlibbot_llm_tokens", {"kind": "prompt"}),
+        histogram_count("mlibbot_llm_tokens", {"kind": "completion"}),
+    )
+
+def test_concurrent_identical_chat_observed_once(monkeypatch):
+    executed = []
+    lock = threading.Lock()
+
+    class FakeResponse:
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return {"choices": [{"message": {"content": "ok"}}], "usage": {"prompt_tokens": 100, "completion_tokens": 10}}
+
+    def fake_post(url, json=None, headers=None, timeout=None):
+        with lock:
+            executed.append(url)
+        # cukup lama supaya request lain sempat jadi follower
+        time.sleep(0.3)
+        return FakeResponse()
+
+    async def fake_retrieval(fn, *args):
+        return ("jam_layanan", 0.9, 90.0, {}), []
+
+    monkeypatch.setattr(rag_pipeline, "groq_api_key", "test")
+    monkeypatch.setattr(rag_pipeline.requests, "post", fake_post)
+    monkeypatch.setattr(main, "run_retrieval", fake_retrieval)
+
+    async def fire() -> list:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            body = {"message": "jam buka perpustakaan?", "method": "hybrid", "top_k": 4}
+            return await asyncio.gather(*(client.post("/chat", json=body) for _ in range(n_requests)))
+
+    before = counts()
+    responses = asyncio.run(fire())
+    after = counts()
+
+    assert all(r.status_code == 200 for r in responses)
+    # coalescing benar-benar terjadi
+    assert 1 <= len(executed) < n_requests
+    assert [a - b for a, b in zip(after, before)] == [len(executed)] * 3
+    # follower tetap dapat stage leader di Server-Timing
+    assert all("groq" in r.headers["server-timing"] for r in responses)
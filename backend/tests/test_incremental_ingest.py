@@ -0,0 +1,112 @@
+"""
+Incremental ingest (tambah / ubah / hapus dokumen sumber) harus identik dengan
+full rebuild: statistik BM25 (idf, nd, doc_len) dan vektor di IndexIDMap2.
+Korpus sintetis + encoder hash kecil, jadi nggak butuh model IndoBERT / data asli.
+"""
+import copy
+import hashlib
+
+import numpy as np
+import pytest
+
+import ingest
+
+dim = 16
+
+class HashEncoder:
+    # pengganti SentenceTransformer: bag-of-words di-hash ke `dim` dimensi
+    def encode(self, texts, batch_size=32, convert_to_numpy=True, show_progress_bar=False,
+               normalize_embeddings=True):
+        out = np.zeros((len(texts), dim), dtype=np.float32)
+        for i, t in enumerate(texts):
+            for w in t.lower().split():
+                out[i, int(hashlib.md5(w.encode()).hexdigest(), 16) % dim] += 1.0
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        return out / np.where(norms > 0, norms, 1.0)
+
+words = (
+    "buku perpustakaan jam layanan denda pinjam kembali katalog jurnal skripsi "
+    "python jaringan komputer basis data statistik ekonomi hukum desain"
+).split()
+
+def make_corpus(n_groups: int, seed: int = 0) -> dict:
+    # doc_key -> list teks chunk
+    rng = np.random.default_rng(seed)
+    corpus = {}
+    for g in range(n_groups):
+        corpus[f"cat::{g}"] = [
+            " ".join(rng.choice(words, size=rng.integers(3, 12))) + f" nomor {g} bagian {c}"
+            for c in range(rng.integers(1, 4))
+        ]
+    # dua grup dengan chunk yang hampir sama (jalur near-duplicate)
+    corpus["pdf::p1"] = ["jam layanan perpustakaan senin sampai jumat pukul 08.00 sampai 16.00 kecuali hari libur"]
+    corpus["pdf::p2"] = ["jam layanan perpustakaan senin sampai jumat pukul 08.00 sampai 16.00 kecuali hari libur nasional"]
+    return corpus
+
+def to_docs(corpus: dict) -> list:
+    return [
+        {"doc_key": key, "source": key.split("::")[0], "source_id": f"{key}_c{i}", "parent_id": key, "text": text}
+        for key, chunks in corpus.items()
+        for i, text in enumerate(chunks)
+    ]
+
+def encoder() -> ingest.LazyEncoder:
+    return ingest.LazyEncoder(model=HashEncoder())
+
+def build_full(corpus: dict) -> dict:
+    return ingest.full_build(to_docs(corpus), encoder())
+
+def build_incremental(corpus: dict, prev: dict) -> dict:
+    store, _ = ingest.incremental_build(to_docs(corpus), prev, encoder())
+    return store
+
+def assert_same(incr: dict, full: dict):
+    key = lambda d: (d["doc_key"], d["source_id"])  # noqa: E731
+    pos_i = {key(d): p for p, d in enumerate(incr["docs"])}
+    pos_f = {key(d): p for p, d in enumerate(full["docs"])}
+    assert pos_i.keys() == pos_f.keys()
+    order = list(pos_f)
+
+    bi, bf = incr["bm25"], full["bm25"]
+    assert bi.nd == bf.nd
+    assert bi.idf == pytest.approx(bf.idf, rel=1e-12, abs=1e-12)
+    assert [bi.doc_len[pos_i[k]] for k in order] == [bf.doc_len[pos_f[k]] for k in order]
+    assert bi.avgdl == pytest.approx(bf.avgdl)
+
+    assert incr["faiss"].ntotal == full["faiss"].ntotal
+    vec_i = np.stack([incr["faiss"].reconstruct(int(incr["docs"][pos_i[k]]["doc_id"])) for k in order])
+    vec_f = np.stack([full["faiss"].reconstruct(int(full["docs"][pos_f[k]]["doc_id"])) for k in order])
+    np.testing.assert_allclose(vec_i, vec_f, atol=1e-6)
+
+    ingest.verify(incr, full, ["buku python", "jam layanan perpustakaan", "denda pinjam nomor 3", "tidak ada"])
+
+def test_incremental_matches_full_rebuild():
+    corpus = make_corpus(30)
+    store = build_full(corpus)
+
+    steps = []
+    # tambah grup baru
+    added = dict(corpus)
+    added["cat::baru"] = ["buku baru tentang python dan basis data", "bab dua statistik"]
+    steps.append(added)
+    # ubah isi grup yang sudah ada (jumlah chunk juga berubah)
+    modified = copy.deepcopy(added)
+    modified["cat::3"] = ["judul diganti hukum ekonomi"]
+    modified["cat::7"] = modified["cat::7"] + ["chunk tambahan desain jaringan komputer"]
+    steps.append(modified)
+    # hapus grup, termasuk salah satu pasangan near-duplicate
+    deleted = {k: v for k, v in modified.items() if k not in ("cat::0", "cat::baru", "pdf::p1")}
+    steps.append(deleted)
+
+    for corpus in steps:
+        store = build_incremental(corpus, store)
+        assert_same(store, build_full(corpus))
+
+def test_unchanged_corpus_encodes_nothing():
+    corpus = make_corpus(10, seed=1)
+    prev = build_full(corpus)
+    enc = encoder()
+    store, stats = ingest.incremental_build(to_docs(corpus), prev, enc)
+    assert stats["chunks_added"] == 0 and stats["chunks_removed"] == 0
+    assert enc.encoded == 0
+    assert_same(store, build_full(corpus))
@@ -0,0 +1,75 @@
+"""
+MinHash (utils/minhash.py): signature = min (a*x + b) mod (2^61 - 1) yang exact
+(tanpa overflow uint64), estimasi Jaccard-nya tidak bias, dan recall LSH untuk
+pasangan di atas threshold sesuai 1 - (1 - s^rows)^bands.
+"""
+import random
+import zlib
+
+import numpy as np
+
+from utils.minhash import NearDupIndex, jaccard, shingles
+
+mersenne = (1 << 61) - 1
+
+def exact_signature(ix: NearDupIndex, sh: set) -> list:
+    # versi integer Python (presisi tak terbatas) sebagai acuan
+    hv = [zlib.crc32(s.encode("utf-8")) for s in sh]
+    return [min(((int(a) * x + int(b)) % mersenne) & 0xFFFFFFFF for x in hv) for a, b in zip(ix.a, ix.b)]
+
+def random_text(rng: random.Random, n: int) -> str:
+    return " ".join(f"kata{rng.randrange(5000)}" for _ in range(n))
+
+def mutate(rng: random.Random, text: str, edits: int) -> str:
+    words = text.split()
+    for _ in range(edits):
+        words[rng.randrange(len(words))] = f"ganti{rng.randrange(10**6)}"
+    return " ".join(words)
+
+def test_signature_is_exact_universal_hash():
+    ix = NearDupIndex()
+    assert int(ix.a.max()) < 1 << 32 and int(ix.b.max()) < 1 << 32
+    rng = random.Random(0)
+    for _ in range(50):
+        sh = shingles(random_text(rng, rng.randint(1, 60)))
+        assert ix.signature(sh).tolist() == exact_signature(ix, sh)
+
+def test_signature_estimates_jaccard():
+    ix = NearDupIndex(num_perm=256, bands=16)
+    rng = random.Random(1)
+    errors = []
+    for _ in range(200):
+        a = random_text(rng, 80)
+        b = mutate(rng, a, rng.randint(1, 30))
+        sa, sb = shingles(a), shingles(b)
+        agree = float(np.mean(ix.signature(sa) == ix.signature(sb)))
+        errors.append(agree - jaccard(sa, sb))
+    # std error 1 estimasi ~ sqrt(J(1-J)/256) <= 0.031
+    assert abs(np.mean(errors)) < 0.01
+    assert np.max(np.abs(errors)) < 0.15
+
+def test_lsh_recall_above_threshold():
+    rng = random.Random(2)
+    found = total = 0
+    for i in range(300):
+        ix = NearDupIndex(threshold=0.9)
+        a = random_text(rng, 200)
+        b = mutate(rng, a, 1)
+        if jaccard(shingles(a), shingles(b)) < 0.9:
+            continue
+        ix.find_or_add("a", a)
+        found += ix.find_or_add("b", b) == "a"
+        total += 1
+    # s >= 0.9, rows 4, bands 16: peluang jadi kandidat >= 1 - (1 - 0.9^4)^16 ~ 0.99999
+    assert total > 200
+    assert found == total
+
+def test_no_merge_below_threshold():
+    rng = random.Random(3)
+    ix = NearDupIndex(threshold=0.9)
+    for i in range(200):
+        a = random_text(rng, 40)
+        assert ix.find_or_add(("a", i), a) is None
+        b = mutate(rng, a, 4)
+        if jaccard(shingles(a), shingles(b)) < 0.9:
+            assert ix.find_or_add(("b", i), b) is None
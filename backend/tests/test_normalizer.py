@@ -0,0 +1,39 @@
+"""
+Normalizer terkompilasi (utils/preprocess.py) harus sama persis dengan versi lama
+(eval/bench_normalizer.py) untuk kamus yang sama.
+"""
+import json
+import sys
+
+import pytest
+
+from conftest import backend_dir
+
+sys.path.insert(0, str(backend_dir / "eval"))
+import bench_normalizer  # noqa: E402
+from utils import preprocess  # noqa: E402
+
+replacements = json.loads(preprocess.replacements_file.read_text(encoding="utf-8"))["replacements"]
+legacy_clean_query = bench_normalizer.make_legacy_clean_query(replacements)
+
+cases = [
+    "",
+    "Jam   BUKA perpus??",
+    "buku e-book\r\nbahasa-\n indonesia",
+    "“kutipan” – dash … titik\x01kontrol\ttab",
+    "haloooo miiin, no telp perpus berapa",
+    "ISBN 978-623-02-0819-5 / app  android",
+]
+
+@pytest.fixture(scope="module")
+def corpus() -> list:
+    return cases + bench_normalizer.real_corpus(pdf_pages=0) + bench_normalizer.random_corpus(replacements, 5000)
+
+@pytest.mark.parametrize("name", ["clean_text", "clean_query"])
+def test_matches_legacy(corpus, name):
+    new, old = {
+        "clean_text": (preprocess.clean_text, bench_normalizer.legacy_cleanup_base),
+        "clean_query": (preprocess.clean_query, legacy_clean_query),
+    }[name]
+    mismatches = [t for t in corpus if new(t) != old(t)]
+    assert not mismatches, f"{len(mismatches)} beda, contoh: {mismatches[:3]!r}"
@@ -0,0 +1,65 @@
+"""
+/chat dengan INTENT_MODEL=logreg_indobert: intent dan FAISS memakai teks encoder
+yang sama (preprocess.embed_text), jadi 1 pesan cuma 1x encode IndoBERT.
+Encoder + head logreg diganti fake kecil, nggak butuh model / index asli.
+"""
+import numpy as np
+import pytest
+
+from utils import intent, retriever, worker_pool
+
+dim = 8
+
+class CountingModel:
+    # pengganti SentenceTransformer, mencatat teks yang di-encode
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, convert_to_numpy=True, normalize_embeddings=True):
+        self.calls.append(list(texts))
+        out = np.zeros((len(texts), dim), dtype=np.float32)
+        for i, t in enumerate(texts):
+            out[i, len(t) % dim] = 1.0
+        return out
+
+class FakeHead:
+    def predict_proba(self, X):
+        return np.tile([0.8, 0.2], (len(X), 1))
+
+class FakePipeline:
+    classes_ = ["jam_layanan", "lainnya"]
+
+    def __init__(self):
+        self.named_steps = {"indobert": intent.IndoBertEncoder(), "clf": FakeHead()}
+        self.steps = list(self.named_steps.items())
+
+@pytest.fixture
+def model(monkeypatch):
+    m = CountingModel()
+    monkeypatch.setattr(retriever, "get_embed_model", lambda: m)
+    monkeypatch.setattr(intent, "_classifier", intent.IntentClassifier(FakePipeline()))
+
+    def fake_retrieve(query, method, top_k, q_emb=None):
+        # kontrak retrieve_faiss / retrieve_hybrid: encode sendiri kalau q_emb kosong
+        if method != "bm25" and q_emb is None:
+            q_emb = retriever.encode_query(query)
+        return []
+
+    monkeypatch.setattr(retriever, "retrieve", fake_retrieve)
+    return m
+
+@pytest.mark.parametrize("message", [
+    "jam buka perpustakaan?",
+    "Jam buka PERPUS hari sabtu??",
+    "cara pinjam e-book, lihat www.maranatha.edu",
+])
+@pytest.mark.parametrize("method", ["hybrid", "faiss", "bm25"])
+def test_chat_encodes_once(model, message, method):
+    (label, score, _, _), _ = worker_pool.task_chat(message, method, 4)
+    assert label == "jam_layanan"
+    assert model.calls == [[intent.embed_text(message)]]
+
+def test_intent_and_faiss_share_text():
+    assert intent.embed_text("jam buka perpustakaan?") == "jam buka perpustakaan"
+    # TF-IDF tetap pakai teks preprocessing notebook
+    assert intent._preprocess_intent("jam buka perpustakaan?") == "jam buka perpustakaan"
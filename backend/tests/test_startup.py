@@ -0,0 +1,35 @@
+"""
+Cold start API: `import main` harus tetap di bawah budget dan nggak boleh ikut
+meng-import library berat (model / index di-load lazy, lihat eval/bench_startup.py).
+Budget bisa diganti lewat STARTUP_IMPORT_BUDGET (detik) sesuai mesin CI.
+"""
+import json
+import os
+import subprocess
+import sys
+
+from conftest import backend_dir
+
+sys.path.insert(0, str(backend_dir / "eval"))
+import bench_startup  # noqa: E402
+
+import_budget = float(os.getenv("STARTUP_IMPORT_BUDGET", "3"))
+# baru boleh ke-import waktu index / model di-load (worker, bukan proses API)
+heavy_modules = ("torch", "faiss", "sentence_transformers", "transformers", "sklearn", "spacy", "pdfplumber")
+
+def env() -> dict:
+    e = dict(os.environ)
+    e.setdefault("SECRET_KEY", "test")
+    e["INDEX_RELOAD_INTERVAL"] = "0"
+    return e
+
+def test_import_main_is_lazy():
+    code = f"import json, sys, main; print(json.dumps([m for m in {heavy_modules!r} if m in sys.modules]))"
+    p = subprocess.run([sys.executable, "-c", code], cwd=backend_dir, env=env(), capture_output=True, text=True)
+    assert p.returncode == 0, p.stderr[-2000:]
+    assert json.loads(p.stdout.strip().splitlines()[-1]) == []
+
+def test_import_main_within_budget():
+    # yang tercepat dari 3 kali, biar nggak flaky karena noise mesin
+    seconds = min(bench_startup.import_profile(env(), top=5)["seconds"] for _ in range(3))
+    assert seconds <= import_budget, f"import main {seconds:.2f}s > budget {import_budget}s"
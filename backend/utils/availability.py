@@ -0,0 +1,97 @@
+"""
+Side-store status ketersediaan buku (vectorstore/availability.json).
+
+Status di docs.json ikut masuk teks BM25 / embedding, padahal berubah tiap hari.
+data/refresh_availability.py cukup cek ulang tabel eksemplar per record id dan
+menulis file ini; API menimpa status di hit (+ teks konteks prompt) saat query,
+tanpa re-ingest. File ada di luar snapshots/, jadi tetap berlaku setelah swap index.
+
+    {"updated_at": "...", "snapshot": "<versi>",
+     "records": {"<parent_id>": {"availability": "Available; On Loan", "checked_at": "..."}}}
+"""
+import json
+import os
+import re
+import time
+from datetime import datetime
+from pathlib import Path
+
+store_file = "availability.json"
+# interval cek file berubah (detik)
+reload_interval = float(os.getenv("AVAILABILITY_RELOAD_INTERVAL", "10"))
+
+# teks doc katalog: "... Lokasi: ... Status: <availability> Kata kunci: ..."
+re_status = re.compile(r"Status:.*?(?= Kata kunci:)")
+
+class AvailabilityStore:
+    def __init__(self, path: Path, interval: float = reload_interval):
+        self.path = Path(path)
+        self.interval = interval
+        self.records = {}
+        self.updated_at = None
+        self._mtime = None
+        self._checked = float("-inf")
+
+    def maybe_reload(self):
+        # cukup stat file tiap `interval` detik, json dibaca ulang kalau mtime berubah
+        now = time.monotonic()
+        if now - self._checked < self.interval:
+            return
+        self._checked = now
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            self.records, self.updated_at, self._mtime = {}, None, None
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            print(f"[WARN] availability store gagal dibaca: {e}")
+            return
+        self.records = data.get("records", {})
+        self.updated_at = data.get("updated_at")
+        self._mtime = mtime
+        print(f"[INFO] availability store: {len(self.records)} buku (updated {self.updated_at})")
+
+    def apply(self, hits: list) -> list:
+        """
+        Timpa status hit katalog (field availability + baris Status di text)
+        dengan hasil refresh terakhir. Hit lain / buku yang belum di-refresh dibiarkan.
+        Cuma lookup dict; file dibaca ulang lewat maybe_reload di luar jalur request.
+        """
+        records = self.records
+        if not records:
+            return hits
+        for h in hits:
+            if h.get("source") != "catalog":
+                continue
+            rec = records.get(str(h.get("parent_id")))
+            if rec is None:
+                continue
+            status = rec["availability"]
+            h["text"] = re_status.sub(lambda _: "Status: " + status, h.get("text") or "", count=1)
+            h["availability"] = status
+            h["availability_checked_at"] = rec.get("checked_at")
+        return hits
+
+    def info(self) -> dict:
+        return {"records": len(self.records), "updated_at": self.updated_at}
+
+def now_iso() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+def write_store(path: Path, records: dict, snapshot_version: str = None):
+    # tulis ke file sementara lalu os.replace, pembaca nggak pernah lihat file setengah jadi
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    data = {"updated_at": now_iso(), "snapshot": snapshot_version, "records": records}
+    tmp.write_text(json.dumps(data, ensure_ascii=False, indent=1), encoding="utf-8")
+    os.replace(tmp, path)
+
+def read_records(path: Path) -> dict:
+    try:
+        return json.loads(Path(path).read_text(encoding="utf-8")).get("records", {})
+    except (FileNotFoundError, ValueError):
+        return {}
@@ -0,0 +1,50 @@
+from typing import List
+
+from rank_bm25 import BM25Okapi
+
+class IncrementalBM25(BM25Okapi):
+    """
+    BM25Okapi yang bisa ditambah / dikurangi dokumennya tanpa rebuild.
+    - statistik document frequency (nd) disimpan dan di-update in place
+    - skor identik dengan BM25Okapi yang dibangun ulang dari corpus yang sama
+    """
+
+    def _initialize(self, corpus):
+        self.nd = super()._initialize(corpus)
+        self.num_doc = sum(self.doc_len)
+        return self.nd
+
+    def _refresh(self):
+        self.corpus_size = len(self.doc_len)
+        self.avgdl = self.num_doc / self.corpus_size if self.corpus_size else 0.0
+        # idf bergantung ke N dan rata-rata idf seluruh vocab, jadi dihitung ulang (O(vocab))
+        self.idf = {}
+        if self.nd:
+            self._calc_idf(self.nd)
+
+    def add(self, corpus: List[List[str]]):
+        for document in corpus:
+            self.doc_len.append(len(document))
+            self.num_doc += len(document)
+
+            frequencies = {}
+            for word in document:
+                frequencies[word] = frequencies.get(word, 0) + 1
+            self.doc_freqs.append(frequencies)
+
+            for word in frequencies:
+                self.nd[word] = self.nd.get(word, 0) + 1
+        self._refresh()
+
+    def remove(self, positions: List[int]):
+        drop = set(positions)
+        for pos in drop:
+            self.num_doc -= self.doc_len[pos]
+            for word in self.doc_freqs[pos]:
+                self.nd[word] -= 1
+                if self.nd[word] == 0:
+                    del self.nd[word]
+
+        self.doc_freqs = [f for i, f in enumerate(self.doc_freqs) if i not in drop]
+        self.doc_len = [n for i, n in enumerate(self.doc_len) if i not in drop]
+        self._refresh()
@@ -0,0 +1,244 @@
+"""
+Index pencarian katalog terstruktur (GET /catalog/search), 1 entri per buku
+(doc catalog_meta), dibangun ingest.py ke catalog.pkl:
+- inverted index token (judul, penulis, penerbit, kata kunci, ISBN) -> posisi buku
+- postings per nilai facet (bahasa, lantai, status, kata kunci, penerbit, penulis, tahun)
+  disimpan sebagai pasangan array (buku, id nilai), jadi hitung facet = 1 bincount
+- tahun: array terurut, filter rentang pakai searchsorted
+Filter antar field = AND, beberapa nilai di 1 field = OR. Jumlah facet dihitung
+dari hasil setelah semua filter.
+"""
+import re
+
+import numpy as np
+
+from .preprocess import clean_text, tokenize_bm25
+
+facet_fields = ("language", "floor", "status", "keyword", "publisher", "author", "year")
+# field buku yang dikirim di hasil
+book_fields = (
+    "parent_id", "title", "authors", "year", "isbn", "publisher", "language", "location",
+    "availability", "detail_url", "thumbnail_url", "keyword",
+)
+empty_values = {"", "nan", "none"}
+re_floor = re.compile(r"lantai\s*(\d+)", re.I)
+
+def _value(v) -> str:
+    v = clean_text(str(v if v is not None else ""))
+    return "" if v.lower() in empty_values else v
+
+def parse_year(v):
+    try:
+        return int(float(v))
+    except (TypeError, ValueError):
+        return None
+
+def book_status(availability: str) -> str:
+    # gabungan status eksemplar ("Available; Currently On Loan (...)") -> 1 status buku
+    copies = [c.strip().lower() for c in str(availability or "").split(";")]
+    if any(c.startswith("avail") and "not for loan" not in c for c in copies):
+        return "available"
+    if any("not for loan" in c for c in copies):
+        return "not_for_loan"
+    if any("on loan" in c for c in copies):
+        return "on_loan"
+    return "unknown"
+
+def facet_values(book: dict, field: str) -> list:
+    if field == "floor":
+        m = re_floor.search(book["location"])
+        return [m.group(1)] if m else []
+    if field == "status":
+        return [book_status(book["availability"])]
+    if field == "keyword":
+        return [k.strip().lower() for k in book["keyword"].split(",") if k.strip()]
+    if field == "publisher":
+        # "Andi : Yogyakarta., 2014" -> "Andi"
+        p = book["publisher"].split(":")[0].strip().rstrip(".,")
+        return [p] if p else []
+    if field == "author":
+        return [a.strip() for a in book["authors"].split(";") if a.strip()]
+    if field == "year":
+        return [str(book["year"])] if book["year"] is not None else []
+    return [book[field]] if book[field] else []
+
+def _postings(lists: list) -> dict:
+    post = {}
+    for i, items in enumerate(lists):
+        for t in set(items):
+            post.setdefault(t, []).append(i)
+    return {t: np.array(ix, dtype=np.int32) for t, ix in post.items()}
+
+class Facet:
+    """
+    Pasangan (posisi buku, id nilai) untuk 1 field. Nilai filter pakai
+    case-insensitive (lower).
+    """
+
+    def __init__(self, values_per_book: list):
+        self.values = []
+        ids = {}
+        books, vids = [], []
+        for i, vals in enumerate(values_per_book):
+            for v in dict.fromkeys(vals):
+                if v not in ids:
+                    ids[v] = len(self.values)
+                    self.values.append(v)
+                books.append(i)
+                vids.append(ids[v])
+        self.books = np.array(books, dtype=np.int32)
+        self.vids = np.array(vids, dtype=np.int32)
+        self.lookup = {}
+        for v, i in ids.items():
+            self.lookup.setdefault(v.lower(), []).append(i)
+
+    def mask(self, wanted: list, n: int) -> np.ndarray:
+        vids = [i for w in wanted for i in self.lookup.get(str(w).strip().lower(), [])]
+        m = np.zeros(n, dtype=bool)
+        m[self.books[np.isin(self.vids, vids)]] = True
+        return m
+
+    def counts(self, mask: np.ndarray, limit: int) -> list:
+        counts = np.bincount(self.vids[mask[self.books]], minlength=len(self.values))
+        top = np.flatnonzero(counts)
+        top = top[np.argsort(-counts[top], kind="stable")][:limit]
+        return [{"value": self.values[i], "count": int(counts[i])} for i in top]
+
+class CatalogIndex:
+    # catalog.pkl lama belum punya atribut ini
+    _status = None
+
+    def __init__(self):
+        self.books = []
+        self.terms = {}        # token -> posisi buku (semua field teks)
+        self.title_terms = {}  # token -> posisi buku (judul saja, bobot lebih)
+        self.idf = {}
+        self.facets = {}
+        self.years = np.empty(0, dtype=np.int32)
+        self.year_order = np.empty(0, dtype=np.int32)
+        self.title_rank = np.empty(0, dtype=np.int32)
+        # status terbaru: (records availability store, availability per buku, facet status),
+        # diganti dengan 1 assignment, jadi search paralel nggak lihat campuran lama / baru
+        self._status = None
+
+    @classmethod
+    def build(cls, docs: list) -> "CatalogIndex":
+        ix = cls()
+        for d in docs:
+            if d.get("doc_kind") != "catalog_meta":
+                continue
+            book = {f: _value(d.get(f)) for f in book_fields}
+            book["year"] = parse_year(d.get("year"))
+            ix.books.append(book)
+
+        title_tokens = [tokenize_bm25(b["title"]) for b in ix.books]
+        all_tokens = [
+            t + tokenize_bm25(" ".join([b["authors"], b["publisher"], b["keyword"], b["isbn"]]))
+            for t, b in zip(title_tokens, ix.books)
+        ]
+        ix.terms = _postings(all_tokens)
+        ix.title_terms = _postings(title_tokens)
+        n = len(ix.books)
+        ix.idf = {t: float(np.log(1 + n / len(p))) for t, p in ix.terms.items()}
+
+        ix.facets = {f: Facet([facet_values(b, f) for b in ix.books]) for f in facet_fields}
+        ix.years = np.array([b["year"] if b["year"] is not None else -1 for b in ix.books], dtype=np.int32)
+        ix.year_order = np.argsort(ix.years, kind="stable").astype(np.int32)
+        order = sorted(range(n), key=lambda i: ix.books[i]["title"].lower())
+        ix.title_rank = np.empty(n, dtype=np.int32)
+        ix.title_rank[order] = np.arange(n)
+        return ix
+
+    def sync_status(self, records: dict) -> tuple:
+        """
+        Status terbaru dari availability store (utils/availability.py): field
+        availability buku + facet status dibangun ulang kalau records berubah.
+        Return (records, availability per buku, facet status).
+        """
+        state = self._status
+        if state is not None and state[0] is records:
+            return state
+        fresh = [
+            records[b["parent_id"]]["availability"] if b["parent_id"] in records else b["availability"]
+            for b in self.books
+        ]
+        state = (records, fresh, Facet([[book_status(a)] for a in fresh]))
+        self._status = state
+        return state
+
+    def _year_mask(self, year_min, year_max) -> np.ndarray:
+        sorted_years = self.years[self.year_order]
+        lo = np.searchsorted(sorted_years, year_min if year_min is not None else 0, side="left")
+        hi = np.searchsorted(sorted_years, year_max, side="right") if year_max is not None else len(sorted_years)
+        m = np.zeros(len(self.books), dtype=bool)
+        m[self.year_order[lo:hi]] = True
+        return m
+
+    def search(self, q: str = None, filters: dict = None, year_min: int = None, year_max: int = None,
+               sort: str = "relevance", page: int = 1, page_size: int = 20, facet_limit: int = 20,
+               records: dict = None) -> dict:
+        """
+        q: semua token harus ada (judul / penulis / penerbit / kata kunci / ISBN).
+        filters: {field facet: [nilai, ...]}.
+        sort: relevance (skor idf token q, judul x2; tanpa q = tahun terbaru), year_desc, year_asc, title.
+        """
+        state = self.sync_status(records) if records is not None else self._status
+        src, fresh, status = state or (None, None, self.facets["status"])
+        facets = {**self.facets, "status": status}
+        n = len(self.books)
+        mask = np.ones(n, dtype=bool)
+
+        tokens = list(dict.fromkeys(tokenize_bm25(q))) if q else []
+        for t in tokens:
+            post = self.terms.get(t)
+            if post is None:
+                mask[:] = False
+                break
+            m = np.zeros(n, dtype=bool)
+            m[post] = True
+            mask &= m
+
+        for field, wanted in (filters or {}).items():
+            if wanted:
+                mask &= facets[field].mask(wanted, n)
+        if year_min is not None or year_max is not None:
+            mask &= self._year_mask(year_min, year_max)
+
+        hits = np.flatnonzero(mask)
+        if sort == "relevance" and tokens:
+            score = np.zeros(n, dtype=np.float32)
+            for t in tokens:
+                score[self.terms.get(t, [])] += self.idf.get(t, 0.0)
+                score[self.title_terms.get(t, [])] += self.idf.get(t, 0.0)
+            hits = hits[np.lexsort((-self.years[hits], -score[hits]))]
+        elif sort == "year_asc":
+            hits = hits[np.argsort(np.where(self.years[hits] < 0, 10**6, self.years[hits]), kind="stable")]
+        elif sort == "title":
+            hits = hits[np.argsort(self.title_rank[hits])]
+        else:
+            hits = hits[np.argsort(-self.years[hits], kind="stable")]
+
+        page = max(1, page)
+        start = (page - 1) * page_size
+        results = []
+        for i in hits[start:start + page_size]:
+            book = dict(self.books[i])
+            if fresh is not None:
+                book["availability"] = fresh[i]
+                rec = src.get(book["parent_id"])
+                if rec is not None:
+                    book["availability_checked_at"] = rec.get("checked_at")
+            # facet status: tepat 1 nilai per buku, jadi vids[i] = status buku ke-i
+            book["status"] = status.values[status.vids[i]]
+            results.append(book)
+
+        return {
+            "total": int(len(hits)),
+            "page": page,
+            "page_size": page_size,
+            "results": results,
+            "facets": {f: facet.counts(mask, facet_limit) for f, facet in facets.items()},
+        }
+
+    def info(self) -> dict:
+        return {"books": len(self.books), "terms": len(self.terms)}
@@ -0,0 +1,124 @@
+"""
+Index entitas (orang / organisasi: penulis, penerbit, instansi) -> posisi dokumen:
+- dibangun ingest.py dari NER spaCy (nlp.pipe) + field authors / publisher katalog
+- kunci = teks entitas versi token query (clean_query + token BM25), jadi
+  "Kadir, Abdul" dan "abdul kadir" di query ketemu kunci yang sama
+- entitas yang muncul di terlalu banyak dokumen (> max_df) dibuang, nggak membedakan;
+  kecuali kunci dari field katalog (penulis / penerbit produktif tetap bisa dicari)
+- kunci 1 kata yang juga kata umum di corpus ("komputer", "deep") dibuang:
+  df katanya di BM25 > ambiguous_ratio x df entitasnya
+- query: n-gram token query dicocokkan ke kunci (longest match, tanpa spaCy di
+  request), hasilnya di-cache per query
+"""
+import math
+
+import numpy as np
+
+from .preprocess import clean_query, re_token_bm25
+
+entity_labels = ("PER", "ORG")
+
+def entity_key(text: str) -> str:
+    return " ".join(re_token_bm25.findall(clean_query(text)))
+
+class EntityIndex:
+    def __init__(self, max_df: float = 0.02, ambiguous_ratio: float = 3.0, max_ngram: int = 6,
+                 cache_size: int = 20000):
+        self.max_df = max_df
+        self.ambiguous_ratio = ambiguous_ratio
+        self.max_ngram = max_ngram
+        self.cache_size = cache_size
+        self.n_docs = 0
+        self.postings = {}   # kunci -> posisi dokumen (int32, urut)
+        self.labels = {}     # kunci -> label
+        self.idf = {}        # kunci -> log(N / df)
+        # hasil NER spaCy per posisi (dipakai ulang ingest berikutnya), None = tanpa spaCy
+        self.ner_model = None
+        self.ner = []
+        self._cache = {}
+
+    @classmethod
+    def build(cls, doc_entities: list, word_df: dict = None, doc_fields: list = None, **kwargs) -> "EntityIndex":
+        """
+        doc_entities: [(teks entitas, label)] per posisi dokumen (NER).
+        doc_fields: sama, dari field authors / publisher katalog; kuncinya nggak kena max_df.
+        word_df: token -> jumlah dokumen (bm25.nd), buat buang kunci 1 kata yang ambigu.
+        """
+        ix = cls(**kwargs)
+        ix.n_docs = len(doc_entities)
+        postings, labels, exempt = {}, {}, set()
+        for pos, ents in enumerate(doc_entities):
+            fields = doc_fields[pos] if doc_fields else ()
+            for i, (text, label) in enumerate([*ents, *fields]):
+                key = entity_key(text)
+                # terlalu pendek / cuma angka (tahun, nomor) bukan nama
+                if len(key) < 3 or key.replace(" ", "").isdigit():
+                    continue
+                postings.setdefault(key, set()).add(pos)
+                labels.setdefault(key, label)
+                if i >= len(ents):
+                    exempt.add(key)
+
+        limit = max(1, int(ix.max_df * ix.n_docs))
+        for key, pos in postings.items():
+            if len(pos) > limit and key not in exempt:
+                continue
+            if word_df and " " not in key and word_df.get(key, 0) > ix.ambiguous_ratio * len(pos):
+                continue
+            ix.postings[key] = np.array(sorted(pos), dtype=np.int32)
+            ix.labels[key] = labels[key]
+            ix.idf[key] = math.log(ix.n_docs / len(pos))
+        ix.max_ngram = min(ix.max_ngram, max((k.count(" ") + 1 for k in ix.postings), default=1))
+        return ix
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_cache"] = {}
+        return state
+
+    def match(self, query: str) -> tuple:
+        """
+        Kunci entitas yang muncul di query (n-gram terpanjang dulu, nggak tumpang tindih).
+        """
+        hit = self._cache.get(query)
+        if hit is not None:
+            return hit
+
+        tokens = re_token_bm25.findall(clean_query(query))
+        keys = []
+        i = 0
+        while i < len(tokens):
+            for n in range(min(self.max_ngram, len(tokens) - i), 0, -1):
+                key = " ".join(tokens[i:i + n])
+                if key in self.postings:
+                    keys.append(key)
+                    i += n
+                    break
+            else:
+                i += 1
+        keys = tuple(dict.fromkeys(keys))
+
+        if len(self._cache) >= self.cache_size:
+            self._cache.clear()
+        self._cache[query] = keys
+        return keys
+
+    def candidates(self, keys: tuple) -> np.ndarray:
+        if not keys:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate([self.postings[k] for k in keys])).astype(np.int64)
+
+    def scores(self, keys: tuple, cand: np.ndarray) -> np.ndarray:
+        """
+        Per kandidat: bobot idf entitas query yang ada di dokumen / total bobot (0-1).
+        """
+        out = np.zeros(len(cand), dtype=np.float32)
+        total = sum(self.idf[k] for k in keys)
+        if total <= 0:
+            return out
+        for k in keys:
+            out += np.isin(cand, self.postings[k]).astype(np.float32) * (self.idf[k] / total)
+        return out
+
+    def info(self) -> dict:
+        return {"entities": len(self.postings), "docs": self.n_docs, "ner_model": self.ner_model}
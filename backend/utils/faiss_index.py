@@ -0,0 +1,38 @@
+import faiss
+import numpy as np
+
+# cara vektor disimpan di index FAISS
+# - flat : float32 apa adanya (exact)
+# - fp16 : scalar quantizer float16 (1/2 memori)
+# - int8 : scalar quantizer 8 bit per dimensi (1/4 memori)
+# - pca  : PCA ke pca_dim dimensi lalu flat float32
+storage_options = ("flat", "fp16", "int8", "pca")
+
+def build_index(embeddings: np.ndarray, ids: np.ndarray, storage: str = "flat", pca_dim: int = 256):
+    """
+    IndexIDMap2 (id stabil per chunk) di atas index sesuai `storage`.
+    Quantizer / PCA di-train dari embeddings yang sama.
+    """
+    d = embeddings.shape[1]
+    if storage == "flat":
+        base = faiss.IndexFlatIP(d)
+    elif storage == "fp16":
+        base = faiss.IndexScalarQuantizer(d, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_INNER_PRODUCT)
+    elif storage == "int8":
+        base = faiss.IndexScalarQuantizer(d, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT)
+    elif storage == "pca":
+        # PCA butuh minimal dim vektor buat training
+        dim = max(1, min(pca_dim, d, len(embeddings)))
+        base = faiss.IndexPreTransform(faiss.PCAMatrix(d, dim), faiss.IndexFlatIP(dim))
+    else:
+        raise ValueError(f"storage tidak dikenal: {storage}")
+
+    if not base.is_trained:
+        base.train(embeddings)
+    index = faiss.IndexIDMap2(base)
+    if len(embeddings):
+        index.add_with_ids(embeddings, ids)
+    return index
+
+def index_bytes(index) -> int:
+    return int(faiss.serialize_index(index).nbytes)
@@ -0,0 +1,73 @@
+import numpy as np
+
+def top_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    # top-k pakai argpartition (bukan full sort), hasilnya urut skor turun
+    if k >= len(scores):
+        idx = np.arange(len(scores))
+    else:
+        idx = np.argpartition(-scores, k - 1)[:k]
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+def minmax(x: np.ndarray) -> np.ndarray:
+    if not len(x):
+        return x
+    lo, hi = float(x.min()), float(x.max())
+    if hi - lo < 1e-9:
+        return np.zeros_like(x)
+    return (x - lo) / (hi - lo)
+
+def ranks_in(cand: np.ndarray, ordered: np.ndarray) -> np.ndarray:
+    # rank (0 = terbaik) tiap kandidat di list `ordered`, -1 kalau nggak ada
+    ranks = np.full(len(cand), -1, dtype=np.int64)
+    ranks[np.searchsorted(cand, ordered)] = np.arange(len(ordered))
+    return ranks
+
+def rrf(ranks: np.ndarray, k: int = 60) -> np.ndarray:
+    return np.where(ranks >= 0, 1.0 / (k + ranks + 1), 0.0).astype(np.float32)
+
+def fuse(bm25_all: np.ndarray, bm25_top: np.ndarray, faiss_pos: np.ndarray, faiss_scores: np.ndarray,
+         alpha: float = 0.5, method: str = "minmax", rrf_k: int = 60, extra: np.ndarray = None):
+    """
+    Gabung kandidat BM25 (posisi urut skor) + FAISS (posisi urut skor) tanpa loop Python.
+    - minmax: alpha * bm25_norm + (1 - alpha) * faiss_norm; kandidat yang nggak
+      ada di hasil FAISS dapat skor FAISS terendah
+    - rrf   : alpha / (k + rank_bm25) + (1 - alpha) / (k + rank_faiss); dokumen
+      dengan skor BM25 0 nggak dapat rank BM25
+    extra: kandidat tambahan (dokumen entitas), di rrf rank BM25-nya setelah hasil BM25.
+    Return (posisi kandidat, skor fusion, skor bm25, skor faiss), urut posisi.
+    """
+    keep = faiss_pos >= 0
+    faiss_pos, faiss_scores = faiss_pos[keep], faiss_scores[keep]
+    extra = extra[~np.isin(extra, bm25_top)] if extra is not None else bm25_top[:0]
+    cand = np.union1d(np.concatenate([bm25_top, extra]), faiss_pos)
+
+    default_faiss = float(faiss_scores.min()) if len(faiss_scores) else 0.0
+    faiss_cand = np.full(len(cand), default_faiss, dtype=np.float32)
+    faiss_cand[np.searchsorted(cand, faiss_pos)] = faiss_scores
+    bm25_cand = bm25_all[cand].astype(np.float32)
+
+    if method == "rrf":
+        # ekor pool BM25 yang skornya 0 = urutan sembarang, bukan ranking
+        ranked = np.concatenate([bm25_top[bm25_all[bm25_top] > 0], extra])
+        fused = alpha * rrf(ranks_in(cand, ranked), rrf_k) + (1.0 - alpha) * rrf(ranks_in(cand, faiss_pos), rrf_k)
+    else:
+        fused = alpha * minmax(bm25_cand) + (1.0 - alpha) * minmax(faiss_cand)
+    return cand, fused.astype(np.float32), bm25_cand, faiss_cand
+
+def parent_pool(parents: np.ndarray, scores: np.ndarray):
+    """
+    Max-pool skor per parent (1 buku / 1 chunk pdf).
+    Return (index kandidat terbaik per parent, skor parent), urut skor parent turun.
+    """
+    uniq, inv = np.unique(parents, return_inverse=True)
+    best = np.full(len(uniq), -np.inf, dtype=np.float32)
+    np.maximum.at(best, inv, scores)
+
+    # wakil parent = kandidat pertama yang skornya sama dengan max parent-nya
+    hit = np.flatnonzero(scores >= best[inv])
+    _, first = np.unique(inv[hit], return_index=True)
+    rep = hit[first]
+
+    # skor sama: parent yang muncul belakangan di docs duluan (mirip argsort()[::-1] versi lama)
+    order = np.lexsort((-parents[rep], -best))
+    return rep[order], best[order]
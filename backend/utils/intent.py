@@ -1,11 +1,32 @@
+"""
+Klasifikasi intent (pipeline sklearn dari intent_training.ipynb):
+- logreg_tfidf: TF-IDF + logreg, preprocessing pakai regex yang sudah dikompilasi
+- logreg_indobert: embedding IndoBERT + logreg. Input encoder = preprocess.embed_text
+  (preprocessing notebook + istilah query_replacements.json), sama dengan query
+  FAISS, jadi embedding retriever.encode_query selalu bisa dipakai ulang
+- hasil di-cache (LRU) per teks yang sudah dinormalisasi, jadi "Jam buka?" dan
+  "jam buka" cuma dihitung sekali
+- predict_intent_batch: banyak pesan sekaligus, 1x transform + predict_proba untuk
+  semua teks yang belum ada di cache
+- pipeline baru di-load waktu pertama dipakai (get_classifier), import modul ini
+  nggak load model
+"""
+import os
+import sys
+import threading
+import unicodedata
+from collections import OrderedDict
 from pathlib import Path
-import re
-import joblib
-from .preprocess import clean_text  
+
+import numpy as np
+from sklearn.base import BaseEstimator, TransformerMixin
+
+from .preprocess import ctrl_table, embed_text, punct_table, re_hyphen, re_non_alnum, re_url
+from .timing import stage
 
 base = Path(__file__).resolve().parent.parent
-model_dir = base / "model"  
-intent_model = "logreg_tfidf"  #"logreg_tfidf", "logreg_indobert"
+model_dir = base / "model"
+intent_model = os.getenv("INTENT_MODEL", "logreg_tfidf")  #"logreg_tfidf", "logreg_indobert"
 model_file_mapping = {
     "logreg_tfidf": "intent_model_logreg_tfidf.pkl",
     "logreg_indobert": "intent_model_logreg_indobert.pkl",
@@ -13,28 +34,164 @@ model_file_mapping = {
 if intent_model not in model_file_mapping:
     raise ValueError(f"Unknown INTENT MODEL NAME: {intent_model}")
 intent_model_path = model_dir / model_file_mapping[intent_model]
-intent_pipeline = joblib.load(intent_model_path)
+
+class IndoBertEncoder(BaseEstimator, TransformerMixin):
+    """
+    Step "indobert" di pipeline logreg_indobert. Di notebook class ini ada di
+    __main__, jadi perlu didaftarkan ke sana sebelum pickle-nya di-load.
+    Waktu serving encode lewat model IndoBERT retriever (nggak load model kedua).
+    """
+
+    def __init__(self, model_name="LazarusNLP/all-indobert-base-v4", batch_size=32):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.model = None
+
+    def __setstate__(self, state):
+        # SentenceTransformer hasil fit di notebook nggak dipakai
+        state["model"] = None
+        self.__dict__.update(state)
+
+    def fit(self, X, y=None):
+        return self
+
+    def transform(self, X):
+        from . import retriever
+        return retriever.embed(list(X))
+
+def load_pipeline(path: Path):
+    import joblib
+
+    main = sys.modules["__main__"]
+    if not hasattr(main, "IndoBertEncoder"):
+        main.IndoBertEncoder = IndoBertEncoder
+    return joblib.load(path)
+
+# jumlah teks (sudah dinormalisasi) yang disimpan hasilnya, per proses
+intent_cache_size = int(os.getenv("INTENT_CACHE_SIZE", "4096"))
 
 def _preprocess_intent(text: str) -> str:
-    text = clean_text(text)
-    if not isinstance(text, str):
-        text = str(text)
+    # sama persis dengan clean_text + lower + buang url / simbol (cara training),
+    # tapi whitespace cukup dirapikan sekali di akhir
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKC", str(text)).translate(punct_table)
+    if "\n" in text:
+        text = re_hyphen.sub(r"\1\2", text)
+    text = re_url.sub(" ", text.translate(ctrl_table).lower())
+    return " ".join(re_non_alnum.sub(" ", text).split())
+
+class IntentClassifier:
+    """
+    Wrapper pipeline intent dengan LRU cache.
+    Hasil per teks: (label, score 0-1, persen 0-100, {label: proba}).
+    Dict proba di-share antar pemanggil (dari cache), jangan diubah.
+    """
+
+    def __init__(self, pipeline, cache_size: int = intent_cache_size):
+        self.pipeline = pipeline
+        self.labels = [str(lbl) for lbl in pipeline.classes_]
+        # TF-IDF: teks preprocess() notebook; embedding: teks encoder yang sama dengan
+        # query FAISS (beda cuma istilah yang dinormalisasi query_replacements.json)
+        steps = getattr(pipeline, "named_steps", {})
+        self.uses_embedding = "indobert" in steps
+        self.clf = pipeline.steps[-1][1] if self.uses_embedding else None
+        self.normalize = embed_text if self.uses_embedding else _preprocess_intent
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        # mode tanpa worker pool: dipanggil dari beberapa thread
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
 
-    text = text.lower()
-    text = re.sub(r"http\S+|www\.\S+", " ", text)
-    text = re.sub(r"[^0-9a-zA-ZÀ-ÿ\s]", " ", text)
-    text = re.sub(r"\s+", " ", text).strip()
-    return text
+    def _result(self, row: list):
+        best = max(range(len(row)), key=row.__getitem__)
+        score = row[best]
+        return self.labels[best], score, round(score * 100, 1), dict(zip(self.labels, row))
+
+    def _embed(self, keys: list, missing: list, embeddings) -> np.ndarray:
+        # key = embed_text(teks), sama dengan input encode_query -> barisnya langsung dipakai
+        rows = {}
+        if embeddings is not None:
+            rows = dict(zip(keys, embeddings))
+        todo = [k for k in missing if k not in rows]
+        if todo:
+            from . import retriever
+            rows.update(zip(todo, retriever.embed(todo)))
+        return np.stack([rows[k] for k in missing])
+
+    def _predict_proba(self, keys: list, missing: list, embeddings) -> list:
+        if self.uses_embedding:
+            return self.clf.predict_proba(self._embed(keys, missing, embeddings)).tolist()
+        return self.pipeline.predict_proba(missing).tolist()
+
+    def predict_batch(self, texts: list, embeddings: np.ndarray = None) -> list:
+        """
+        embeddings (opsional, model embedding saja): baris ke-i = encode_query(texts[i]),
+        dipakai langsung tanpa encode ulang.
+        """
+        keys = [self.normalize(t) for t in texts]
+        found = {}
+        with self._lock:
+            for k in keys:
+                if k in found:
+                    continue
+                hit = self._cache.get(k)
+                if hit is not None:
+                    self._cache.move_to_end(k)
+                    found[k] = hit
+
+        missing = [k for k in dict.fromkeys(keys) if k not in found]
+        if missing:
+            # 1x transform + predict untuk semua teks baru
+            proba = self._predict_proba(keys, missing, embeddings)
+            fresh = {k: self._result(row) for k, row in zip(missing, proba)}
+            found.update(fresh)
+        with self._lock:
+            if missing and self.cache_size > 0:
+                self._cache.update(fresh)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            # miss = teks yang benar-benar dihitung (duplikat dalam 1 batch = hit)
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+        return [found[k] for k in keys]
+
+    def predict(self, text: str, embedding: np.ndarray = None):
+        return self.predict_batch([text], embedding)[0]
+
+    def info(self) -> dict:
+        with self._lock:
+            return {"size": len(self._cache), "max": self.cache_size, "hits": self.hits, "misses": self.misses}
+
+_classifier = None
+_load_lock = threading.Lock()
+
+def get_classifier() -> IntentClassifier:
+    global _classifier
+    if _classifier is None:
+        with _load_lock:
+            if _classifier is None:
+                with stage("load_intent"):
+                    _classifier = IntentClassifier(load_pipeline(intent_model_path))
+    return _classifier
+
+def __getattr__(name: str):
+    # nama lama (intent.classifier / intent.intent_pipeline) tetap jalan, model di-load di sini
+    if name == "classifier":
+        return get_classifier()
+    if name == "intent_pipeline":
+        return get_classifier().pipeline
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def predict_intent_proba(text: str):
-    s = _preprocess_intent(text)
-    proba = intent_pipeline.predict_proba([s])[0]
-    labels = intent_pipeline.classes_
-    return {lbl: float(p) for lbl, p in zip(labels, proba)}
-
-def predict_intent_conf(text: str):
-    proba_dict = predict_intent_proba(text)
-    best_label = max(proba_dict, key=proba_dict.get)
-    best_score = float(proba_dict[best_label])
-    best_percent = round(best_score * 100, 1)
-    return best_label, best_score, best_percent, proba_dict
\ No newline at end of file
+    return get_classifier().predict(text)[3]
+
+def predict_intent_conf(text: str, embedding: np.ndarray = None):
+    # embedding: hasil retriever.encode_query(text), dipakai kalau modelnya embedding
+    with stage("intent"):
+        return get_classifier().predict(text, embedding)
+
+def predict_intent_batch(texts: list) -> list:
+    with stage("intent"):
+        return get_classifier().predict_batch(texts)
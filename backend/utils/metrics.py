@@ -0,0 +1,81 @@
+import asyncio
+
+from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
+
+stage_buckets = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+stage_seconds = Histogram(
+    "mlibbot_stage_seconds",
+    "Durasi per stage pipeline (intent, bm25, encode, faiss, rescore, fusion, prompt, groq, mongo)",
+    ["stage"],
+    buckets=stage_buckets,
+)
+request_seconds = Histogram(
+    "mlibbot_request_seconds",
+    "Durasi request HTTP per route",
+    ["method", "route", "status"],
+    buckets=stage_buckets,
+)
+llm_tokens = Histogram(
+    "mlibbot_llm_tokens",
+    "Jumlah token prompt / completion per call Groq",
+    ["kind"],
+    buckets=(32, 64, 128, 256, 512, 1024, 2048, 4096, 8192),
+)
+hybrid_candidates = Histogram(
+    "mlibbot_hybrid_candidates",
+    "Ukuran pool kandidat hybrid (union BM25 + FAISS)",
+    buckets=(10, 20, 40, 60, 80, 120, 160, 240, 320),
+)
+
+event_loop_lag = Histogram(
+    "mlibbot_event_loop_lag_seconds",
+    "Keterlambatan event loop (tick sleep yang telat dari jadwal)",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+event_loop_blocks = Counter(
+    "mlibbot_event_loop_blocks",
+    "Jumlah event loop ke-block lebih dari LOOP_BLOCK_THRESHOLD_MS (watchdog profiler)",
+)
+
+# nama value di timing -> (histogram, label)
+value_metrics = {
+    "prompt_tokens": (llm_tokens, "prompt"),
+    "completion_tokens": (llm_tokens, "completion"),
+    "hybrid_pool": (hybrid_candidates, None),
+}
+
+def observe(timings: dict):
+    # stage / value pinjaman (hasil eksekusi request lain, lihat timing.merge) sudah
+    # tercatat di request yang menjalankannya
+    borrowed = timings.get("borrowed", ())
+    for name, sec in timings.get("stages", {}).items():
+        if name not in borrowed:
+            stage_seconds.labels(name).observe(sec)
+    for name, value in timings.get("values", {}).items():
+        if name not in value_metrics or name in borrowed:
+            continue
+        hist, label = value_metrics[name]
+        (hist.labels(label) if label else hist).observe(value)
+
+def server_timing(timings: dict) -> str:
+    # format header Server-Timing: "bm25;dur=3.2, faiss;dur=1.1"
+    return ", ".join(
+        f"{name};dur={sec * 1000:.1f}" for name, sec in timings.get("stages", {}).items()
+    )
+
+def track_singleflight(flight, name: str):
+    for key in ("executed", "coalesced", "coalescing_ratio", "inflight"):
+        g = Gauge(f"mlibbot_{name}_{key}", f"Single-flight {name}: {key}")
+        g.set_function(lambda key=key: flight.stats()[key])
+
+async def monitor_loop_lag(interval: float = 0.1):
+    # kalau ada kode sinkron yang nge-block loop, sleep ini bangun telat
+    loop = asyncio.get_running_loop()
+    while True:
+        t0 = loop.time()
+        await asyncio.sleep(interval)
+        event_loop_lag.observe(max(0.0, loop.time() - t0 - interval))
+
+def render():
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,72 @@
+import re
+import zlib
+
+import numpy as np
+
+_mersenne = np.uint64((1 << 61) - 1)
+_max_hash = np.uint64((1 << 32) - 1)
+_word_re = re.compile(r"\w+")
+
+def shingles(text: str, n: int = 3) -> set:
+    # shingle kata (n-gram), teks pendek tetap dapat 1 shingle
+    words = _word_re.findall(text.lower())
+    if len(words) <= n:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + n]) for i in range(len(words) - n + 1)}
+
+def jaccard(a: set, b: set) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+class NearDupIndex:
+    """
+    Deteksi near-duplicate pakai MinHash + LSH (banding):
+    - signature num_perm hash per teks, dipecah jadi `bands` band
+    - teks yang 1 band-nya sama jadi kandidat, lalu dicek Jaccard asli
+      supaya nggak ada false positive di atas threshold
+    Urutan add() menentukan representatif (teks pertama yang masuk).
+    """
+
+    def __init__(self, threshold: float = 0.9, num_perm: int = 64, bands: int = 16, ngram: int = 3, seed: int = 1):
+        assert num_perm % bands == 0, "num_perm harus kelipatan bands"
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.ngram = ngram
+        # a, b < 2^32 dan crc32 < 2^32: a*x + b < 2^64, jadi hitungan uint64 di
+        # signature() exact (tanpa overflow) sebelum di-mod p = 2^61 - 1
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.buckets = [{} for _ in range(bands)]
+        self.sets = {}
+
+    def signature(self, sh: set) -> np.ndarray:
+        hv = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in sh), dtype=np.uint64, count=len(sh))
+        # (a*x + b) mod p untuk semua permutasi sekaligus -> min per permutasi
+        ph = ((np.outer(hv, self.a) + self.b) % _mersenne) & _max_hash
+        return ph.min(axis=0)
+
+    def find_or_add(self, key, text: str):
+        """
+        Key representatif kalau `text` near-duplicate dari teks sebelumnya,
+        selain itu daftarkan `text` sebagai representatif baru dan return None.
+        """
+        sh = shingles(text, self.ngram)
+        sig = self.signature(sh)
+        band_keys = [sig[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+        candidates = []
+        for bucket, bk in zip(self.buckets, band_keys):
+            for cand in bucket.get(bk, ()):
+                if cand not in candidates:
+                    candidates.append(cand)
+        for cand in candidates:
+            if jaccard(sh, self.sets[cand]) >= self.threshold:
+                return cand
+
+        self.sets[key] = sh
+        for bucket, bk in zip(self.buckets, band_keys):
+            bucket.setdefault(bk, []).append(key)
+        return None
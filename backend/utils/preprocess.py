@@ -1,9 +1,20 @@
+import json
+import os
 import re
+import time
 import unicodedata
+from pathlib import Path
 from typing import List
 
+base = Path(__file__).resolve().parent.parent
+# kamus normalisasi istilah query (urutan = urutan aturan)
+replacements_file = Path(os.getenv("QUERY_REPLACEMENTS_FILE", base / "data" / "query_replacements.json"))
+# interval cek file kamus berubah (detik), 0 = tanpa hot reload
+replacements_reload_interval = float(os.getenv("QUERY_REPLACEMENTS_RELOAD_INTERVAL", "10"))
+
 # buang karakter kontrol aneh
-re_ctrl = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+ctrl_chars = [chr(c) for c in [*range(0x00, 0x09), 0x0B, 0x0C, *range(0x0E, 0x20)]]
+ctrl_table = str.maketrans(dict.fromkeys(ctrl_chars, " "))
 
 # samakan variasi unicode yang sering muncul di PDF
 map_punct = {
@@ -12,47 +23,36 @@ map_punct = {
     "\u2013": "-", "\u2014": "-", "\u2212": "-",
     "\u00A0": " ",  # non-breaking space
 }
+# + samain newline (\r\n jadi \n\n, sama saja setelah whitespace dirapikan)
+punct_table = str.maketrans({**map_punct, "\r": "\n"})
 
-# token BM25: huruf/angka (cukup robust utk Indo + ISBN + angka)
-re_token_bm25 = re.compile(r"[0-9A-Za-zÀ-ÖØ-öø-ÿ]+")
-
-def _normalize_unicode(text: str) -> str:
-    # NFKC: normalisasi bentuk unicode (fullwidth, dsb)
-    return unicodedata.normalize("NFKC", text)
+# 'perpu-\nstakaan' -> 'perpustakaan'
+re_hyphen = re.compile(r"(\w)-\s*\n\s*(\w)")
+# "lamaaa": "lamaa"
+re_repeat = re.compile(r"([a-zA-Z])\1{2,}")
 
-def _replace_punct(text: str) -> str:
-    for k, v in map_punct.items():
-        text = text.replace(k, v)
-    return text
+# url / simbol dibuang untuk teks intent & encoder query
+re_url = re.compile(r"http\S+|www\.\S+")
+re_non_alnum = re.compile(r"[^0-9a-zA-ZÀ-ÿ\s]")
 
-def _fix_pdf_hyphenation(text: str) -> str:
-    """
-    Perbaiki pemenggalan kata:
-    'perpu-\nstakaan' -> 'perpustakaan'
-    """
-    return re.sub(r"(\w)-\s*\n\s*(\w)", r"\1\2", text)
+# token BM25: huruf/angka (cukup robust utk Indo + ISBN + angka)
+re_token_bm25 = re.compile(r"[0-9A-Za-zÀ-ÖØ-öø-ÿ]+")
 
 def _cleanup_base(text: str) -> str:
     if not text:
         return ""
 
-    text = str(text)
-    text = _normalize_unicode(text)
-    text = _replace_punct(text)
-
-    # samain newline
-    text = text.replace("\r\n", "\n").replace("\r", "\n")
-    text = _fix_pdf_hyphenation(text)
-
-    # buang kontrol
-    text = re_ctrl.sub(" ", text)
+    # NFKC: normalisasi bentuk unicode (fullwidth, dsb)
+    text = unicodedata.normalize("NFKC", str(text))
+    text = text.translate(punct_table)
 
-    # rapihin whitespace
-    text = re.sub(r"[ \t]+", " ", text)
-    text = re.sub(r"\n{2,}", "\n", text)
-    text = re.sub(r"\s+", " ", text).strip()
+    # perbaiki pemenggalan kata PDF (pola butuh newline)
+    if "\n" in text:
+        text = re_hyphen.sub(r"\1\2", text)
 
-    return text
+    # buang kontrol, lalu rapihin whitespace
+    text = text.translate(ctrl_table)
+    return " ".join(text.split())
 
 def clean_text(text: str) -> str:
     """
@@ -61,69 +61,106 @@ def clean_text(text: str) -> str:
     """
     return _cleanup_base(text)
 
+def _apply_sequential(text: str, rules: list) -> str:
+    # cara lama: 1 re.sub per aturan, berurutan (cuma dipakai waktu compile)
+    for k, v in rules:
+        text = re.sub(rf"\b{re.escape(k)}\b", v, text)
+    return text
+
+def compile_replacements(rules: list):
+    """
+    Kamus -> (regex alternation 1 pass, tabel pengganti).
+    Hasilnya sama dengan _apply_sequential:
+    - pengganti tiap kunci = hasil semua aturan dijalankan ke kunci itu
+      ("no hp" -> "nomor hp" -> "nomor handphone")
+    - kunci turunan untuk aturan multi-kata yang baru cocok setelah aturan
+      sebelumnya ("perpus maranatha" -> "perpustakaan maranatha" -> ...)
+    Kunci terpanjang dicoba duluan (longest match).
+    """
+    table = {k: _apply_sequential(k, rules) for k, _ in rules}
+    for j, (kj, _) in enumerate(rules):
+        for ki, vi in rules[:j]:
+            if ki == vi or not re.search(rf"\b{re.escape(vi)}\b", kj):
+                continue
+            derived = re.sub(rf"\b{re.escape(vi)}\b", lambda _: ki, kj, count=1)
+            table.setdefault(derived, _apply_sequential(derived, rules))
+
+    if not table:
+        return None, table
+    keys = sorted(table, key=len, reverse=True)
+    pattern = re.compile(r"\b(?:" + "|".join(map(re.escape, keys)) + r")\b")
+    return pattern, table
+
+class QueryNormalizer:
+    """
+    Normalisasi istilah query dari file kamus, dikompilasi sekali dan
+    di-compile ulang kalau mtime file berubah (dicek tiap `interval` detik).
+    File rusak / hilang: tetap pakai kamus terakhir yang valid.
+    """
+
+    def __init__(self, path: Path, interval: float = replacements_reload_interval):
+        self.path = Path(path)
+        self.interval = interval
+        # (pattern, table) diganti sekaligus, thread lain nggak lihat setengah jadi
+        self.compiled = (None, {})
+        self._mtime = None
+        self._checked = float("-inf")
+        self.maybe_reload(force=True)
+
+    def maybe_reload(self, force: bool = False):
+        now = time.monotonic()
+        if not force and (self.interval <= 0 or now - self._checked < self.interval):
+            return
+        self._checked = now
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except OSError as e:
+            if self._mtime != -1:
+                print(f"[WARN] kamus query {self.path} tidak ada: {e}")
+            self._mtime = -1
+            return
+        if mtime == self._mtime:
+            return
+        self._mtime = mtime
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            rules = list(data["replacements"].items())
+        except (OSError, ValueError, KeyError, AttributeError) as e:
+            print(f"[WARN] kamus query {self.path} gagal dibaca: {e}")
+            return
+        self.compiled = compile_replacements(rules)
+
+    def __call__(self, text: str) -> str:
+        self.maybe_reload()
+        pattern, table = self.compiled
+        if pattern is None:
+            return text
+        return pattern.sub(lambda m: table[m.group(0)], text)
+
+normalize_terms = QueryNormalizer(replacements_file)
+
 def clean_query(text: str) -> str:
     """
     - lower
     - rapihin huruf berulang panjang
-    - normalisasi istilah umum
+    - normalisasi istilah umum (data/query_replacements.json)
     """
     t = _cleanup_base(text).lower()
+    t = re_repeat.sub(r"\1\1", t)
+    return normalize_terms(t)
 
-    # "lamaaa": "lamaa"
-    t = re.sub(r"([a-zA-Z])\1{2,}", r"\1\1", t)
-
-    # normalisasi istilah umum
-    replacements = {
-    # perpustakaan
-    "perpus": "perpustakaan",
-    "perpust": "perpustakaan",
-    "perpustakaan maranatha": "perpustakaan universitas kristen maranatha",
-    "ukm": "universitas kristen maranatha", 
-    "marnat": "Universitas Kristen Maranatha",
-    "uk maranatha": "universitas kristen maranatha",
-    "e-journal": "ejournal",
-    "e journal": "ejournal",
-    "ejurnal": "ejournal",
-    "e-jurnal": "ejournal",
-    "e-resource": "eresource",
-    "e resource": "eresource",
-    "e-resources": "eresource",
-    "e-book": "ebook",
-    "e book": "ebook",
-    "ebook": "ebook",
-    "e-books": "ebook",
-    "ta": "tugas akhir",
-    "t.a": "tugas akhir",
-    "skripsi": "skripsi",
-    "thesis": "tesis",
-    "booking": "pemesanan",
-    "reservasi": "pemesanan",
-    "reserve": "pemesanan",
-    "cariin": "carikan",
-    "pinjem": "pinjam",
-    "minjem": "pinjam",
-    "ngembaliin": "mengembalikan",
-    "balikin": "mengembalikan",
-    "perpanjang": "perpanjangan",
-    "renew": "perpanjangan",
-    "extend": "perpanjangan",
-    "wa": "whatsapp",
-    "w/a": "whatsapp",
-    "whats app": "whatsapp",
-    "ig": "instagram",
-    "insta": "instagram",
-    "telp": "telepon",
-    "no hp": "nomor hp",
-    "hp": "handphone",
-    "telat": "terlambat",
-    "denda": "denda",
-    }
-
-    for k, v in replacements.items():
-        t = re.sub(rf"\b{re.escape(k)}\b", v, t)
-
-    return t
-
-def tokenize_bm25(text: str) -> List[str]:
-    t = clean_query(text)
-    return re_token_bm25.findall(t)
\ No newline at end of file
+def embed_text(text: str) -> str:
+    """
+    Teks query untuk encoder IndoBERT: clean_query + lower + buang url / simbol.
+    Dipakai FAISS (retriever.encode_query) dan intent logreg_indobert, jadi
+    1 pesan cukup 1x encode.
+    """
+    t = re_url.sub(" ", clean_query(text).lower())
+    return " ".join(re_non_alnum.sub(" ", t).split())
+
+def tokenize_bm25(text: str, speller=None) -> List[str]:
+    # speller (utils/speller.SymSpell): koreksi typo token query, dokumen jangan dikoreksi
+    tokens = re_token_bm25.findall(clean_query(text))
+    if speller is not None:
+        tokens = speller.correct(tokens)
+    return tokens
@@ -0,0 +1,280 @@
+"""
+Profiler sampling opsional untuk request live + deteksi event loop ke-block:
+- nyala / mati saat runtime lewat /admin/profiler (default mati, PROFILER_ENABLED)
+- sebagian request /chat dan /test/* (sample_rate) diprofile: thread sampler ambil
+  stack semua thread (sys._current_frames) tiap interval_ms selama request jalan,
+  thread yang lagi nunggu (select / wait / queue) nggak dihitung
+- disimpan `keep` profile paling lambat, format collapsed stack ("a;b;c 12") yang
+  langsung bisa dibaca flamegraph.pl / speedscope
+- watchdog: heartbeat di event loop tiap tick, kalau telat > block_threshold_ms
+  thread watchdog ambil stack thread loop saat itu juga (bagian sinkron yang nge-block)
+Retrieval di worker process (worker_pool) nggak ke-sample, cukup kelihatan di stage
+timing yang ikut disimpan per profile. Sample request lain yang jalan bersamaan ikut
+masuk (lihat field "concurrent").
+"""
+import asyncio
+import heapq
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from datetime import datetime
+from pathlib import Path
+
+from . import metrics
+
+enabled = os.getenv("PROFILER_ENABLED", "0") == "1"
+sample_rate = float(os.getenv("PROFILE_SAMPLE_RATE", "0.05"))
+interval_ms = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+# jumlah profile paling lambat yang disimpan
+keep = int(os.getenv("PROFILE_KEEP", "20"))
+block_threshold_ms = float(os.getenv("LOOP_BLOCK_THRESHOLD_MS", "100"))
+
+# tick heartbeat event loop (detik)
+heartbeat_tick = 0.01
+backend_dir = Path(__file__).resolve().parent.parent
+# frame paling atas thread yang lagi nganggur, bukan kerja
+idle_leaves = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+# thread background yang kerjanya cuma time.sleep (nggak kelihatan nganggur dari frame)
+idle_threads = {"index-watcher"}
+
+def profiled_path(path: str) -> bool:
+    return path == "/chat" or path.startswith("/test/")
+
+class Profiler:
+    def __init__(self):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.interval_ms = interval_ms
+        self.keep = keep
+        self.block_threshold_ms = block_threshold_ms
+        self.stats = {"requests": 0, "profiled": 0, "samples": 0, "loop_blocks": 0}
+        self.blocks = deque(maxlen=50)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._active = {}    # id profile -> {"stacks": Counter, "ticks", "concurrent"}
+        self._slowest = []   # min-heap (durasi, id, record)
+        self._ids = itertools.count(1)
+        self._labels = {}    # code object -> "fungsi (file:baris)"
+        self._idle = {}      # code object -> frame nganggur?
+        self._threads = {}
+        # state heartbeat / watchdog
+        self._beat = None
+        self._loop_thread = None
+        self._block = None
+
+    def configure(self, **kwargs):
+        for key in ("enabled", "sample_rate", "interval_ms", "keep", "block_threshold_ms"):
+            if kwargs.get(key) is not None:
+                setattr(self, key, kwargs[key])
+        with self._lock:
+            while len(self._slowest) > self.keep:
+                heapq.heappop(self._slowest)
+        print(f"[INFO] profiler: enabled={self.enabled} sample_rate={self.sample_rate}")
+
+    def clear(self):
+        with self._lock:
+            self._slowest = []
+            self.blocks.clear()
+
+    def _thread(self, name: str, target):
+        t = self._threads.get(name)
+        if t is None or not t.is_alive():
+            t = threading.Thread(target=target, name=f"profiler-{name}", daemon=True)
+            self._threads[name] = t
+            t.start()
+        return t
+
+    def _own_threads(self) -> set:
+        return {t.ident for t in self._threads.values()}
+
+    # ---- sampling per request ----
+
+    def begin(self, path: str):
+        """
+        id profile kalau request ini kepilih, None kalau nggak.
+        """
+        if not self.enabled or not profiled_path(path):
+            return None
+        self.stats["requests"] += 1
+        if random.random() >= self.sample_rate:
+            return None
+        pid = next(self._ids)
+        with self._lock:
+            self._active[pid] = {"stacks": Counter(), "ticks": 0, "concurrent": 1}
+            for p in self._active.values():
+                p["concurrent"] = max(p["concurrent"], len(self._active))
+            self._wake.set()
+        self._thread("sampler", self._sample_loop)
+        return pid
+
+    def end(self, pid: int, method: str, path: str, status_code: int, timings: dict):
+        with self._lock:
+            p = self._active.pop(pid, None)
+        if p is None:
+            return
+        stages = timings.get("stages", {})
+        record = {
+            "id": pid,
+            "method": method,
+            "path": path,
+            "status": status_code,
+            "at": datetime.utcnow().isoformat() + "Z",
+            "duration_ms": round(stages.get("total", 0.0) * 1000, 2),
+            "samples": p["ticks"],
+            "interval_ms": self.interval_ms,
+            "concurrent": p["concurrent"],
+            "stages_ms": {k: round(v * 1000, 2) for k, v in stages.items()},
+            "collapsed": self._collapsed(p["stacks"]),
+        }
+        with self._lock:
+            self.stats["profiled"] += 1
+            item = (record["duration_ms"], pid, record)
+            if len(self._slowest) < self.keep:
+                heapq.heappush(self._slowest, item)
+            elif item > self._slowest[0]:
+                heapq.heapreplace(self._slowest, item)
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            path = Path(code.co_filename)
+            try:
+                short = path.relative_to(backend_dir).as_posix()
+            except ValueError:
+                short = "/".join(path.parts[-2:])
+            label = f"{code.co_name} ({short}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def _is_idle(self, code) -> bool:
+        idle = self._idle.get(code)
+        if idle is None:
+            idle = (os.path.basename(code.co_filename), code.co_name) in idle_leaves
+            self._idle[code] = idle
+        return idle
+
+    def _collapsed(self, stacks: Counter) -> str:
+        # 1 baris per stack unik: "thread;root;...;leaf jumlah_sample"
+        lines = []
+        for stack, n in stacks.most_common():
+            frames = [stack[0]] + [self._label(c).replace(";", ",") for c in stack[1:]]
+            lines.append(f"{';'.join(frames)} {n}")
+        return "\n".join(lines)
+
+    def _sample_loop(self):
+        skip = self._own_threads()
+        while True:
+            self._wake.wait()
+            with self._lock:
+                if not self._active:
+                    self._wake.clear()
+                    continue
+            names = {t.ident: t.name for t in threading.enumerate()}
+            stacks = []
+            for tid, frame in sys._current_frames().items():
+                if tid in skip or names.get(tid) in idle_threads or self._is_idle(frame.f_code):
+                    continue
+                codes = []
+                while frame is not None:
+                    codes.append(frame.f_code)
+                    frame = frame.f_back
+                codes.append(names.get(tid, str(tid)))
+                stacks.append(tuple(reversed(codes)))
+            with self._lock:
+                for p in self._active.values():
+                    p["ticks"] += 1
+                    p["stacks"].update(stacks)
+                self.stats["samples"] += 1
+            time.sleep(self.interval_ms / 1000)
+            skip = self._own_threads()
+
+    # ---- event loop blocking ----
+
+    async def heartbeat(self):
+        """
+        Task di event loop (dibuat saat startup). Waktu profiler mati cuma cek tiap 0.5s.
+        """
+        self._loop_thread = threading.get_ident()
+        while True:
+            if not self.enabled:
+                self._beat = None
+                await asyncio.sleep(0.5)
+                continue
+            self._thread("watchdog", self._watch_loop)
+            self._beat = time.monotonic()
+            await asyncio.sleep(heartbeat_tick)
+            lag = time.monotonic() - self._beat - heartbeat_tick
+            with self._lock:
+                event, self._block = self._block, None
+            if event is not None:
+                # loop sudah jalan lagi, baru ketahuan total lama ke-block
+                event["blocked_ms"] = round(max(0.0, lag) * 1000, 1)
+
+    def _watch_loop(self):
+        while True:
+            time.sleep(max(0.005, self.block_threshold_ms / 4000))
+            beat = self._beat
+            if beat is None or self._block is not None:
+                continue
+            late = time.monotonic() - beat - heartbeat_tick
+            if late * 1000 < self.block_threshold_ms:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            event = {
+                "at": datetime.utcnow().isoformat() + "Z",
+                "blocked_ms": None,  # diisi heartbeat setelah loop jalan lagi
+                "stack": [
+                    f"{f.filename}:{f.lineno} in {f.name}" + (f"\n    {f.line}" if f.line else "")
+                    for f in traceback.extract_stack(frame)[-30:]
+                ],
+            }
+            with self._lock:
+                if self._beat != beat:
+                    continue
+                self._block = event
+                self.blocks.append(event)
+                self.stats["loop_blocks"] += 1
+            metrics.event_loop_blocks.inc()
+            print(f"[WARN] event loop ke-block > {self.block_threshold_ms:.0f}ms di {event['stack'][-1]}")
+
+    # ---- admin ----
+
+    def profile(self, pid: int):
+        with self._lock:
+            for _, i, record in self._slowest:
+                if i == pid:
+                    return record
+        return None
+
+    def info(self) -> dict:
+        with self._lock:
+            slowest = [
+                {k: v for k, v in record.items() if k != "collapsed"}
+                for _, _, record in sorted(self._slowest, reverse=True)
+            ]
+            blocks = list(self.blocks)
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "interval_ms": self.interval_ms,
+            "keep": self.keep,
+            "block_threshold_ms": self.block_threshold_ms,
+            "stats": dict(self.stats),
+            "active": len(self._active),
+            "slowest": slowest,
+            "loop_blocks": blocks,
+        }
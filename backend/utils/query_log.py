@@ -0,0 +1,121 @@
+"""
+Log query /chat untuk replay beban asli (loadtest/replay.py), opt-in lewat QUERY_LOG=1:
+- 1 baris JSON per request: query (clean_query + disensor), method, top_k, intent,
+  id hasil retrieval, timing per stage (ms)
+- tanpa session / user / IP; email, url, nomor HP dan deretan angka panjang (NIM,
+  nomor anggota) diganti placeholder, ISBN-13 dibiarkan
+- handler request cuma put ke queue (QueueHandler), format JSON + tulis file +
+  rotasi (RotatingFileHandler, append) jalan di thread QueueListener
+File: <QUERY_LOG_DIR>/query.log, query.log.1 (lebih lama), dst. Cukup 1 proses
+penulis (proses API), rotasi nggak aman kalau uvicorn --workers > 1.
+"""
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import time
+from pathlib import Path
+
+from .preprocess import clean_query
+
+enabled = os.getenv("QUERY_LOG", "0") == "1"
+log_dir = Path(os.getenv("QUERY_LOG_DIR", Path(__file__).resolve().parent.parent / "logs"))
+log_file = "query.log"
+max_bytes = int(os.getenv("QUERY_LOG_MAX_BYTES", str(50 * 1024 * 1024)))
+backup_count = int(os.getenv("QUERY_LOG_BACKUPS", "10"))
+
+re_email = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+re_url = re.compile(r"(?:https?://|www\.)\S+")
+re_phone = re.compile(r"(?:\+?62[\s-]?|\b0)8\d{1,3}(?:[\s-]?\d{3,4}){1,3}\b")
+re_long_num = re.compile(r"\b\d{7,}\b")
+
+def _num(m: re.Match) -> str:
+    n = m.group(0)
+    # ISBN-13 tanpa tanda hubung tetap disimpan (query katalog)
+    return n if len(n) == 13 and n.startswith(("978", "979")) else "<num>"
+
+def scrub(text: str) -> str:
+    t = clean_query(text)
+    t = re_url.sub("<url>", t)
+    t = re_email.sub("<email>", t)
+    t = re_phone.sub("<phone>", t)
+    return re_long_num.sub(_num, t)
+
+class _Handler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # dict entri diformat di thread listener, bukan di event loop
+        return record
+
+class _JsonFormatter(logging.Formatter):
+    def format(self, record):
+        return json.dumps(record.msg, ensure_ascii=False)
+
+_logger = logging.getLogger("mlibbot.query_log")
+_logger.propagate = False
+_listener = None
+
+def start():
+    global _listener
+    if not enabled or _listener is not None:
+        return
+    log_dir.mkdir(parents=True, exist_ok=True)
+    q = queue.SimpleQueue()
+    fh = logging.handlers.RotatingFileHandler(
+        log_dir / log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+    )
+    fh.setFormatter(_JsonFormatter())
+    _listener = logging.handlers.QueueListener(q, fh)
+    _listener.start()
+    _logger.addHandler(_Handler(q))
+    _logger.setLevel(logging.INFO)
+    print(f"[INFO] query log: {log_dir / log_file}")
+
+def stop():
+    # flush sisa queue ke file
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for h in list(_logger.handlers):
+        _logger.removeHandler(h)
+    for h in _listener.handlers:
+        h.close()
+    _listener = None
+
+def log_chat(message: str, method: str, top_k: int, intent: tuple, contexts: list, timings: dict = None):
+    """
+    intent: (label, score, ...). timings: timing per request (timing.current()).
+    """
+    if _listener is None:
+        return
+    stages = (timings or {}).get("stages", {})
+    _logger.info({
+        "ts": round(time.time(), 3),
+        "query": scrub(message),
+        "method": method,
+        "top_k": top_k,
+        "intent": intent[0],
+        "confidence": round(float(intent[1]), 4),
+        "ids": [h.get("source_id") for h in contexts],
+        "stages_ms": {k: round(v * 1000, 2) for k, v in stages.items()},
+    })
+
+def log_files(path: Path = None) -> list:
+    """
+    File log urut dari yang paling lama (query.log.N ... query.log).
+    """
+    path = Path(path or log_dir)
+    if path.is_file():
+        return [path]
+    files = [p for p in path.glob(log_file + "*") if p.name == log_file or p.suffix[1:].isdigit()]
+    return sorted(files, key=lambda p: -int(p.suffix[1:]) if p.name != log_file else 0)
+
+def read_entries(path: Path = None):
+    for p in log_files(path):
+        with open(p, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
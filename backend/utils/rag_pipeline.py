@@ -2,9 +2,12 @@ import os
 import requests
 from dotenv import load_dotenv
 from typing import List, Dict, Optional
+from .timing import stage, record
 
 load_dotenv()
 groq_api_key = os.getenv("groq_api")
+# bisa diarahkan ke server OpenAI-compatible lain (mis. mock untuk load test)
+groq_base_url = os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1")
 
 def _trim(s: str, max_chars: int = 900) -> str:
     s = (s or "").strip()
@@ -18,6 +21,10 @@ def build_prompt(question: str, contexts: List[Dict], intent: Optional[str] = No
     - tidak halusinasi
     - output singkat 1-3 kalimat
     """
+    with stage("prompt"):
+        return _build_prompt(question, contexts, intent)
+
+def _build_prompt(question: str, contexts: List[Dict], intent: Optional[str] = None) -> str:
     blocks = []
     for i, c in enumerate(contexts, start=1):
         text = _trim(c.get("text", ""), 900)
@@ -62,7 +69,7 @@ def call_groq(prompt: str, model: str = "llama-3.1-8b-instant") -> str:
     if not groq_api_key:
         raise RuntimeError("groq_api belum di-set di .env")
 
-    url = "https://api.groq.com/openai/v1/chat/completions"
+    url = f"{groq_base_url}/chat/completions"
 
     system_content = (
         "Kamu adalah MLibBot, chatbot perpustakaan Universitas Kristen Maranatha. "
@@ -83,7 +90,14 @@ def call_groq(prompt: str, model: str = "llama-3.1-8b-instant") -> str:
         "Content-Type": "application/json",
     }
 
-    resp = requests.post(url, json=payload, headers=headers, timeout=60)
-    resp.raise_for_status()
-    data = resp.json()
+    with stage("groq"):
+        resp = requests.post(url, json=payload, headers=headers, timeout=60)
+        resp.raise_for_status()
+        data = resp.json()
+
+    usage = data.get("usage") or {}
+    if "prompt_tokens" in usage:
+        record("prompt_tokens", usage["prompt_tokens"])
+    if "completion_tokens" in usage:
+        record("completion_tokens", usage["completion_tokens"])
     return data["choices"][0]["message"]["content"].strip()
\ No newline at end of file
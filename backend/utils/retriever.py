@@ -0,0 +1,342 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from . import snapshot
+from .availability import AvailabilityStore, store_file
+from .fusion import fuse, parent_pool, top_indices
+from .preprocess import embed_text, tokenize_bm25
+from .timing import stage, record
+
+base = Path(__file__).resolve().parent.parent
+vector_dir = base / "vectorstore"
+indobert_model = "LazarusNLP/all-indobert-base-v4"
+# interval cek snapshot baru (detik), 0 = hot reload mati
+reload_interval = float(os.getenv("INDEX_RELOAD_INTERVAL", "10"))
+# storage FAISS terkompresi: ambil k * faktor kandidat lalu re-score pakai float32
+rescore_factor = int(os.getenv("FAISS_RESCORE_FACTOR", "4"))
+# fusion hybrid default: "minmax" atau "rrf"
+hybrid_fusion = os.getenv("HYBRID_FUSION", "minmax")
+# koreksi typo token query BM25 (speller.pkl dari ingest), batas waktu per query (ms)
+spell_correction = os.getenv("SPELL_CORRECTION", "1") == "1"
+spell_budget_ms = float(os.getenv("SPELL_BUDGET_MS", "2"))
+# boost hybrid untuk dokumen yang memuat entitas di query (entities.pkl dari ingest), 0 = mati
+entity_weight = float(os.getenv("ENTITY_WEIGHT", "0.5"))
+
+class IndexSet:
+    """
+    Semua index dari 1 snapshot. Diganti sekaligus (1 assignment) saat
+    hot reload, jadi request yang sedang jalan tetap pakai set lamanya.
+    """
+
+    def __init__(self, path: Path, version: str = None):
+        import faiss
+
+        self.path = path
+        self.version = version
+        # tiap artifact punya stage "load_*" (kelihatan di eval/bench_startup.py)
+        with stage("load_bm25"):
+            self.bm25 = snapshot.load_pickle(path / "bm25.pkl")
+        # float32 cuma dibaca saat re-score; mmap jadi page cache-nya dibagi antar worker
+        self.embeddings = np.load(path / "indo_embeddings.npy", mmap_mode="r")
+        with stage("load_faiss"):
+            self.faiss = faiss.read_index(str(path / "faiss_indo.index"))
+        # snapshot lama tanpa speller.pkl: tanpa koreksi typo
+        self.speller = None
+        if spell_correction and (path / "speller.pkl").exists():
+            with stage("load_speller"):
+                self.speller = snapshot.load_pickle(path / "speller.pkl")
+            self.speller.budget_ms = spell_budget_ms
+        # snapshot lama tanpa entities.pkl: tanpa sinyal entitas
+        self.entities = None
+        if entity_weight > 0 and (path / "entities.pkl").exists():
+            with stage("load_entities"):
+                self.entities = snapshot.load_pickle(path / "entities.pkl")
+        # index /catalog/search, snapshot lama belum punya
+        self.catalog = None
+        if (path / "catalog.pkl").exists():
+            with stage("load_catalog"):
+                self.catalog = snapshot.load_pickle(path / "catalog.pkl")
+
+        # vectorstore lama / tanpa snapshot.json = flat
+        meta = snapshot.read_meta(path) if (path / snapshot.meta_file).exists() else {}
+        self.storage = meta.get("storage", {"kind": "flat"})["kind"]
+        self.rescore = self.storage != "flat" and rescore_factor > 1
+
+        with stage("load_docs"), open(path / "docs.json", encoding="utf-8") as f:
+            self.docs = json.load(f)
+
+        # doc_id (id di FAISS IndexIDMap) -> posisi di docs / BM25 / embeddings
+        # vectorstore lama (tanpa doc_id): id FAISS = posisi
+        ids = np.array([d.get("doc_id", i) for i, d in enumerate(self.docs)], dtype=np.int64)
+        self.id_to_pos = np.full(int(ids.max()) + 1 if len(ids) else 0, -1, dtype=np.int64)
+        self.id_to_pos[ids] = np.arange(len(self.docs))
+
+        # posisi -> id parent integer (key dedupe: 1 buku / 1 chunk pdf), buat pooling di fusion
+        parents = {}
+        self.parent_idx = np.array(
+            [parents.setdefault(_dedupe_key(d), len(parents)) for d in self.docs], dtype=np.int64
+        )
+
+# diisi load_indexes() (di proses API atau di tiap worker pool)
+active = None
+embed_model = None
+# status buku terbaru buat /catalog/search (file yang sama dengan di proses API)
+availability = AvailabilityStore(vector_dir / store_file)
+
+def load_indexes(path: Path = vector_dir):
+    """
+    path = root vectorstore (ikut pointer CURRENT kalau ada) atau langsung
+    folder snapshot / vectorstore lama.
+    """
+    global active
+
+    if (path / snapshot.pointer_file).exists():
+        path, version = snapshot.resolve(path)
+    else:
+        version = None
+    active = IndexSet(path, version)
+    get_embed_model()
+    return len(active.docs)
+
+def get_embed_model():
+    global embed_model
+    if embed_model is None:
+        # sentence_transformers (+ torch) baru di-import di sini, tooling BM25-only nggak ikut bayar
+        from sentence_transformers import SentenceTransformer
+        with stage("load_embed_model"):
+            embed_model = SentenceTransformer(indobert_model)
+    return embed_model
+
+def index_info() -> dict:
+    return {
+        "version": active.version if active else None,
+        "docs_count": len(active.docs) if active else 0,
+        "storage": active.storage if active else None,
+        "entities": active.entities.info() if active and active.entities else None,
+        "pid": os.getpid(),
+    }
+
+def check_reload(root: Path = vector_dir) -> bool:
+    """
+    Kalau CURRENT menunjuk versi lain: load + verifikasi checksum di thread ini,
+    baru swap. Request yang jalan bersamaan tetap dilayani index lama.
+    """
+    global active
+
+    version = snapshot.current_version(root)
+    if version is None or (active is not None and version == active.version):
+        return False
+
+    path = snapshot.snapshot_path(root, version)
+    if not snapshot.verify(path):
+        print(f"[WARN] snapshot {version} gagal verifikasi checksum, tetap pakai {active.version if active else None}")
+        return False
+
+    new_set = IndexSet(path, version)
+    old = active.version if active else None
+    active = new_set
+    print(f"[INFO] index di-swap: {old} -> {version} (pid {os.getpid()})")
+    return True
+
+def start_watcher(root: Path = vector_dir, interval: float = reload_interval):
+    if interval <= 0:
+        return None
+
+    def loop():
+        while True:
+            time.sleep(interval)
+            try:
+                check_reload(root)
+            except Exception as e:
+                print(f"[WARN] hot reload gagal: {e}")
+
+    t = threading.Thread(target=loop, name="index-watcher", daemon=True)
+    t.start()
+    return t
+
+def faiss_search(ix: IndexSet, q_emb: np.ndarray, k: int):
+    shortlist = k * rescore_factor if ix.rescore else k
+    with stage("faiss"):
+        scores, ids = ix.faiss.search(q_emb, shortlist)
+    scores, ids = scores[0], ids[0]
+    # -1 = slot kosong dari FAISS
+    pos = np.where(ids >= 0, ix.id_to_pos[np.maximum(ids, 0)], -1)
+    if ix.rescore:
+        return rescore(ix, q_emb[0], pos, k)
+    return scores, pos
+
+def rescore(ix: IndexSet, q: np.ndarray, pos: np.ndarray, k: int):
+    # skor ulang shortlist pakai embedding float32 asli (inner product = cosine, sudah dinormalisasi)
+    with stage("rescore"):
+        pos = pos[pos >= 0]
+        # baca baris mmap urut posisi biar akses file-nya sekuensial
+        order = np.argsort(pos)
+        exact = np.empty(len(pos), dtype=np.float32)
+        exact[order] = ix.embeddings[pos[order]] @ q
+        top = np.argsort(-exact, kind="stable")[:k]
+        return exact[top], pos[top]
+
+def embed(texts: list) -> np.ndarray:
+    # teks sudah dibersihkan (embed_text); vektor ternormalisasi, (n, dim) float32
+    with stage("encode"):
+        return get_embed_model().encode(texts, convert_to_numpy=True, normalize_embeddings=True).astype(np.float32)
+
+def encode_query(query: str) -> np.ndarray:
+    # teks encoder sama dengan intent logreg_indobert (embedding-nya dipakai bareng)
+    return embed([embed_text(query)])
+
+def _dedupe_key(hit: dict) -> str:
+    if hit.get("source") == "catalog":
+        # satu buku = satu parent_id
+        if hit.get("parent_id"):
+            return str(hit["parent_id"])
+        # fallback kalau parent_id kosong: potong s0/s1
+        return str(hit.get("source_id", "")).split("_s")[0]
+
+    # pdf: per chunk unik
+    return f'{hit.get("source")}::{hit.get("source_id")}'
+
+def dedupe(hits: list, top_k: int) -> list:
+    seen = set()
+    out = []
+    for h in hits:
+        key = _dedupe_key(h)
+        if key in seen:
+            continue
+        seen.add(key)
+        out.append(h)
+        if len(out) >= top_k:
+            break
+    return out
+
+def retrieve_bm25(query: str, top_k: int):
+    pool = 16
+    ix = active
+
+    with stage("bm25"):
+        tokens = tokenize_bm25(query, ix.speller)
+        scores = ix.bm25.get_scores(tokens)
+        idxs = np.argsort(scores)[::-1][:pool]
+
+    results = []
+    for i in idxs:
+        doc = ix.docs[int(i)]
+        results.append({
+            "text": doc["text"],
+            "source": doc["source"],
+            "source_id": doc["source_id"],
+            "parent_id": doc.get("parent_id"),
+            "score": float(scores[i]),
+        })
+
+    return dedupe(results, top_k)
+
+def retrieve_faiss(query: str, top_k: int, q_emb: np.ndarray = None):
+    pool = 16
+    ix = active
+
+    # q_emb: hasil encode_query yang sudah ada (mis. dipakai intent juga)
+    if q_emb is None:
+        q_emb = encode_query(query)
+    scores, idxs = faiss_search(ix, q_emb, pool)
+
+    results = []
+    for score, i in zip(scores, idxs):
+        if int(i) < 0:
+            continue
+        doc = ix.docs[int(i)]
+        results.append({
+            "text": doc["text"],
+            "source": doc["source"],
+            "source_id": doc["source_id"],
+            "parent_id": doc.get("parent_id"),
+            "score": float(score),
+        })
+
+    return dedupe(results, top_k)
+
+
+# # hybrid faiss search
+def retrieve_hybrid(query: str, top_k: int, alpha: float = 0.5, pool_mul: int = 10, pool_min: int = 40,
+                    fusion: str = None, rrf_k: int = 60, q_emb: np.ndarray = None):
+    """
+    Hybrid BM25 + FAISS, skor di-max-pool per parent (buku), jadi hasil langsung
+    top_k parent berbeda. Pool digandakan selama parent unik < top_k.
+    Entitas di query (penulis / penerbit): dokumennya ikut jadi kandidat dan skor
+    fusion dikali (1 + entity_weight * porsi entitas yang cocok).
+    """
+    ix = active
+    n_docs = len(ix.docs)
+    pool = min(max(top_k * pool_mul, pool_min), n_docs)
+
+    with stage("bm25"):
+        tokens = tokenize_bm25(query, ix.speller)
+        bm25_all = np.asarray(ix.bm25.get_scores(tokens), dtype=np.float32)
+    if q_emb is None:
+        q_emb = encode_query(query)
+
+    ents, ent_pos = (), None
+    if ix.entities is not None:
+        with stage("entity"):
+            ents = ix.entities.match(query)
+            # diurut skor BM25, masuk setelah top BM25 (rank rrf di belakang)
+            ent_pos = ix.entities.candidates(ents)
+            ent_pos = ent_pos[np.argsort(-bm25_all[ent_pos], kind="stable")]
+        record("entity_matches", len(ents))
+
+    while True:
+        with stage("bm25"):
+            bm25_top = top_indices(bm25_all, pool)
+        faiss_scores, faiss_pos = faiss_search(ix, q_emb, pool)
+
+        with stage("fusion"):
+            cand, fused, bm25_cand, faiss_cand = fuse(
+                bm25_all, bm25_top, faiss_pos, faiss_scores, alpha, fusion or hybrid_fusion, rrf_k,
+                extra=ent_pos if len(ents) else None,
+            )
+            if len(ents):
+                fused = fused * (1.0 + entity_weight * ix.entities.scores(ents, cand))
+            reps, parent_scores = parent_pool(ix.parent_idx[cand], fused)
+        if len(reps) >= top_k or pool >= n_docs:
+            break
+        pool = min(pool * 2, n_docs)
+    record("hybrid_pool", len(cand))
+
+    results = []
+    for c, score in zip(reps[:top_k], parent_scores[:top_k]):
+        doc = ix.docs[int(cand[c])]
+        results.append({
+            "text": doc.get("text"),
+            "source": doc.get("source"),
+            "source_id": doc.get("source_id"),
+            "parent_id": doc.get("parent_id"),
+            "score_bm25": float(bm25_cand[c]),
+            "score_faiss": float(faiss_cand[c]),
+            "score_hybrid": float(score),
+        })
+    return results
+
+def retrieve(query: str, method: str, top_k: int, q_emb: np.ndarray = None, **hybrid_kwargs):
+    # "bm25", "faiss", "hybrid"; q_emb opsional (bm25 nggak pakai)
+    if method == "bm25":
+        return retrieve_bm25(query, top_k)
+    if method == "faiss":
+        return retrieve_faiss(query, top_k, q_emb)
+    return retrieve_hybrid(query, top_k, q_emb=q_emb, **hybrid_kwargs)
+
+def catalog_search(**params) -> dict:
+    """
+    Pencarian katalog terstruktur (utils/catalog_index.py) dengan status
+    ketersediaan terbaru. None kalau snapshot belum punya catalog.pkl.
+    """
+    ix = active
+    if ix.catalog is None:
+        return None
+    availability.maybe_reload()
+    with stage("catalog"):
+        return ix.catalog.search(records=availability.records, **params)
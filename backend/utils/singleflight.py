@@ -0,0 +1,49 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable
+
+class SingleFlight:
+    """
+    Gabungkan request identik yang datang bersamaan:
+    - request pertama (leader) menjalankan fn
+    - request lain dengan key sama (follower) ikut menunggu hasil yang sama
+    Hasil tidak di-cache; begitu selesai, key dilepas.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+        self.leaders = 0
+        self.followers = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable]):
+        task = self._inflight.get(key)
+        if task is None:
+            self.leaders += 1
+            # jalan sebagai task sendiri: kalau leader-nya disconnect,
+            # follower tetap dapat hasil
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._release(key, t))
+        else:
+            self.followers += 1
+        return await asyncio.shield(task)
+
+    def inflight(self, key: Hashable) -> bool:
+        # True = pemanggil berikutnya dengan key ini jadi follower
+        return key in self._inflight
+
+    def _release(self, key: Hashable, task: asyncio.Future):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # tandai exception sudah "diambil" walau semua pemanggil sudah pergi
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        total = self.leaders + self.followers
+        return {
+            "requests": total,
+            "executed": self.leaders,
+            "coalesced": self.followers,
+            "coalescing_ratio": round(self.followers / total, 4) if total else 0.0,
+            "inflight": len(self._inflight),
+        }
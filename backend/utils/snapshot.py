@@ -0,0 +1,126 @@
+"""
+Snapshot vectorstore berversi:
+
+    vectorstore/
+        CURRENT                  <- nama versi aktif (diganti atomik via os.replace)
+        snapshots/<versi>/       <- hasil 1x ingest + snapshot.json (checksum)
+
+API cukup baca CURRENT untuk tahu versi mana yang harus dipakai.
+"""
+import hashlib
+import json
+import os
+import pickle
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+pointer_file = "CURRENT"
+snapshots_dir = "snapshots"
+meta_file = "snapshot.json"
+
+def sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def new_version() -> str:
+    return datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+
+def current_version(vector_dir: Path) -> Optional[str]:
+    try:
+        return (vector_dir / pointer_file).read_text(encoding="utf-8").strip() or None
+    except FileNotFoundError:
+        return None
+
+def snapshot_path(vector_dir: Path, version: str) -> Path:
+    return vector_dir / snapshots_dir / version
+
+def resolve(vector_dir: Path):
+    """
+    (path, versi) yang aktif. Vectorstore lama tanpa CURRENT tetap jalan
+    dari folder vectorstore/ langsung dengan versi None.
+    """
+    version = current_version(vector_dir)
+    if version is None:
+        return vector_dir, None
+    return snapshot_path(vector_dir, version), version
+
+def staging_path(vector_dir: Path, version: str) -> Path:
+    # ditulis ke folder sementara dulu, baru di-rename saat publish
+    path = vector_dir / snapshots_dir / f".tmp-{version}"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+def write_meta(path: Path, version: str, extra: dict = None):
+    files = {
+        p.name: {"sha256": sha256_file(p), "bytes": p.stat().st_size}
+        for p in sorted(path.iterdir())
+        if p.is_file() and p.name != meta_file
+    }
+    meta = {
+        "version": version,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "files": files,
+        **(extra or {}),
+    }
+    with open(path / meta_file, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return meta
+
+def dump_pickle(obj, path: Path):
+    # pickle biasa (protocol 5, array numpy ikut in-band), di-load unpickler C
+    with open(path, "wb") as f:
+        pickle.dump(obj, f, protocol=5)
+
+def load_pickle(path: Path):
+    """
+    Artifact .pkl snapshot. joblib.load pakai unpickler Python (10-15x lebih
+    lambat untuk dict / list besar seperti bm25.pkl), jadi cuma dipakai untuk
+    snapshot lama yang ditulis joblib.dump.
+    """
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except pickle.UnpicklingError:
+        import joblib
+        return joblib.load(path)
+
+def read_meta(path: Path) -> dict:
+    with open(path / meta_file, encoding="utf-8") as f:
+        return json.load(f)
+
+def verify(path: Path) -> bool:
+    try:
+        meta = read_meta(path)
+    except FileNotFoundError:
+        return False
+    for name, info in meta["files"].items():
+        p = path / name
+        if not p.exists() or sha256_file(p) != info["sha256"]:
+            return False
+    return True
+
+def publish(vector_dir: Path, staging: Path, version: str, keep: int = 3) -> Path:
+    final = snapshot_path(vector_dir, version)
+    os.replace(staging, final)
+
+    # ganti pointer secara atomik: tulis file sementara lalu os.replace
+    tmp = vector_dir / f".{pointer_file}.tmp"
+    tmp.write_text(version, encoding="utf-8")
+    os.replace(tmp, vector_dir / pointer_file)
+
+    prune(vector_dir, keep)
+    return final
+
+def prune(vector_dir: Path, keep: int):
+    # simpan `keep` snapshot terbaru (versi aktif tidak pernah dihapus)
+    active = current_version(vector_dir)
+    root = vector_dir / snapshots_dir
+    versions = sorted(p.name for p in root.iterdir() if p.is_dir() and not p.name.startswith("."))
+    for v in versions[:-keep] if keep > 0 else []:
+        if v != active:
+            shutil.rmtree(root / v, ignore_errors=True)
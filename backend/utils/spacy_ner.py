@@ -1,8 +1,42 @@
-import spacy
+"""
+NER spaCy (xx_ent_wiki_sm, label PER / ORG / LOC / MISC):
+- model baru di-load waktu pertama dipakai, cuma komponen "ner" yang aktif
+- extract_entities_batch: nlp.pipe per batch, bisa multi-proses (n_process)
+spaCy + model opsional (install lihat tambahan.txt), cek dulu pakai available().
+"""
+import os
 
-nlp = spacy.load("xx_ent_wiki_sm")
+ner_model = os.getenv("SPACY_NER_MODEL", "xx_ent_wiki_sm")
+
+nlp = None
+
+def load_nlp():
+    global nlp
+    if nlp is None:
+        import spacy
+        # tokenizer tetap jalan, komponen lain (parser, dsb) nggak dipakai
+        nlp = spacy.load(ner_model, enable=["ner"])
+    return nlp
+
+def available() -> bool:
+    try:
+        load_nlp()
+    except (ImportError, OSError) as e:
+        print(f"[WARN] spaCy / model {ner_model} tidak tersedia: {e}")
+        return False
+    return True
 
 def extract_entities(text: str):
-    doc = nlp(text)
+    doc = load_nlp()(text)
     ents = [(ent.text, ent.label_) for ent in doc.ents]
     return ents
+
+def extract_entities_batch(texts: list, labels=None, batch_size: int = 64, n_process: int = 1) -> list:
+    """
+    [(teks entitas, label)] per teks, urutan sama dengan input.
+    labels: cuma ambil label ini (None = semua).
+    """
+    out = []
+    for doc in load_nlp().pipe(texts, batch_size=batch_size, n_process=n_process):
+        out.append([(ent.text, ent.label_) for ent in doc.ents if labels is None or ent.label_ in labels])
+    return out
@@ -0,0 +1,146 @@
+"""
+Koreksi typo token query (symmetric delete / SymSpell) dari vocabulary BM25:
+- index: tiap term (frekuensi >= min_count) -> semua variasi hapus huruf sampai
+  max_edit dari prefix-nya ("algoritma" -> "lgoritma", "agoritma", ...)
+- lookup token OOV: variasi hapus token yang sama dicari di index, kandidat
+  dipilih jarak edit (OSA, transposisi = 1) terkecil lalu frekuensi terbesar
+Jumlah variasi per lookup cuma bergantung prefix_length + max_edit, bukan ukuran
+vocab. Hasil lookup di-cache, dan per query ada batas waktu (budget_ms).
+"""
+import time
+from collections import Counter
+
+def _deletes(word: str, max_edit: int) -> set:
+    out = {word}
+    frontier = {word}
+    for _ in range(max_edit):
+        nxt = set()
+        for w in frontier:
+            if len(w) <= 1:
+                continue
+            for i in range(len(w)):
+                nxt.add(w[:i] + w[i + 1:])
+        nxt -= out
+        out |= nxt
+        frontier = nxt
+    return out
+
+def osa_distance(a: str, b: str, limit: int) -> int:
+    """
+    Jarak edit optimal string alignment (hapus / sisip / ganti / tukar 2 huruf
+    bersebelahan). Berhenti lebih awal kalau sudah pasti > limit (return limit + 1).
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2 = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        row_min = cur[0]
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            v = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                v = min(v, prev2[j - 2] + 1)
+            cur[j] = v
+            row_min = min(row_min, v)
+        if row_min > limit:
+            return limit + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+class SymSpell:
+    def __init__(self, max_edit: int = 2, prefix_length: int = 7, min_len: int = 5,
+                 min_count: int = 2, cache_size: int = 20000, budget_ms: float = 2.0):
+        self.max_edit = max_edit
+        self.prefix_length = prefix_length
+        self.min_len = min_len
+        self.min_count = min_count
+        self.cache_size = cache_size
+        self.budget_ms = budget_ms
+        self.vocab = set()   # semua term BM25 (token di sini nggak dikoreksi)
+        self.words = {}      # term kandidat koreksi -> frekuensi di corpus
+        self.deletes = {}    # variasi hapus -> tuple term
+        self._cache = {}
+
+    @classmethod
+    def from_counts(cls, counts: dict, **kwargs) -> "SymSpell":
+        sp = cls(**kwargs)
+        sp.vocab = set(counts)
+        deletes = {}
+        for term, n in counts.items():
+            # angka / kode (ISBN, nomor rak) bukan target koreksi
+            if n < sp.min_count or len(term) < 2 or not term.isalpha():
+                continue
+            sp.words[term] = n
+            for d in _deletes(term[:sp.prefix_length], sp.max_edit):
+                deletes.setdefault(d, []).append(term)
+        sp.deletes = {d: tuple(ts) for d, ts in deletes.items()}
+        return sp
+
+    @classmethod
+    def from_bm25(cls, bm25, **kwargs) -> "SymSpell":
+        # frekuensi term = total kemunculan di semua dokumen BM25
+        counts = Counter()
+        for freqs in bm25.doc_freqs:
+            counts.update(freqs)
+        return cls.from_counts(counts, **kwargs)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_cache"] = {}
+        return state
+
+    def edit_limit(self, n: int) -> int:
+        # kata pendek cukup 1 edit, biar "jelasin" nggak jadi "selain"
+        return 1 if n <= 7 else self.max_edit
+
+    def lookup(self, token: str) -> str:
+        if token in self.vocab or len(token) < self.min_len or not token.isalpha():
+            return token
+        hit = self._cache.get(token)
+        if hit is not None:
+            return hit
+
+        limit = self.edit_limit(len(token))
+        best, best_dist, best_count = token, limit + 1, 0
+        seen = set()
+        # variasi hapus per level (0, 1, 2 huruf dihapus); level > jarak terbaik
+        # nggak mungkin menghasilkan kandidat yang lebih dekat
+        frontier = {token[:self.prefix_length]}
+        visited = set(frontier)
+        for level in range(limit + 1):
+            if level > best_dist:
+                break
+            for d in frontier:
+                for term in self.deletes.get(d, ()):
+                    if term in seen:
+                        continue
+                    seen.add(term)
+                    dist = osa_distance(token, term, min(limit, best_dist))
+                    if dist > limit:
+                        continue
+                    count = self.words[term]
+                    if dist < best_dist or (dist == best_dist and count > best_count):
+                        best, best_dist, best_count = term, dist, count
+            frontier = {w[:i] + w[i + 1:] for w in frontier if len(w) > 1 for i in range(len(w))} - visited
+            visited |= frontier
+
+        if len(self._cache) >= self.cache_size:
+            self._cache.clear()
+        self._cache[token] = best
+        return best
+
+    def correct(self, tokens: list, budget_ms: float = None) -> list:
+        """
+        Koreksi token OOV. Lewat budget_ms, sisa token dibiarkan apa adanya.
+        """
+        budget_ms = self.budget_ms if budget_ms is None else budget_ms
+        deadline = time.perf_counter() + budget_ms / 1000
+        out = []
+        for i, t in enumerate(tokens):
+            if time.perf_counter() > deadline:
+                out.extend(tokens[i:])
+                break
+            out.append(self.lookup(t))
+        return out
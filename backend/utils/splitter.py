@@ -1,3 +1,4 @@
+import json
 import re
 from typing import List
 
@@ -11,3 +12,101 @@ def chunk_text(text: str, chunk_size: int = 200, overlap: int = 50) -> List[str]
         chunks.append(" ".join(chunk))
         i += chunk_size - overlap
     return chunks
+
+# batas kalimat: setelah . ! ? yang diikuti spasi
+re_sentence = re.compile(r"(?<=[.!?])\s+")
+
+def split_sentences(text: str) -> List[str]:
+    text = re.sub(r"\s+", " ", text).strip()
+    return [s for s in re_sentence.split(text) if s]
+
+class TokenChunker:
+    """
+    Chunker berbasis token tokenizer encoder (bukan jumlah kata):
+    - kalimat dipack sampai `target` token (termasuk special token [CLS]/[SEP])
+    - overlap = kalimat terakhir chunk sebelumnya, maksimal `overlap` token
+    - kalimat yang lebih panjang dari budget dipecah per kata
+    - `reserve` = token header yang nanti ditempel di depan chunk
+    """
+
+    def __init__(self, tokenizer, max_seq_length: int, target: int = 256, overlap: int = 32, min_tokens: int = 32):
+        self.tokenizer = tokenizer
+        self.max_seq_length = max_seq_length
+        self.target = min(target, max_seq_length) if target > 0 else max_seq_length
+        self.overlap = overlap
+        self.min_tokens = min_tokens
+        self.special = tokenizer.num_special_tokens_to_add()
+
+    def count(self, texts: List[str]) -> List[int]:
+        # jumlah token tanpa special token
+        if not texts:
+            return []
+        return [len(ids) for ids in self.tokenizer(list(texts), add_special_tokens=False)["input_ids"]]
+
+    def truncated(self, texts: List[str]) -> int:
+        # berapa teks yang bakal dipotong encoder
+        return sum(1 for n in self.count(texts) if n + self.special > self.max_seq_length)
+
+    def _pieces(self, text: str, budget: int):
+        # (teks, token) per kalimat; kalimat kepanjangan dipecah jadi potongan kata
+        sents = split_sentences(text)
+        out = []
+        for s, n in zip(sents, self.count(sents)):
+            if n <= budget:
+                out.append((s, n))
+                continue
+            words = s.split(" ")
+            cur, cur_n = [], 0
+            for w, wn in zip(words, self.count(words)):
+                if cur and cur_n + wn > budget:
+                    out.append((" ".join(cur), cur_n))
+                    cur, cur_n = [], 0
+                cur.append(w)
+                cur_n += wn
+            if cur:
+                out.append((" ".join(cur), cur_n))
+        return out
+
+    def chunk(self, text: str, reserve: int = 0) -> List[str]:
+        # header kepanjangan: tetap sisakan min_tokens buat isi (sisanya kepotong, kelihatan di report)
+        budget = max(self.target - self.special - reserve, self.min_tokens)
+        pieces = self._pieces(text, budget)
+        if not pieces:
+            return [""]
+
+        chunks = []
+        cur = []
+        cur_n = 0
+        for s, n in pieces:
+            if cur and cur_n + n > budget:
+                chunks.append(" ".join(p for p, _ in cur))
+                # bawa kalimat terakhir sebagai overlap selama muat
+                tail, tail_n = [], 0
+                for p, pn in reversed(cur):
+                    if tail_n + pn > self.overlap or tail_n + pn + n > budget:
+                        break
+                    tail.insert(0, (p, pn))
+                    tail_n += pn
+                cur, cur_n = tail, tail_n
+            cur.append((s, n))
+            cur_n += n
+        chunks.append(" ".join(p for p, _ in cur))
+        return chunks
+
+def load_chunker(model_name: str, target: int = 256, overlap: int = 32) -> TokenChunker:
+    """
+    Load tokenizer saja (tanpa model) + max_seq_length dari config
+    sentence-transformers. Fallback ke model_max_length tokenizer.
+    """
+    from transformers import AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    max_len = tokenizer.model_max_length
+    try:
+        from huggingface_hub import hf_hub_download
+
+        with open(hf_hub_download(model_name, "sentence_bert_config.json"), encoding="utf-8") as f:
+            max_len = min(max_len, json.load(f).get("max_seq_length", max_len))
+    except Exception as e:
+        print(f"[WARN] sentence_bert_config.json tidak terbaca ({e}), pakai model_max_length={max_len}")
+    return TokenChunker(tokenizer, max_len, target=target, overlap=overlap)
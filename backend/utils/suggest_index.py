@@ -0,0 +1,185 @@
+"""
+Index typeahead (GET /suggest) untuk judul, penulis, dan kata kunci katalog,
+dibangun ingest.py ke suggest.pkl:
+- kunci = teks ternormalisasi mulai dari tiap awal kata ("machine learning
+  dengan python" -> "learning dengan python", "dengan python", "python"), jadi
+  ketikan yang cocok di tengah judul tetap ketemu
+- semua kunci disimpan sebagai array terurut (sorted-array trie); prefix yang
+  pendek (<= node_len huruf) sudah punya top-N hasil per node, prefix lebih
+  panjang cukup bisect di array terurut
+- urutan = popularitas: judul = jumlah eksemplar, penulis / kata kunci = jumlah
+  eksemplar semua bukunya
+Lookup cuma dict / bisect, tanpa embedding dan tanpa LLM.
+"""
+import os
+import time
+from bisect import bisect_left
+from pathlib import Path
+
+import numpy as np
+
+from . import snapshot
+from .preprocess import clean_text, re_token_bm25
+
+suggest_file = "suggest.pkl"
+# interval cek snapshot baru di proses API (detik)
+reload_interval = float(os.getenv("SUGGEST_RELOAD_INTERVAL", "10"))
+
+empty_values = {"", "nan", "none"}
+
+def normalize(text: str) -> str:
+    return " ".join(re_token_bm25.findall(clean_text(text).lower()))
+
+def _display(text: str) -> str:
+    # "Machine learning dengan Python :" -> "Machine learning dengan Python"
+    return clean_text(text).rstrip(" :;,./")
+
+def _copies(availability: str) -> int:
+    return max(1, len([c for c in str(availability).split(";") if c.strip()]))
+
+class SuggestIndex:
+    def __init__(self, top_n: int = 10, node_len: int = 12):
+        self.top_n = top_n
+        self.node_len = node_len
+        # entri urut ranking (id entri = ranking, 0 = paling populer)
+        self.entries = []
+        self.keys = []                                  # kunci terurut
+        self.key_entry = np.empty(0, dtype=np.int32)    # kunci -> id entri
+        # node prefix -> potongan top_ids[top_start[k]:top_start[k + 1]]
+        self.nodes = {}
+        self.top_start = np.zeros(1, dtype=np.int32)
+        self.top_ids = np.empty(0, dtype=np.int32)
+
+    @classmethod
+    def build(cls, docs: list, **kwargs) -> "SuggestIndex":
+        ix = cls(**kwargs)
+        found = {}  # (kind, teks normal) -> entri
+
+        def add(kind, text, weight, parent_id=None, aliases=()):
+            norm = normalize(text)
+            if len(norm) < 2:
+                return
+            e = found.setdefault((kind, norm), {
+                "text": _display(text), "kind": kind, "parent_id": parent_id, "weight": 0, "aliases": set(),
+            })
+            e["weight"] += weight
+            e["aliases"].update(normalize(a) for a in aliases)
+
+        for d in docs:
+            if d.get("doc_kind") != "catalog_meta":
+                continue
+            copies = _copies(d.get("availability", ""))
+            add("title", str(d.get("title", "")), copies, d.get("parent_id"))
+            for name in str(d.get("authors", "")).split(";"):
+                name = name.strip()
+                if name.lower() in empty_values:
+                    continue
+                # "Kadir, Abdul" juga dicari lewat "abdul kadir"
+                alias = [" ".join(reversed([p.strip() for p in name.split(",", 1)]))] if "," in name else []
+                add("author", name, copies, aliases=alias)
+            for kw in str(d.get("keyword", "")).split(","):
+                if kw.strip().lower() not in empty_values:
+                    add("keyword", kw.strip().lower(), copies)
+
+        # ranking global: populer dulu, lalu teks pendek
+        ix.entries = sorted(found.items(), key=lambda kv: (-kv[1]["weight"], len(kv[0][1]), kv[0][1]))
+        keys = []
+        for eid, ((_, norm), e) in enumerate(ix.entries):
+            for full in {norm, *e["aliases"]}:
+                words = full.split(" ")
+                for i in range(len(words)):
+                    keys.append((" ".join(words[i:]), eid))
+        ix.entries = [
+            {"text": e["text"], "kind": e["kind"], "parent_id": e["parent_id"], "weight": e["weight"]}
+            for _, e in ix.entries
+        ]
+        keys.sort()
+        ix.keys = [k for k, _ in keys]
+        ix.key_entry = np.array([eid for _, eid in keys], dtype=np.int32)
+
+        # top-N per node: entri diproses urut ranking, N pertama yang masuk = top-N
+        top = {}
+        for key, eid in sorted(keys, key=lambda kv: kv[1]):
+            for n in range(1, min(ix.node_len, len(key)) + 1):
+                ids = top.setdefault(key[:n], [])
+                if len(ids) < ix.top_n and eid not in ids:
+                    ids.append(eid)
+        ix.nodes = {p: k for k, p in enumerate(top)}
+        ix.top_start = np.cumsum([0] + [len(ids) for ids in top.values()]).astype(np.int32)
+        ix.top_ids = np.array([eid for ids in top.values() for eid in ids], dtype=np.int32)
+        return ix
+
+    def _ids(self, prefix: str, n: int) -> list:
+        if len(prefix) <= self.node_len:
+            k = self.nodes.get(prefix)
+            if k is None:
+                return []
+            return self.top_ids[self.top_start[k]:self.top_start[k + 1]][:n].tolist()
+        return self._scan(prefix)[:n].tolist()
+
+    def _scan(self, prefix: str) -> np.ndarray:
+        # semua kunci di rentang [prefix, prefix + \uffff), id unik = urut ranking
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + "\uffff", lo)
+        return np.unique(self.key_entry[lo:hi])
+
+    def suggest(self, text: str, n: int = None, kinds=None) -> list:
+        n = min(n or self.top_n, self.top_n)
+        prefix = normalize(text)
+        if not prefix:
+            return []
+        # spasi di akhir = kata terakhir sudah selesai ("java " nggak cocok "javascript")
+        if text[-1:].isspace():
+            prefix += " "
+        if not kinds:
+            return [self.entries[i] for i in self._ids(prefix, n)]
+        # filter kind: top-N node bisa habis dipakai kind lain, jadi scan rentang penuh
+        out = []
+        for i in self._scan(prefix).tolist():
+            if self.entries[i]["kind"] in kinds:
+                out.append(self.entries[i])
+                if len(out) == n:
+                    break
+        return out
+
+    def info(self) -> dict:
+        return {"entries": len(self.entries), "keys": len(self.keys), "nodes": len(self.nodes)}
+
+class SuggestStore:
+    """
+    suggest.pkl dari snapshot aktif untuk proses API: CURRENT dicek tiap
+    `interval` detik, index di-load ulang kalau versinya ganti.
+    """
+
+    def __init__(self, vector_dir: Path, interval: float = reload_interval):
+        self.vector_dir = Path(vector_dir)
+        self.interval = interval
+        self.index = None
+        self.version = None
+        self._loaded = False
+        self._checked = float("-inf")
+
+    def maybe_reload(self):
+        now = time.monotonic()
+        if now - self._checked < self.interval:
+            return
+        self._checked = now
+        path, version = snapshot.resolve(self.vector_dir)
+        if self._loaded and version == self.version:
+            return
+        self._loaded, self.version = True, version
+        try:
+            self.index = snapshot.load_pickle(path / suggest_file)
+        except FileNotFoundError:
+            self.index = None
+            return
+        except Exception as e:
+            print(f"[WARN] {suggest_file} snapshot {version} gagal di-load: {e}")
+            return
+        print(f"[INFO] suggest index: {self.index.info()} (snapshot {version})")
+
+    def suggest(self, text: str, n: int = None, kinds=None):
+        # reload (load pickle) di luar jalur request, lihat reload_store di main.py
+        if self.index is None:
+            return None
+        return self.index.suggest(text, n, kinds)
@@ -0,0 +1,60 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# timing per request: {"stages": {nama: detik}, "values": {nama: angka}}
+_current = ContextVar("mlibbot_timings", default=None)
+
+def new_timings() -> dict:
+    return {"stages": {}, "values": {}}
+
+@contextmanager
+def collector():
+    """
+    Aktifkan pencatatan timing untuk blok ini (1 request / 1 task worker).
+    Di luar collector, stage() dan record() tidak melakukan apa-apa.
+    """
+    t = new_timings()
+    token = _current.set(t)
+    try:
+        yield t
+    finally:
+        _current.reset(token)
+
+@contextmanager
+def stage(name: str):
+    t = _current.get()
+    if t is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        # dijumlah kalau stage yang sama kepanggil beberapa kali
+        t["stages"][name] = t["stages"].get(name, 0.0) + (time.perf_counter() - t0)
+
+def current():
+    # timing request yang sedang jalan (None di luar collector)
+    return _current.get()
+
+def record(name: str, value: float):
+    t = _current.get()
+    if t is not None:
+        t["values"][name] = value
+
+def merge(other: dict, borrowed: bool = False):
+    """
+    Gabung timing dari worker process ke collector request.
+    borrowed=True: kerjaan request lain (follower single-flight) -> tetap masuk
+    Server-Timing / query log, tapi namanya dicatat di "borrowed" supaya
+    metrics.observe nggak menghitungnya dua kali.
+    """
+    t = _current.get()
+    if t is None or not other:
+        return
+    for name, sec in other.get("stages", {}).items():
+        t["stages"][name] = t["stages"].get(name, 0.0) + sec
+    t["values"].update(other.get("values", {}))
+    if borrowed:
+        t.setdefault("borrowed", set()).update(other.get("stages", {}), other.get("values", {}))
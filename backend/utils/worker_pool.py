@@ -0,0 +1,150 @@
+"""
+Process pool untuk kerjaan CPU-bound (intent + BM25 + encode IndoBERT + FAISS),
+supaya event loop FastAPI nggak ke-block selama query diproses.
+
+Tiap worker load model sendiri sekali (initializer), thread torch/FAISS
+di-pin supaya N worker x M thread nggak oversubscribe core.
+"""
+import asyncio
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from . import timing
+
+# 0 = tanpa pool, semua jalan di proses API (mode lama / dev)
+retrieval_workers = int(os.getenv("RETRIEVAL_WORKERS", "2"))
+worker_threads = int(os.getenv("RETRIEVAL_WORKER_THREADS", "1"))
+# deadline default per request (detik)
+retrieval_timeout = float(os.getenv("RETRIEVAL_TIMEOUT", "20"))
+
+_pool = None
+docs_count = 0
+
+class RetrievalTimeout(Exception):
+    pass
+
+def _pin_threads(n: int):
+    # harus di-set sebelum torch / faiss ke-import di worker
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(n)
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+
+    with timing.stage("import_torch"):
+        import torch
+    with timing.stage("import_faiss"):
+        import faiss
+    torch.set_num_threads(n)
+    torch.set_num_interop_threads(1)
+    faiss.omp_set_num_threads(n)
+
+def _init_worker(n_threads: int):
+    _pin_threads(n_threads)
+
+    with timing.stage("import_retriever"):
+        from . import retriever
+    with timing.stage("import_intent"):
+        from . import intent
+
+    global docs_count
+    docs_count = retriever.load_indexes()
+    # model intent di-load sekali di worker, bukan di request pertama
+    intent.get_classifier()
+    # tiap worker cek snapshot baru sendiri dan swap index di background
+    retriever.start_watcher()
+
+# task yang dikirim ke worker (harus top-level biar bisa di-pickle)
+def _timed(fn, *args):
+    # timing stage dicatat di worker lalu dikirim balik bareng hasilnya
+    with timing.collector() as t:
+        result = fn(*args)
+    return result, t
+
+def _warmup():
+    return docs_count
+
+def task_index_info():
+    from .retriever import index_info
+    return index_info()
+
+def task_intent(message: str):
+    from .intent import predict_intent_conf
+    return predict_intent_conf(message)
+
+def task_intent_batch(messages: list):
+    from .intent import predict_intent_batch
+    return predict_intent_batch(messages)
+
+def task_retrieve(message: str, method: str, top_k: int):
+    from .retriever import retrieve
+    return retrieve(message, method, top_k)
+
+def task_catalog_search(params: dict):
+    from .retriever import catalog_search
+    return catalog_search(**params)
+
+def task_compare(message: str, top_k: int):
+    from .retriever import retrieve_bm25, retrieve_faiss, retrieve_hybrid
+    return (
+        retrieve_bm25(message, top_k),
+        retrieve_faiss(message, top_k),
+        retrieve_hybrid(message, top_k),
+    )
+
+def task_chat(message: str, method: str, top_k: int):
+    # intent + retrieval dalam satu round-trip ke worker; embedding query FAISS ikut
+    # dipakai intent logreg_indobert (teks encoder-nya sama, preprocess.embed_text)
+    from .intent import predict_intent_conf
+    from .retriever import encode_query, retrieve
+
+    q_emb = encode_query(message) if method != "bm25" else None
+    return predict_intent_conf(message, q_emb), retrieve(message, method, top_k, q_emb=q_emb)
+
+async def start_pool():
+    """
+    Pre-fork semua worker dan tunggu model ke-load, jadi request pertama
+    nggak kena cold start.
+    """
+    global _pool, docs_count
+
+    if retrieval_workers <= 0:
+        from . import intent, retriever
+        docs_count = retriever.load_indexes()
+        intent.get_classifier()
+        retriever.start_watcher()
+        return
+
+    _pool = ProcessPoolExecutor(
+        max_workers=retrieval_workers,
+        # spawn: aman buat torch (fork setelah torch ke-load bisa deadlock)
+        mp_context=mp.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(worker_threads,),
+    )
+    loop = asyncio.get_running_loop()
+    counts = await asyncio.gather(*[
+        loop.run_in_executor(_pool, _warmup) for _ in range(retrieval_workers)
+    ])
+    docs_count = counts[0]
+
+def stop_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+async def run(fn, *args, timeout: float = None):
+    """
+    Jalankan task di pool dan await hasilnya dengan deadline.
+    Kalau deadline lewat / request di-cancel, task yang masih antre dibatalkan
+    (task yang sudah jalan di worker tetap selesai, hasilnya dibuang).
+    """
+    loop = asyncio.get_running_loop()
+    # tanpa pool: tetap keluar dari event loop lewat thread default
+    fut = loop.run_in_executor(_pool, _timed, fn, *args)
+    try:
+        result, t = await asyncio.wait_for(fut, timeout or retrieval_timeout)
+    except asyncio.TimeoutError:
+        raise RetrievalTimeout(f"{fn.__name__} lewat deadline {timeout or retrieval_timeout}s")
+    timing.merge(t)
+    return result